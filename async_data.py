@@ -0,0 +1,262 @@
+import asyncio
+import functools
+import json
+import logging
+import time
+from typing import List
+
+import websockets
+import zmq
+import zmq.asyncio
+
+import settings
+from book import ChecksumMismatchError
+from data import (
+    PRIORITY_TOPICS,
+    _channel_processors,
+    _drop,
+    _frame_key,
+    _process_message,
+    _push_socket,
+    _reconnect_delay,
+    _resync_book,
+    _split_pairs,
+    _timed_frames,
+)
+from feed_status import GapDetector
+from messages import BookSnapshotTimer
+
+
+async def _push_or_drop_async(
+    zmq_push_socket: zmq.asyncio.Socket,
+    frames: List[bytes],
+    drop_policy: str = settings.DROP_POLICY,
+) -> None:
+    """
+    Asyncio counterpart of data._push_or_drop().
+    """
+
+    if drop_policy == "drop-by-priority" and PRIORITY_TOPICS[frames[0]]:
+        await zmq_push_socket.send_multipart(frames)
+        return
+
+    try:
+        await zmq_push_socket.send_multipart(frames, zmq.NOBLOCK)
+    except zmq.Again:
+        _drop(frames)
+
+
+async def stream_data_async(
+    pairs: List[str],
+    subscriptions: List[dict],
+    zmq_push_socket: zmq.asyncio.Socket,
+    url: str = settings.KRAKEN_WS_URL,
+    capture=None,
+    stats=None,
+    conflator=None,
+    candles=None,
+    watchdog=None,
+):
+    """
+    Asyncio counterpart of data.stream_data(). Subscribes to the Kraken
+    WebSockets API and streams data for multiple channels and currency pair/s
+    over a single websocket connection, reconnecting forever.
+
+    :param pairs: Currency pairs in "XXX/YYY" format.
+    :param subscriptions: Kraken subscription objects, e.g. {"name": "trade"}
+    or {"name": "ohlc", "interval": 60}.
+    :param zmq_push_socket: ZeroMQ PUSH Socket shared by all connections
+    running in the same event loop.
+    :param url: Kraken websocket API url.
+    :param capture: Optional capture.FrameCapture every raw frame is appended
+    to.
+    :param stats: Optional stats.LatencyStats the stage latencies are
+    recorded to.
+    :param conflator: Optional conflation.Conflator ticker and spread
+    messages are offered to.
+    :param candles: Optional candles.CandleAggregator the trades are added
+    to.
+    :param watchdog: Optional health.Watchdog the connection is registered
+    with.
+    """
+
+    gaps = GapDetector([pair.upper() for pair in pairs])
+    pairs = json.dumps(gaps.pairs)
+    snapshots = BookSnapshotTimer(
+        settings.BOOK_SNAPSHOT_INTERVAL, settings.SCHEMA_VERSIONS
+    )
+    processors = _channel_processors(candles, gaps, snapshots)
+
+    last_seen = watched = None
+    if watchdog is not None:
+        watched = watchdog.register(gaps.pairs)
+        last_seen = watched.last_seen
+
+    loop = asyncio.get_running_loop()
+
+    if settings.DROP_POLICY == "block":
+        push = zmq_push_socket.send_multipart
+    else:
+        push = functools.partial(
+            _push_or_drop_async, zmq_push_socket, drop_policy=settings.DROP_POLICY
+        )
+
+    attempt = 0
+    while True:
+        connected = False
+        reason = "closed"
+
+        try:
+            async with websockets.connect(
+                url,
+                max_size=None,
+                ping_interval=settings.KRAKEN_WS_PING_INTERVAL,
+                ping_timeout=settings.KRAKEN_WS_PING_TIMEOUT,
+            ) as ws:
+                for subscription in subscriptions:
+                    await ws.send(
+                        f'{{"event":"subscribe", "subscription":{json.dumps(subscription)}, "pair":{pairs}}}'
+                    )
+
+                connected = True
+                for topic, status in gaps.connected():
+                    await push([topic, status.SerializeToString()])
+
+                if watched is not None:
+                    # called from the watchdog thread, aborting the transport
+                    # ends the connection without a closing handshake
+                    watched.opened(
+                        functools.partial(loop.call_soon_threadsafe, ws.transport.abort)
+                    )
+
+                async for message in ws:
+                    if capture is not None:
+                        capture.append(message)
+
+                    if stats is not None:
+                        received_ns = time.perf_counter_ns()
+
+                    try:
+                        processed_messages = _process_message(
+                            message, processors, stats, last_seen
+                        )
+                    except ChecksumMismatchError as error:
+                        for request in _resync_book(error):
+                            await ws.send(request)
+                        continue
+
+                    # books without updates get their snapshots with any frame, including
+                    # heartbeats
+                    processed_messages.extend(snapshots.due())
+
+                    if conflator is not None:
+                        conflator.offer(message, processed_messages)
+
+                    if stats is not None:
+                        key = _frame_key(message)
+                        for frames in _timed_frames(processed_messages, stats, key):
+                            await push(frames)
+                            stats.record(
+                                "send",
+                                key,
+                                time.perf_counter_ns()
+                                - int.from_bytes(frames[2], "little"),
+                            )
+                        stats.record("frame", key, time.perf_counter_ns() - received_ns)
+                        continue
+
+                    for topic, processed_message in processed_messages:
+                        await push(
+                            [
+                                topic,
+                                processed_message.SerializeToString(),
+                            ],
+                        )
+        except websockets.ConnectionClosedOK as error:
+            # closed by Kraken with a closing handshake, e.g. on maintenance
+            logging.warning(error)
+            reason = str(error)
+        # connect timeouts raise asyncio.TimeoutError, not an OSError before
+        # Python 3.11
+        except (OSError, asyncio.TimeoutError, websockets.WebSocketException) as error:
+            logging.error(error)
+            reason = str(error)
+        except Exception as error:
+            # a bug must not end the connection for good, websocket-client
+            # likewise logs errors raised by the callbacks of data.stream_data()
+            logging.exception(f"Unexpected error on the connection to {url}")
+            reason = repr(error)
+
+        if watched is not None:
+            watched.closed()
+
+        if connected:
+            attempt = 0
+            for topic, status in gaps.disconnected(reason):
+                await push([topic, status.SerializeToString()])
+        else:
+            attempt += 1
+
+        delay = _reconnect_delay(attempt)
+        logging.warning(f"Connection to {url} lost, reconnecting in {delay:.1f}s")
+        await asyncio.sleep(delay)
+
+
+async def run_streams_async(
+    pairs: List[str],
+    subscriptions: List[dict],
+    zmq_context: zmq.Context,
+    connections: int = settings.KRAKEN_WS_CONNECTIONS,
+    url: str = settings.KRAKEN_WS_URL,
+    capture=None,
+    stats=None,
+    conflator=None,
+    candles=None,
+    watchdog=None,
+):
+    """
+    Runs a pool of multiplexed websocket connections in a single event loop,
+    each streaming all subscriptions for its share of the currency pairs.
+
+    :param pairs: Currency pairs in "XXX/YYY" format.
+    :param subscriptions: Kraken subscription objects.
+    :param zmq_context: ZeroMQ Context shared with the PULL/PUB proxy.
+    :param connections: Maximum number of websocket connections.
+    :param url: Kraken websocket API url.
+    :param capture: Optional capture.FrameCapture every raw frame is appended
+    to.
+    :param stats: Optional stats.LatencyStats the stage latencies are
+    recorded to.
+    :param conflator: Optional conflation.Conflator ticker and spread
+    messages are offered to.
+    :param candles: Optional candles.CandleAggregator the trades are added
+    to.
+    :param watchdog: Optional health.Watchdog shared by all connections.
+    """
+
+    # Shadow the shared Context so the asyncio PUSH Socket can reach the
+    # inproc/IPC PULL socket bound by main.py
+    async_context = zmq.asyncio.Context.shadow(zmq_context.underlying)
+
+    # A single PUSH Socket is enough, all connections run in the same thread
+    zmq_push_socket = _push_socket(async_context)
+
+    try:
+        await asyncio.gather(
+            *[
+                stream_data_async(
+                    group,
+                    subscriptions,
+                    zmq_push_socket,
+                    url,
+                    capture,
+                    stats,
+                    conflator,
+                    candles,
+                    watchdog,
+                )
+                for group in _split_pairs(pairs, connections)
+            ]
+        )
+    finally:
+        zmq_push_socket.close()
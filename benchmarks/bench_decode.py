@@ -0,0 +1,35 @@
+"""
+Microbenchmark of the JSON decode path on recorded Kraken frames: full
+stdlib json.loads of every frame (as every process_*_message used to do)
+versus messages.decode_message(), which skips event frames without parsing
+them and decodes data frames with orjson when installed.
+
+Run from the repository root:
+    python -m benchmarks.bench_decode
+"""
+
+import json
+import timeit
+
+import messages
+from benchmarks.frames import FRAMES
+
+NUMBER = 100_000
+
+
+def _ns_per_call(function, frame) -> float:
+    return timeit.timeit(lambda: function(frame), number=NUMBER) / NUMBER * 1e9
+
+
+def main():
+    print(f"decoder: {messages._json_loads.__module__}")
+    print(f"{'frame':<20}{'json.loads ns':>16}{'decode ns':>12}{'speedup':>10}")
+
+    for name, frame in FRAMES.items():
+        baseline = _ns_per_call(json.loads, frame)
+        decoded = _ns_per_call(messages.decode_message, frame)
+        print(f"{name:<20}{baseline:>16.0f}{decoded:>12.0f}{baseline / decoded:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
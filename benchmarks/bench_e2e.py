@@ -0,0 +1,132 @@
+"""
+End to end load test: runs main.py against the local fake Kraken server
+(benchmarks/fake_kraken.py) and measures, from a local SUB socket, the
+throughput of the PUB socket and the latency from the exchange timestamp of
+every trade frame (set to the send time by the fake server) to its delivery
+as a "v2 - Trade" message.
+
+Run from the repository root:
+    python -m benchmarks.bench_e2e --pairs 20 --rate 20000 --duration 10
+"""
+
+import argparse
+import asyncio
+import json
+import subprocess
+import sys
+import threading
+import time
+
+import zmq
+
+from benchmarks.fake_kraken import FakeKrakenServer
+from kraken_msg_v2_pb2 import Trade
+
+HOST = "127.0.0.1"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--pub-url", default="tcp://127.0.0.1:5555")
+    parser.add_argument("--pairs", type=int, default=10)
+    parser.add_argument(
+        "--rate", type=int, default=10000, help="frames per second and connection"
+    )
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--mode", choices=["threaded", "asyncio"], default="threaded")
+    parser.add_argument("--workers", type=int, default=0)
+    args = parser.parse_args()
+
+    ready = threading.Event()
+
+    async def serve():
+        server_ready = asyncio.Event()
+        serving = asyncio.ensure_future(
+            FakeKrakenServer(args.rate).serve(HOST, args.port, server_ready)
+        )
+        await server_ready.wait()
+        ready.set()
+        await serving
+
+    threading.Thread(target=asyncio.run, args=(serve(),), daemon=True).start()
+    ready.wait()
+
+    pairs = ",".join(f"P{i:03d}/USD" for i in range(args.pairs))
+    feed = subprocess.Popen(
+        [
+            sys.executable,
+            "main.py",
+            "--url",
+            f"ws://{HOST}:{args.port}/",
+            "--pairs",
+            pairs,
+            "--mode",
+            args.mode,
+            "--workers",
+            str(args.workers),
+        ]
+    )
+
+    zmq_context = zmq.Context()
+    sub_socket = zmq_context.socket(zmq.SUB)
+    sub_socket.setsockopt(zmq.RCVHWM, 0)
+    sub_socket.setsockopt(zmq.SUBSCRIBE, b"")
+    sub_socket.connect(args.pub_url)
+
+    trade = Trade()
+    latencies = []
+    received = 0
+
+    try:
+        # skip the warm up, until the first message arrives
+        while not sub_socket.poll(1000):
+            if feed.poll() is not None:
+                sys.exit(f"main.py exited with code {feed.returncode}")
+        sub_socket.recv_multipart()
+        started = time.perf_counter()
+
+        while time.perf_counter() - started < args.duration:
+            if not sub_socket.poll(100):
+                continue
+
+            topic, payload = sub_socket.recv_multipart()
+            received += 1
+
+            if topic.startswith(b"v2 - Trade - "):
+                now = time.time_ns()
+                trade.ParseFromString(payload)
+                latencies.append(now - trade.time)
+
+        elapsed = time.perf_counter() - started
+    finally:
+        feed.terminate()
+        feed.wait()
+
+    latencies.sort()
+
+    def percentile(p: float) -> float:
+        if not latencies:
+            return None
+        return round(
+            latencies[min(int(len(latencies) * p), len(latencies) - 1)] / 1000, 1
+        )
+
+    print(
+        json.dumps(
+            {
+                "mode": args.mode,
+                "workers": args.workers,
+                "pairs": args.pairs,
+                "pub_msgs_per_sec": round(received / elapsed),
+                "trades": len(latencies),
+                "trade_latency_p50_us": percentile(0.5),
+                "trade_latency_p99_us": percentile(0.99),
+                "trade_latency_p999_us": percentile(0.999),
+            }
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+"""
+Compares the threaded (data.py) and the asyncio (async_data.py) streaming
+engines end to end against a local websocket server replaying Kraken trade
+frames: websocket frame -> message processor -> PUSH -> PULL.
+
+Every frame carries its send time in the trade "misc" field, which is copied
+verbatim into the protobuf message, so latency is measured per message.
+
+Run from the repository root, optionally pinned to one core:
+    taskset -c 0 python -m benchmarks.bench_engines --messages 100000
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import threading
+import time
+
+import websockets
+import zmq
+
+import settings
+from async_data import run_streams_async
+from data import stream_data
+from kraken_msg_pb2 import Trade
+
+HOST = "127.0.0.1"
+PORT = 8765
+
+
+def _serve(messages: int, rate: int, ready: threading.Event):
+    """
+    Runs a websocket server which answers every connection with `messages`
+    trade frames, paced at `rate` frames per second (0 = as fast as possible),
+    then keeps the connection open, so the client doesn't reconnect and replay
+    the frames again.
+    """
+
+    async def handler(ws):
+        # wait for the subscribe event
+        await ws.recv()
+        interval = 1 / rate if rate else 0
+        started = time.perf_counter()
+
+        for i in range(messages):
+            if interval:
+                delay = started + i * interval - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+
+            await ws.send(
+                json.dumps(
+                    [
+                        337,
+                        [
+                            [
+                                "19416.20000",
+                                "0.00100000",
+                                "1664479174.047114",
+                                "s",
+                                "m",
+                                str(time.perf_counter_ns()),
+                            ]
+                        ],
+                        "trade",
+                        "XBT/USD",
+                    ]
+                )
+            )
+
+        await ws.wait_closed()
+
+    async def main():
+        async with websockets.serve(handler, HOST, PORT, max_size=None):
+            ready.set()
+            await asyncio.Future()
+
+    asyncio.run(main())
+
+
+def _run_client(mode: str, zmq_context: zmq.Context):
+    url = f"ws://{HOST}:{PORT}/"
+    subscriptions = [{"name": "trade"}]
+
+    if mode == "asyncio":
+        asyncio.run(run_streams_async(["XBT/USD"], subscriptions, zmq_context, 1, url))
+    else:
+        stream_data(["XBT/USD"], subscriptions, zmq_context, url)
+
+
+def bench(mode: str, messages: int, zmq_context: zmq.Context) -> dict:
+    pull_socket = zmq_context.socket(zmq.PULL)
+    pull_socket.bind(settings.ZMQ_PUSH_PULL_IPC_URL)
+
+    # the streams reconnect forever, the client is left connected and idle
+    # after the last frame, see _serve()
+    client = threading.Thread(target=_run_client, args=(mode, zmq_context), daemon=True)
+    client.start()
+
+    trade = Trade()
+    latencies = []
+    started = None
+    while len(latencies) < messages:
+        topic, payload = pull_socket.recv_multipart()
+        received = time.perf_counter_ns()
+        if not topic.startswith(b"Trade - "):
+            continue
+        if started is None:
+            started = received
+
+        trade.ParseFromString(payload)
+        latencies.append(received - int(trade.misc))
+    elapsed = (time.perf_counter_ns() - started) / 1e9
+
+    pull_socket.close()
+    latencies.sort()
+
+    return {
+        "mode": mode,
+        "msgs_per_sec": round(messages / elapsed) if elapsed else None,
+        "p50_us": round(statistics.median(latencies) / 1000, 1),
+        "p99_us": round(latencies[int(len(latencies) * 0.99)] / 1000, 1),
+        "max_us": round(latencies[-1] / 1000, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--messages", type=int, default=50_000)
+    parser.add_argument(
+        "--rate", type=int, default=0, help="frames per second, 0 = unpaced"
+    )
+    args = parser.parse_args()
+
+    ready = threading.Event()
+    threading.Thread(
+        target=_serve, args=(args.messages, args.rate, ready), daemon=True
+    ).start()
+    ready.wait()
+
+    zmq_context = zmq.Context()
+    for mode in ["threaded", "asyncio"]:
+        print(json.dumps(bench(mode, args.messages, zmq_context)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+"""
+Microbenchmarks of the messages.py hot path on the recorded Kraken frames in
+benchmarks/frames.py: every process_*_message function (including decoding)
+and protobuf SerializeToString of its messages.
+
+For every case it reports messages per second, ns per message and memory
+allocated per message (tracemalloc: blocks still referenced by the results
+and peak bytes), and writes them to a JSON results file. Pass a previous
+results file as --baseline to fail on ns/message regressions.
+
+Run from the repository root:
+    python -m benchmarks.bench_messages --output bench_results.json
+    python -m benchmarks.bench_messages --baseline bench_results.json
+"""
+
+import argparse
+import functools
+import json
+import os
+import sys
+import time
+import tracemalloc
+from typing import Callable, Dict
+
+import messages
+from benchmarks.frames import (
+    BOOK_SNAPSHOT,
+    BOOK_UPDATE,
+    OHLC,
+    SPREAD,
+    TICKER,
+    TRADE,
+)
+
+
+def _book_processor(version: int) -> Callable:
+    """
+    :return: Book processor with a synced XBT/USD book, applying BOOK_UPDATE
+    """
+
+    order_books = {}
+    processor = functools.partial(
+        messages.process_book_message,
+        order_books=order_books,
+        snapshot_interval=float("inf"),
+        versions=(version,),
+    )
+    processor(BOOK_SNAPSHOT)
+
+    return processor
+
+
+def _processed_messages(result) -> list:
+    return result if isinstance(result, list) else [result]
+
+
+def _cases() -> Dict[str, Callable[[], object]]:
+    """
+    :return: Benchmark cases by name, every case processes a single frame
+    """
+
+    cases = {
+        "ticker": functools.partial(messages.process_ticker_message, TICKER),
+        "spread": functools.partial(messages.process_spread_message, SPREAD),
+        "ohlc": functools.partial(messages.process_ohlc_message, OHLC),
+        "trade_x4": functools.partial(messages.process_trade_message, TRADE),
+        "trade_x4_batch": functools.partial(
+            messages.process_trade_message, TRADE, single=False, batch=True
+        ),
+        "book_update": functools.partial(_book_processor(1), BOOK_UPDATE),
+        "ticker_v2": functools.partial(messages.process_ticker_message_v2, TICKER),
+        "spread_v2": functools.partial(messages.process_spread_message_v2, SPREAD),
+        "ohlc_v2": functools.partial(messages.process_ohlc_message_v2, OHLC),
+        "trade_x4_v2": functools.partial(messages.process_trade_message_v2, TRADE),
+        "book_update_v2": functools.partial(_book_processor(2), BOOK_UPDATE),
+    }
+
+    # serialization of the messages built by each processor case
+    for name, case in list(cases.items()):
+        processed_messages = _processed_messages(case())
+
+        def serialize(processed_messages=processed_messages):
+            return [message.SerializeToString() for _, message in processed_messages]
+
+        cases[f"serialize_{name}"] = serialize
+
+    return cases
+
+
+def _measure(case: Callable[[], object], number: int) -> dict:
+    # warm up caches like the topic table
+    for _ in range(min(number, 1000)):
+        case()
+
+    started = time.perf_counter_ns()
+    for _ in range(number):
+        case()
+    elapsed = time.perf_counter_ns() - started
+
+    allocations = min(number, 1000)
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    tracemalloc.reset_peak()
+    results = [case() for _ in range(allocations)]
+    _, peak = tracemalloc.get_traced_memory()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+
+    retained_blocks = sum(
+        stat.count_diff for stat in after.compare_to(before, "lineno")
+    )
+    del results
+
+    return {
+        "msgs_per_sec": round(number / elapsed * 1e9),
+        "ns_per_msg": round(elapsed / number),
+        "retained_blocks_per_msg": round(retained_blocks / allocations, 1),
+        "peak_bytes_per_msg": round(peak / allocations),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--number", type=int, default=20_000)
+    parser.add_argument(
+        "--output",
+        help="results file, bench_results.json by default, not written when "
+        "comparing against a baseline unless given",
+    )
+    parser.add_argument("--baseline", help="results file to compare against")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.2,
+        help="allowed ns/message regression against the baseline",
+    )
+    args = parser.parse_args()
+
+    output_path = args.output
+    if output_path is None and not args.baseline:
+        output_path = "bench_results.json"
+
+    # load the baseline before anything is written, so it's never compared
+    # against the results of this run
+    baseline = None
+    if args.baseline:
+        if output_path and os.path.abspath(output_path) == os.path.abspath(
+            args.baseline
+        ):
+            parser.error("--output must not overwrite the --baseline file")
+
+        with open(args.baseline) as baseline_file:
+            baseline = json.load(baseline_file)["results"]
+
+    results = {}
+    print(f"{'case':<28}{'msgs/s':>12}{'ns/msg':>10}{'blocks':>8}{'peak B':>9}")
+    for name, case in _cases().items():
+        result = results[name] = _measure(case, args.number)
+        print(
+            f"{name:<28}{result['msgs_per_sec']:>12}{result['ns_per_msg']:>10}"
+            f"{result['retained_blocks_per_msg']:>8}{result['peak_bytes_per_msg']:>9}"
+        )
+
+    if output_path:
+        with open(output_path, "w") as output:
+            json.dump(
+                {
+                    "python": sys.version,
+                    "decoder": messages._json_loads.__module__,
+                    "results": results,
+                },
+                output,
+                indent=2,
+            )
+
+    if baseline is not None:
+        regressions = [
+            name
+            for name, result in results.items()
+            if name in baseline
+            and result["ns_per_msg"]
+            > baseline[name]["ns_per_msg"] * (1 + args.tolerance)
+        ]
+        if regressions:
+            print(f"Regressions against {args.baseline}: {', '.join(regressions)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
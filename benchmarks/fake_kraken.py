@@ -0,0 +1,404 @@
+"""
+Local stand-in for the Kraken websocket API, for offline end to end load
+tests. Speaks the subscribe/unsubscribe/subscriptionStatus/heartbeat protocol
+and streams synthesized (or replayed) ticker, spread, OHLC, trade and book
+frames for all subscriptions of a connection at a configurable rate.
+
+Synthesized trade and spread frames carry the current time as exchange
+timestamp, so consumers can measure end to end latency. Book frames carry
+valid Kraken checksums.
+
+Run from the repository root, then point the feed at it:
+    python -m benchmarks.fake_kraken --port 8765 --rate 10000
+    python main.py --url ws://127.0.0.1:8765/ --pairs XBT/USD,ETH/USD
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import random
+import time
+from typing import Dict, List, Optional, Tuple
+
+import websockets
+
+from book import OrderBook
+
+# Seconds without data frames after which a heartbeat is sent
+HEARTBEAT_INTERVAL = 1.0
+
+# Frames are sent in bursts, every this many seconds
+SEND_INTERVAL = 0.001
+
+
+def _channel_name(subscription: dict) -> str:
+    """
+    :return: Channel name of a subscription as used in Kraken data frames,
+    e.g. "ohlc-60" or "book-10".
+    """
+
+    name = subscription["name"]
+
+    if name == "ohlc":
+        return f"ohlc-{subscription.get('interval', 1)}"
+    if name == "book":
+        return f"book-{subscription.get('depth', 10)}"
+
+    return name
+
+
+def _now() -> str:
+    return f"{time.time():.6f}"
+
+
+class _SyntheticStream:
+    """
+    Synthesizes the data frames of a single channel and pair around a random
+    walk price.
+    """
+
+    def __init__(self, channel_id: int, channel_name: str, pair: str):
+        self.channel_id = channel_id
+        self.channel_name = channel_name
+        self.pair = pair
+        self.price = random.uniform(100, 20000)
+        self.order_book: Optional[OrderBook] = None
+
+    def _walk(self) -> float:
+        self.price = max(self.price * (1 + random.gauss(0, 0.0001)), 1.0)
+        return self.price
+
+    def _frame(self, *payload) -> str:
+        return json.dumps(
+            [self.channel_id, *payload, self.channel_name, self.pair],
+            separators=(",", ":"),
+        )
+
+    def first_frames(self) -> List[str]:
+        """
+        :return: Frames sent right after subscribing, the book snapshot.
+        """
+
+        if not self.channel_name.startswith("book"):
+            return []
+
+        depth = int(self.channel_name.split("-")[1])
+        self.order_book = OrderBook(self.pair, depth)
+        timestamp = _now()
+        snapshot = {
+            "as": [
+                [
+                    f"{self.price + i * 0.1:.1f}",
+                    f"{random.uniform(0.1, 5):.8f}",
+                    timestamp,
+                ]
+                for i in range(1, depth + 1)
+            ],
+            "bs": [
+                [
+                    f"{self.price - i * 0.1:.1f}",
+                    f"{random.uniform(0.1, 5):.8f}",
+                    timestamp,
+                ]
+                for i in range(depth)
+            ],
+        }
+        self.order_book.apply(snapshot)
+
+        return [self._frame(snapshot)]
+
+    def next_frame(self) -> str:
+        price = self._walk()
+        timestamp = _now()
+
+        if self.channel_name == "ticker":
+            close = f"{price:.5f}"
+            return self._frame(
+                {
+                    "a": [f"{price + 0.1:.5f}", 0, "1.00000000"],
+                    "b": [f"{price - 0.1:.5f}", 0, "1.00000000"],
+                    "c": [close, "0.01000000"],
+                    "v": ["9663.60340294", "9980.88762714"],
+                    "p": [close, close],
+                    "t": [28811, 30665],
+                    "l": [close, close],
+                    "h": [close, close],
+                    "o": [close, close],
+                }
+            )
+
+        if self.channel_name == "spread":
+            return self._frame(
+                [
+                    f"{price - 0.1:.5f}",
+                    f"{price + 0.1:.5f}",
+                    timestamp,
+                    f"{random.uniform(0.1, 5):.8f}",
+                    f"{random.uniform(0.1, 5):.8f}",
+                ]
+            )
+
+        if self.channel_name == "trade":
+            return self._frame(
+                [
+                    [
+                        f"{price:.5f}",
+                        f"{random.uniform(0.001, 2):.8f}",
+                        timestamp,
+                        random.choice("bs"),
+                        random.choice("ml"),
+                        "",
+                    ]
+                ]
+            )
+
+        if self.channel_name.startswith("ohlc"):
+            interval = int(self.channel_name.split("-")[1]) * 60
+            end = (int(time.time()) // interval + 1) * interval
+            return self._frame(
+                [
+                    timestamp,
+                    f"{end:.6f}",
+                    *[f"{price:.5f}"] * 5,
+                    f"{random.uniform(0.1, 50):.8f}",
+                    random.randint(1, 500),
+                ]
+            )
+
+        return self._book_update(timestamp)
+
+    def _book_update(self, timestamp: str) -> str:
+        order_book = self.order_book
+        side, key = random.choice([(order_book.asks, "a"), (order_book.bids, "b")])
+        levels = side.levels()
+
+        if levels and random.random() < 0.5:
+            # change or delete an existing level
+            price = random.choice(levels)[0]
+            volume = random.choice(["0.00000000", f"{random.uniform(0.1, 5):.8f}"])
+        else:
+            # add a level next to the best price
+            best = float(levels[0][0]) if levels else self.price
+            price = f"{best + (0.1 if key == 'b' else -0.1) * random.random():.1f}"
+            volume = f"{random.uniform(0.1, 5):.8f}"
+
+        update = {key: [[price, volume, timestamp]]}
+        order_book.apply(update)
+        update["c"] = str(order_book.checksum())
+
+        return self._frame(update)
+
+
+class _ReplayStream:
+    """
+    Replays recorded data frames of a single channel and pair in a loop.
+    """
+
+    def __init__(self, frames: List[str]):
+        self._frames = itertools.cycle(frames)
+
+    def first_frames(self) -> List[str]:
+        return []
+
+    def next_frame(self) -> str:
+        return next(self._frames)
+
+
+class _RoundRobin:
+    """
+    Streams of a single connection by (channel name, pair), taking turns to
+    send frames. The turn is kept across send bursts, so every subscription
+    gets its share of the rate even when a burst is a single frame.
+    """
+
+    def __init__(self):
+        self.streams = {}
+        self._order = []
+        self._turn = 0
+
+    def __bool__(self) -> bool:
+        return bool(self._order)
+
+    def add(self, key: Tuple[str, str], stream):
+        self.streams[key] = stream
+        self._order = list(self.streams.values())
+
+    def remove(self, key: Tuple[str, str]):
+        if self.streams.pop(key, None) is not None:
+            self._order = list(self.streams.values())
+
+    def next_frames(self, count: int) -> List[str]:
+        """
+        :return: The next count data frames, one stream after the other.
+        """
+
+        frames = []
+
+        for _ in range(count):
+            self._turn %= len(self._order)
+            frames.append(self._order[self._turn].next_frame())
+            self._turn += 1
+
+        return frames
+
+
+class FakeKrakenServer:
+    """
+    Fake Kraken websocket API server.
+
+    :param rate: Data frames per second and connection, spread round-robin
+    across all subscriptions of the connection.
+    :param replay_frames: Recorded raw data frames by (channel name, pair),
+    replayed instead of synthesized frames where available.
+    """
+
+    def __init__(
+        self,
+        rate: int = 1000,
+        replay_frames: Optional[Dict[Tuple[str, str], List[str]]] = None,
+    ):
+        self.rate = rate
+        self.replay_frames = replay_frames or {}
+        self._channel_ids = itertools.count(100)
+
+    def _stream(self, channel_name: str, pair: str):
+        frames = self.replay_frames.get((channel_name, pair))
+        if frames:
+            return _ReplayStream(frames)
+
+        return _SyntheticStream(next(self._channel_ids), channel_name, pair)
+
+    async def handler(self, ws):
+        streams = _RoundRobin()
+        await ws.send(
+            json.dumps(
+                {
+                    "connectionID": id(ws),
+                    "event": "systemStatus",
+                    "status": "online",
+                    "version": "1.9.0",
+                }
+            )
+        )
+
+        sender = asyncio.ensure_future(self._send_frames(ws, streams))
+        try:
+            async for request in ws:
+                await self._handle_request(ws, json.loads(request), streams)
+        except websockets.ConnectionClosed:
+            pass
+        finally:
+            sender.cancel()
+
+    async def _handle_request(self, ws, request: dict, streams: _RoundRobin):
+        event = request.get("event")
+
+        if event == "ping":
+            await ws.send(json.dumps({"event": "pong", "reqid": request.get("reqid")}))
+            return
+
+        if event not in ("subscribe", "unsubscribe"):
+            return
+
+        subscription = request["subscription"]
+        channel_name = _channel_name(subscription)
+
+        for pair in request["pair"]:
+            key = (channel_name, pair)
+
+            if event == "subscribe":
+                stream = self._stream(channel_name, pair)
+                streams.add(key, stream)
+                status = "subscribed"
+            else:
+                streams.remove(key)
+                status = "unsubscribed"
+
+            await ws.send(
+                json.dumps(
+                    {
+                        "channelName": channel_name,
+                        "event": "subscriptionStatus",
+                        "pair": pair,
+                        "status": status,
+                        "subscription": subscription,
+                    }
+                )
+            )
+
+            if event == "subscribe":
+                for frame in stream.first_frames():
+                    await ws.send(frame)
+
+    async def _send_frames(self, ws, streams: _RoundRobin):
+        started = time.perf_counter()
+        last_sent = started
+        sent = 0
+
+        while True:
+            await asyncio.sleep(SEND_INTERVAL)
+            now = time.perf_counter()
+
+            if not streams:
+                started, sent = now, 0
+                if now - last_sent >= HEARTBEAT_INTERVAL:
+                    await ws.send('{"event":"heartbeat"}')
+                    last_sent = now
+                continue
+
+            due = int((now - started) * self.rate) - sent
+            if due <= 0:
+                continue
+
+            for frame in streams.next_frames(due):
+                await ws.send(frame)
+
+            sent += due
+            last_sent = now
+
+    async def serve(self, host: str, port: int, ready: Optional[asyncio.Event] = None):
+        async with websockets.serve(self.handler, host, port, max_size=None):
+            if ready is not None:
+                ready.set()
+            await asyncio.Future()
+
+
+def load_replay_frames(path: str) -> Dict[Tuple[str, str], List[str]]:
+    """
+    Loads recorded raw Kraken frames, one per line, by (channel name, pair).
+    Event frames are skipped.
+    """
+
+    replay_frames = {}
+
+    with open(path) as file:
+        for line in file:
+            frame = line.strip()
+            if not frame.startswith("["):
+                continue
+
+            message = json.loads(frame)
+            replay_frames.setdefault((message[-2], message[-1]), []).append(frame)
+
+    return replay_frames
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument(
+        "--rate", type=int, default=1000, help="data frames per second and connection"
+    )
+    parser.add_argument("--replay", help="file with recorded raw frames, one per line")
+    args = parser.parse_args()
+
+    server = FakeKrakenServer(
+        args.rate, load_replay_frames(args.replay) if args.replay else None
+    )
+    asyncio.run(server.serve(args.host, args.port))
+
+
+if __name__ == "__main__":
+    main()
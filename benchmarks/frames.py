@@ -0,0 +1,75 @@
+"""
+Corpus of recorded Kraken websocket frames used by the benchmarks.
+"""
+
+import json
+
+HEARTBEAT = '{"event":"heartbeat"}'
+
+SUBSCRIPTION_STATUS = (
+    '{"channelID":337,"channelName":"trade","event":"subscriptionStatus",'
+    '"pair":"XBT/USD","status":"subscribed","subscription":{"name":"trade"}}'
+)
+
+TICKER = (
+    '[340,{"a":["19555.20000",0,"0.11487174"],"b":["19555.10000",0,'
+    '"0.84376922"],"c":["19556.20000","0.17710000"],"v":["9663.60340294",'
+    '"9980.88762714"],"p":["19113.40193","19111.15264"],"t":[28811,30665],'
+    '"l":["18487.50000","18487.50000"],"h":["19651.20000","19651.20000"],'
+    '"o":["19090.00000","19002.30000"]},"ticker","XBT/USD"]'
+)
+
+SPREAD = (
+    '[341,["19301.90000","19302.00000","1664477929.245247","4.06014894",'
+    '"0.00100000"],"spread","XBT/USD"]'
+)
+
+OHLC = (
+    '[343,["1664478975.666711","1664479020.000000","19403.00000",'
+    '"19420.00000","19403.00000","19420.00000","19414.93677","1.98544165",52],'
+    '"ohlc-1","XBT/USD"]'
+)
+
+TRADE = (
+    '[337,[["19416.20000","0.00100000","1664479174.047114","s","m",""],'
+    '["19416.10000","0.02500000","1664479174.047390","s","m",""],'
+    '["19416.00000","0.31000000","1664479174.048005","s","l",""],'
+    '["19415.90000","1.20000000","1664479174.048102","s","m",""]],'
+    '"trade","XBT/USD"]'
+)
+
+BOOK_SNAPSHOT = json.dumps(
+    [
+        336,
+        {
+            "as": [
+                [f"{19302 + i / 10:.5f}", f"{0.5 + i / 100:.8f}", "1664477929.245247"]
+                for i in range(10)
+            ],
+            "bs": [
+                [f"{19301.9 - i / 10:.5f}", f"{0.5 + i / 100:.8f}", "1664477929.245247"]
+                for i in range(10)
+            ],
+        },
+        "book-10",
+        "XBT/USD",
+    ],
+    separators=(",", ":"),
+)
+
+BOOK_UPDATE = (
+    '[336,{"a":[["19302.00000","0.40000000","1664477930.245247"]]},'
+    '{"b":[["19301.90000","0.60000000","1664477930.245301"]]},'
+    '"book-10","XBT/USD"]'
+)
+
+# Frame mix roughly as seen on a multiplexed connection
+FRAMES = {
+    "heartbeat": HEARTBEAT,
+    "subscription_status": SUBSCRIPTION_STATUS,
+    "ticker": TICKER,
+    "spread": SPREAD,
+    "ohlc": OHLC,
+    "trade": TRADE,
+    "book_update": BOOK_UPDATE,
+}
@@ -0,0 +1,200 @@
+import zlib
+from bisect import bisect_left, insort
+from typing import Dict, List, Optional, Tuple
+
+# Number of price levels per side covered by Kraken book checksums
+CHECKSUM_DEPTH = 10
+
+
+class ChecksumMismatchError(Exception):
+    """
+    Raised when a maintained order book doesn't match the checksum sent by
+    Kraken, the book has to be resubscribed.
+    """
+
+    def __init__(self, pair: str, depth: int):
+        super().__init__(f"Order book checksum mismatch for {pair}")
+        self.pair = pair
+        self.depth = depth
+
+
+def _checksum_fragment(price: str, volume: str) -> bytes:
+    """
+    Formats a price level for the Kraken book checksum: decimal points and
+    leading zeros are removed from both price and volume.
+
+    :param price: Price string as sent by Kraken, e.g. "0.05005000".
+    :param volume: Volume string as sent by Kraken, e.g. "0.00100000".
+    :return: Checksum input of the level, e.g. b"500500100000".
+    """
+
+    return (
+        price.replace(".", "").lstrip("0") + volume.replace(".", "").lstrip("0")
+    ).encode()
+
+
+class OrderBookSide:
+    """
+    One side (bids or asks) of a Level 2 order book, bounded to `depth` price
+    levels.
+
+    Prices are kept as a sorted list of numeric keys (negated for bids, so the
+    best price is always first) next to a dict holding the original Kraken
+    price and volume strings of every level. Lookups are O(1), the position of
+    a new level is found by bisection in O(log n). Checksum inputs of levels
+    are formatted lazily and cached until the level changes.
+    """
+
+    __slots__ = ("descending", "depth", "_keys", "_levels", "_fragments")
+
+    def __init__(self, descending: bool, depth: int):
+        self.descending = descending
+        self.depth = depth
+        self._keys: List[float] = []
+        self._levels: Dict[float, Tuple[str, str]] = {}
+        self._fragments: Dict[float, bytes] = {}
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def clear(self) -> None:
+        self._keys.clear()
+        self._levels.clear()
+        self._fragments.clear()
+
+    def update(self, price: str, volume: str) -> None:
+        """
+        Inserts, updates or (when volume is 0) deletes a price level and
+        truncates the side to its depth.
+
+        :param price: Price string as sent by Kraken, e.g. "19416.20000".
+        :param volume: Volume string as sent by Kraken, e.g. "0.00100000".
+        """
+
+        key = -float(price) if self.descending else float(price)
+        self._fragments.pop(key, None)
+
+        if float(volume) == 0:
+            if self._levels.pop(key, None) is not None:
+                del self._keys[bisect_left(self._keys, key)]
+            return
+
+        if key not in self._levels:
+            insort(self._keys, key)
+
+        self._levels[key] = (price, volume)
+
+        # levels that fall out of scope are the worst ones, at the end
+        if len(self._keys) > self.depth:
+            key = self._keys.pop()
+            del self._levels[key]
+            self._fragments.pop(key, None)
+
+    def levels(self, limit: Optional[int] = None) -> List[Tuple[str, str]]:
+        """
+        :param limit: Maximum number of levels to return, all by default.
+        :return: (price, volume) string tuples, best price first.
+        """
+
+        levels = self._levels
+        keys = self._keys if limit is None else self._keys[:limit]
+
+        return [levels[key] for key in keys]
+
+    def checksum_fragments(self, limit: int = CHECKSUM_DEPTH) -> List[bytes]:
+        """
+        :param limit: Number of levels covered by the checksum.
+        :return: Cached checksum inputs of the best `limit` levels.
+        """
+
+        fragments = self._fragments
+        result = []
+
+        for key in self._keys[:limit]:
+            fragment = fragments.get(key)
+            if fragment is None:
+                fragment = fragments[key] = _checksum_fragment(*self._levels[key])
+            result.append(fragment)
+
+        return result
+
+
+class OrderBook:
+    """
+    Level 2 order book of a single currency pair, maintained incrementally
+    from Kraken book snapshot ("as"/"bs") and update ("a"/"b") messages.
+
+    A book is only `synced` once a snapshot was applied, updates received
+    before that (e.g. while resubscribing) are ignored.
+
+    `sequence` counts the updates published for the book, `snapshot_time` is
+    when its last snapshot was published.
+    """
+
+    __slots__ = (
+        "pair",
+        "depth",
+        "synced",
+        "sequence",
+        "snapshot_time",
+        "bids",
+        "asks",
+    )
+
+    def __init__(self, pair: str, depth: int = 10):
+        self.pair = pair
+        self.depth = depth
+        self.synced = False
+        self.sequence = 0
+        self.snapshot_time = 0.0
+        self.bids = OrderBookSide(descending=True, depth=depth)
+        self.asks = OrderBookSide(descending=False, depth=depth)
+
+    def checksum(self) -> int:
+        """
+        :return: Kraken CRC32 checksum of the top 10 asks and bids.
+        """
+
+        return zlib.crc32(
+            b"".join(self.asks.checksum_fragments() + self.bids.checksum_fragments())
+        )
+
+    def verify(self, checksum: str) -> None:
+        """
+        Compares the book against a checksum sent by Kraken. A book that
+        doesn't match is marked as not synced.
+
+        :param checksum: Value of the "c" field of a Kraken book update.
+        :raises ChecksumMismatchError: If the book doesn't match.
+        """
+
+        if self.checksum() != int(checksum):
+            self.synced = False
+            raise ChecksumMismatchError(self.pair, self.depth)
+
+    def apply(self, data: dict) -> None:
+        """
+        Applies a snapshot or an update payload of a Kraken book message.
+
+        :param data: One of the dicts of a Kraken book message.
+        """
+
+        if "as" in data or "bs" in data:
+            self.asks.clear()
+            self.bids.clear()
+
+            for record in data.get("as", []):
+                self.asks.update(record[0], record[1])
+            for record in data.get("bs", []):
+                self.bids.update(record[0], record[1])
+
+            self.synced = True
+            return
+
+        if not self.synced:
+            return
+
+        for record in data.get("a", []):
+            self.asks.update(record[0], record[1])
+        for record in data.get("b", []):
+            self.bids.update(record[0], record[1])
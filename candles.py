@@ -0,0 +1,236 @@
+"""
+Local candle aggregation from the trade stream, for intervals Kraken doesn't
+offer (e.g. 1s, 5s, 15s, 5m, 15m). Bars are built in O(1) per trade and
+interval, bucketed by the exchange time of the trades, and closed by a timer,
+so quiet markets still emit (flat, zero volume) bars.
+
+Bars are published as OHLC messages of every schema version in
+settings.SCHEMA_VERSIONS, on topics with the interval as frequency, e.g.
+"OHLC - XBT/USD - 5s" and "v2 - OHLC - XBT/USD - 5s".
+"""
+
+import logging
+import math
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Tuple
+
+import zmq
+
+import settings
+from data import _push_function, _push_socket
+from messages import SCHEMAS, TOPICS, RawMessage, _to_epoch_ns
+
+# Flat bars emitted at most for a pair without trades, e.g. after a replay of
+# old trades, before skipping to the current bar
+MAX_FLAT_BARS = 100
+
+# Interval units in ns
+_UNITS = {"s": 10**9, "m": 60 * 10**9, "h": 3600 * 10**9}
+
+
+def interval_ns(interval: str) -> int:
+    """
+    :param interval: Interval like "1s", "15m" or "4h".
+    :return: Interval in ns.
+    """
+
+    try:
+        length = int(interval[:-1])
+        unit = _UNITS[interval[-1]]
+    except (ValueError, KeyError):
+        raise ValueError(f"Invalid candle interval: {interval}")
+
+    if length <= 0:
+        raise ValueError(f"Invalid candle interval: {interval}")
+
+    return length * unit
+
+
+class _Bar:
+    """
+    Open bar of a pair and interval.
+    """
+
+    __slots__ = (
+        "begin",
+        "open",
+        "high",
+        "low",
+        "close",
+        "volume",
+        "notional",
+        "trades",
+    )
+
+    def __init__(self, begin: int, price: float):
+        self.begin = begin
+        self.open = self.high = self.low = self.close = price
+        self.volume = 0.0
+        self.notional = 0.0
+        self.trades = 0
+
+    def add(self, price: float, volume: float) -> None:
+        if not self.trades:
+            # bars opened without a trade are flat at the previous close
+            self.open = self.high = self.low = price
+        elif price > self.high:
+            self.high = price
+        elif price < self.low:
+            self.low = price
+
+        self.close = price
+        self.volume += volume
+        self.notional += price * volume
+        self.trades += 1
+
+
+class CandleAggregator:
+    """
+    Builds bars from the trades of all stream threads of a process and
+    publishes closed bars from its own timer thread and PUSH socket.
+
+    :param zmq_context: ZeroMQ Context of the process.
+    :param intervals: Bar intervals, e.g. ["1s", "5m"].
+    :param close_delay: Seconds after the end of a bar before it is closed,
+    giving trades of the bar time to arrive. Later trades count towards the
+    open bar.
+    """
+
+    def __init__(
+        self,
+        zmq_context: zmq.Context,
+        intervals: List[str] = settings.CANDLE_INTERVALS,
+        close_delay: float = settings.CANDLE_CLOSE_DELAY,
+    ):
+        self.zmq_context = zmq_context
+        self.intervals = [(interval, interval_ns(interval)) for interval in intervals]
+        self._lengths = dict(self.intervals)
+        self.close_delay_ns = int(close_delay * 1e9)
+
+        self._bars: Dict[Tuple[str, str], _Bar] = {}
+        self._closed: List[Tuple[str, str, int, _Bar]] = []
+        self._lock = threading.Lock()
+
+        self._timer = threading.Thread(target=self._close_periodically, daemon=True)
+        self._timer.start()
+
+    def process_trade_message(self, message: RawMessage) -> list:
+        """
+        Trade channel processor adding the trades of a decoded Kraken trade
+        frame to the open bars of its pair, see data._channel_processors().
+
+        :return: No messages, bars are published when they close.
+        """
+
+        pair = message[-1]
+        bars = self._bars
+
+        with self._lock:
+            for record in message[1]:
+                price = float(record[0])
+                volume = float(record[1])
+                trade_ns = _to_epoch_ns(record[2])
+
+                for interval, length in self.intervals:
+                    begin = trade_ns - trade_ns % length
+                    bar = bars.get((pair, interval))
+
+                    if bar is None:
+                        bar = bars[(pair, interval)] = _Bar(begin, price)
+                    elif begin > bar.begin:
+                        # the timer didn't close the bar yet
+                        self._closed.append((pair, interval, length, bar))
+                        bar = bars[(pair, interval)] = _Bar(begin, bar.close)
+
+                    bar.add(price, volume)
+
+        return []
+
+    def close_bars(self, now_ns: int) -> List[Tuple[str, str, int, _Bar]]:
+        """
+        Closes all bars which ended at least close_delay before now_ns, opening
+        flat bars at the close price for pairs without trades.
+
+        :return: (pair, interval, interval ns, bar) tuples of the closed bars.
+        """
+
+        with self._lock:
+            closed, self._closed = self._closed, []
+
+            for (pair, interval), bar in self._bars.items():
+                length = self._lengths[interval]
+
+                while bar.begin + length + self.close_delay_ns <= now_ns:
+                    closed.append((pair, interval, length, bar))
+
+                    begin = bar.begin + length
+                    if begin + MAX_FLAT_BARS * length <= now_ns:
+                        begin = now_ns - self.close_delay_ns
+                        begin -= begin % length
+
+                    bar = self._bars[(pair, interval)] = _Bar(begin, bar.close)
+
+        return closed
+
+    @staticmethod
+    def build_messages(pair: str, interval: str, length: int, bar: _Bar) -> list:
+        """
+        :return: (topic, OHLC message) tuples of a closed bar, one per schema
+        version in settings.SCHEMA_VERSIONS.
+        """
+
+        vwap = bar.notional / bar.volume if bar.volume else bar.close
+        processed_messages = []
+
+        for version in settings.SCHEMA_VERSIONS:
+            schema, topic_prefix = SCHEMAS[version]
+            ohlc = schema.OHLC()
+
+            ohlc.frequency = interval
+            ohlc.pair = pair
+            if version == 1:
+                ohlc.begin = datetime.fromtimestamp(bar.begin / 1e9).strftime(
+                    "%Y-%m-%d %H:%M:%S"
+                )
+                ohlc.end = datetime.fromtimestamp((bar.begin + length) / 1e9).strftime(
+                    "%Y-%m-%d %H:%M:%S"
+                )
+            else:
+                ohlc.begin = bar.begin
+                ohlc.end = bar.begin + length
+            ohlc.open = bar.open
+            ohlc.high = bar.high
+            ohlc.low = bar.low
+            ohlc.close = bar.close
+            ohlc.vwap = vwap
+            ohlc.volume = bar.volume
+            ohlc.trades = bar.trades
+
+            processed_messages.append(
+                (TOPICS[topic_prefix, "OHLC", pair, interval], ohlc)
+            )
+
+        return processed_messages
+
+    def _close_periodically(self):
+        push = _push_function(_push_socket(self.zmq_context))
+        # every bar boundary is a multiple of the greatest common divisor
+        tick_ns = math.gcd(*[length for _, length in self.intervals]) or 10**9
+
+        while True:
+            # wake up at the next bar boundary plus the close delay
+            now_ns = time.time_ns()
+            boundary_ns = now_ns - self.close_delay_ns
+            wake_ns = (
+                boundary_ns - boundary_ns % tick_ns + tick_ns + self.close_delay_ns
+            )
+            time.sleep((wake_ns - now_ns) / 1e9)
+
+            for closed_bar in self.close_bars(time.time_ns()):
+                for topic, ohlc in self.build_messages(*closed_bar):
+                    try:
+                        push([topic, ohlc.SerializeToString()])
+                    except zmq.ZMQError as error:
+                        logging.error(f"Candle publish failed: {error}")
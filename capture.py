@@ -0,0 +1,304 @@
+"""
+Capture of raw Kraken websocket frames to an append-only on-disk tape.
+
+Frames are appended to rotating segment files ("<prefix>-<start ns>.seg") in
+blocks, every block optionally zlib compressed. Next to every segment an index
+file (".idx", one JSON line per block) records the offset, the receive time
+range and the (channel name, pair) keys of the frames in the block, so readers
+can seek to a time range or a pair/channel without scanning whole segments.
+
+Record layout inside a block: received_ns (int64), key length (uint32),
+frame length (uint32), key ("<channel name>|<pair>", "event|" for event
+frames), frame.
+"""
+
+import argparse
+import glob
+import json
+import logging
+import mmap
+import os
+import queue
+import struct
+import sys
+import threading
+import time
+import zlib
+from typing import Iterator, List, Optional, Tuple
+
+import settings
+from data import _frame_key
+
+# compressed flag, stored length, raw length
+BLOCK_HEADER = struct.Struct("<BII")
+# received_ns, key length, frame length
+RECORD_HEADER = struct.Struct("<qII")
+
+BLOCK_COMPRESSED = 1
+
+
+class FrameCapture:
+    """
+    Appends raw frames to segment files from a background writer thread, so
+    appending a frame never blocks the websocket callbacks. Frames are written
+    in blocks, a block is flushed once it reaches `block_bytes` or
+    `flush_interval` seconds passed.
+
+    :param directory: Directory of the segment and index files.
+    :param prefix: File name prefix, e.g. to separate worker processes.
+    :param segment_bytes: Segment size after which a new segment is started.
+    :param block_bytes: Uncompressed block size after which a block is written.
+    :param flush_interval: Maximum seconds a frame waits before it is written.
+    :param compress: Whether to zlib compress the blocks.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        prefix: str = "capture",
+        segment_bytes: int = settings.CAPTURE_SEGMENT_BYTES,
+        block_bytes: int = settings.CAPTURE_BLOCK_BYTES,
+        flush_interval: float = settings.CAPTURE_FLUSH_INTERVAL,
+        compress: bool = settings.CAPTURE_COMPRESSION,
+    ):
+        self.directory = directory
+        self.prefix = prefix
+        self.segment_bytes = segment_bytes
+        self.block_bytes = block_bytes
+        self.flush_interval = flush_interval
+        self.compress = compress
+
+        self._queue = queue.SimpleQueue()
+        self._segment = None
+        self._index = None
+        self._closed = threading.Event()
+
+        os.makedirs(directory, exist_ok=True)
+
+        self._writer = threading.Thread(target=self._write_blocks, daemon=True)
+        self._writer.start()
+
+    def append(self, frame: str, received_ns: Optional[int] = None) -> None:
+        """
+        Queues a raw frame for writing, safe to call from any thread.
+
+        :param frame: The message received from the websocket.
+        :param received_ns: Receive time in ns since the epoch, now by default.
+        """
+
+        self._queue.put((time.time_ns() if received_ns is None else received_ns, frame))
+
+    def close(self) -> None:
+        """
+        Writes all queued frames and closes the files.
+        """
+
+        self._closed.set()
+        self._writer.join()
+
+    def _open_segment(self, received_ns: int) -> None:
+        if self._segment is not None:
+            self._segment.close()
+            self._index.close()
+
+        path = os.path.join(self.directory, f"{self.prefix}-{received_ns}")
+        self._segment = open(f"{path}.seg", "ab")
+        self._index = open(f"{path}.idx", "a")
+
+    def _write_block(self, records: List[Tuple[int, str]]) -> None:
+        block = bytearray()
+        keys = set()
+
+        for received_ns, frame in records:
+            key = _frame_key(frame)
+            keys.add(key)
+
+            key = key.encode()
+            frame = frame.encode()
+            block += RECORD_HEADER.pack(received_ns, len(key), len(frame))
+            block += key
+            block += frame
+
+        if self._segment is None or self._segment.tell() >= self.segment_bytes:
+            self._open_segment(records[0][0])
+
+        payload = zlib.compress(block, 1) if self.compress else bytes(block)
+        offset = self._segment.tell()
+
+        self._segment.write(
+            BLOCK_HEADER.pack(
+                BLOCK_COMPRESSED if self.compress else 0, len(payload), len(block)
+            )
+        )
+        self._segment.write(payload)
+        self._segment.flush()
+
+        # the index line is written after the block, readers never see an
+        # index entry of a partially written block
+        self._index.write(
+            json.dumps(
+                {
+                    "offset": offset,
+                    "first_ns": records[0][0],
+                    "last_ns": records[-1][0],
+                    "count": len(records),
+                    "keys": sorted(keys),
+                }
+            )
+            + "\n"
+        )
+        self._index.flush()
+
+    def _write_blocks(self) -> None:
+        records = []
+        size = 0
+        deadline = time.monotonic() + self.flush_interval
+
+        while True:
+            timeout = deadline - time.monotonic()
+
+            try:
+                record = self._queue.get(timeout=max(timeout, 0))
+                records.append(record)
+                size += len(record[1])
+            except queue.Empty:
+                pass
+
+            # drain whatever else is queued without waiting
+            while size < self.block_bytes:
+                try:
+                    record = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                records.append(record)
+                size += len(record[1])
+
+            closed = self._closed.is_set() and self._queue.empty()
+
+            if records and (
+                size >= self.block_bytes or time.monotonic() >= deadline or closed
+            ):
+                try:
+                    self._write_block(records)
+                except OSError as error:
+                    logging.error(f"Frame capture failed: {error}")
+                records, size = [], 0
+
+            if time.monotonic() >= deadline:
+                deadline = time.monotonic() + self.flush_interval
+
+            if closed:
+                break
+
+        if self._segment is not None:
+            self._segment.close()
+            self._index.close()
+
+
+class CaptureReader:
+    """
+    Reads frames captured by FrameCapture through memory-mapped segment
+    files, using the index files to skip blocks outside of the requested time
+    range or without the requested channel/pair.
+
+    :param directory: Directory of the segment and index files.
+    :param prefix: File name prefix of the segments to read.
+    """
+
+    def __init__(self, directory: str, prefix: str = "*"):
+        self.segments = sorted(
+            glob.glob(os.path.join(directory, f"{prefix}-*.seg")),
+            key=lambda path: int(path.rsplit("-", 1)[1][:-4]),
+        )
+
+    def read(
+        self,
+        start_ns: Optional[int] = None,
+        end_ns: Optional[int] = None,
+        channel_name: Optional[str] = None,
+        pair: Optional[str] = None,
+    ) -> Iterator[Tuple[int, str]]:
+        """
+        :param start_ns: Receive time to start at, ns since the epoch.
+        :param end_ns: Receive time to stop at (exclusive).
+        :param channel_name: Only frames of this channel, e.g. "ohlc-1".
+        :param pair: Only frames of this pair, e.g. "XBT/USD".
+        :return: (received_ns, frame) tuples ordered by receive time within
+        every segment.
+        """
+
+        start_ns = start_ns if start_ns is not None else -1
+        end_ns = end_ns if end_ns is not None else sys.maxsize
+
+        def key_matches(key: str) -> bool:
+            key_channel_name, _, key_pair = key.partition("|")
+            return (channel_name is None or key_channel_name == channel_name) and (
+                pair is None or key_pair == pair
+            )
+
+        for path in self.segments:
+            with open(f"{path[:-4]}.idx") as index_file:
+                blocks = [
+                    block
+                    for block in map(json.loads, index_file)
+                    if block["last_ns"] >= start_ns
+                    and block["first_ns"] < end_ns
+                    and any(key_matches(key) for key in block["keys"])
+                ]
+
+            if not blocks:
+                continue
+
+            with open(path, "rb") as segment_file, mmap.mmap(
+                segment_file.fileno(), 0, access=mmap.ACCESS_READ
+            ) as segment:
+                for block in blocks:
+                    yield from self._read_block(
+                        segment, block["offset"], start_ns, end_ns, key_matches
+                    )
+
+    @staticmethod
+    def _read_block(segment, offset, start_ns, end_ns, key_matches):
+        flags, stored_length, _ = BLOCK_HEADER.unpack_from(segment, offset)
+        offset += BLOCK_HEADER.size
+        payload = segment[offset : offset + stored_length]
+
+        if flags & BLOCK_COMPRESSED:
+            payload = zlib.decompress(payload)
+
+        position = 0
+        while position < len(payload):
+            received_ns, key_length, frame_length = RECORD_HEADER.unpack_from(
+                payload, position
+            )
+            position += RECORD_HEADER.size
+            key = payload[position : position + key_length].decode()
+            position += key_length
+            frame = payload[position : position + frame_length]
+            position += frame_length
+
+            if start_ns <= received_ns < end_ns and key_matches(key):
+                yield received_ns, frame.decode()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Exports captured frames as JSON lines with receive times"
+    )
+    parser.add_argument("directory")
+    parser.add_argument("--start-ns", type=int)
+    parser.add_argument("--end-ns", type=int)
+    parser.add_argument("--channel")
+    parser.add_argument("--pair")
+    args = parser.parse_args()
+
+    for received_ns, frame in CaptureReader(args.directory).read(
+        args.start_ns, args.end_ns, args.channel, args.pair
+    ):
+        sys.stdout.write(
+            json.dumps({"received_ns": received_ns, "frame": frame}) + "\n"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,309 @@
+"""
+Subscriber client library for the feed. Received messages are dispatched
+through a table from topic bytes to message class and handler, parsed
+zero-copy from the received frames into reused protobuf message objects.
+
+    subscriber = FeedSubscriber()
+    subscriber.subscribe("Trade - XBT/USD", on_trade)
+    subscriber.subscribe("v2 - BookDelta - XBT/USD", on_book_delta)
+    subscriber.run()
+
+Messages returned by recv() and drain() (and passed to handlers) are reused
+by later calls, copy them (CopyFrom()) to keep them.
+"""
+
+from typing import Callable, Dict, List, Optional, Tuple, Type
+
+import zmq
+import zmq.asyncio
+from google.protobuf.message import Message
+
+import kraken_msg_pb2
+import kraken_msg_v2_pb2
+import settings
+from messages import RAW_TOPIC_PREFIX, V2_TOPIC_PREFIX, RawFrame
+
+DEFAULT_URL = "tcp://127.0.0.1:5555"
+DEFAULT_SNAPSHOT_URL = "tcp://127.0.0.1:5557"
+
+Handler = Callable[[bytes, Message], None]
+
+
+def topic_message_class(topic: str) -> Type[Message]:
+    """
+    :param topic: Feed topic, e.g. "v2 - OHLC - XBT/USD - Minutely".
+    :return: Protobuf message class published on the topic, RawFrame for raw
+    topics.
+    """
+
+    if topic.startswith(settings.CONFLATED_TOPIC_PREFIX):
+        topic = topic[len(settings.CONFLATED_TOPIC_PREFIX) :]
+
+    if topic.startswith(RAW_TOPIC_PREFIX):
+        return RawFrame
+
+    schema = kraken_msg_pb2
+    if topic.startswith(V2_TOPIC_PREFIX):
+        schema = kraken_msg_v2_pb2
+        topic = topic[len(V2_TOPIC_PREFIX) :]
+
+    return getattr(schema, topic.split(" - ", 1)[0])
+
+
+class _Route:
+    """
+    Dispatch table entry of a topic, with a pool of reused message objects,
+    one per position in a drained batch.
+    """
+
+    __slots__ = ("message_class", "handler", "pool")
+
+    def __init__(self, message_class: Type[Message], handler: Optional[Handler]):
+        self.message_class = message_class
+        self.handler = handler
+        self.pool: List[Message] = []
+
+    def parse(self, payload: zmq.Frame, position: int = 0) -> Message:
+        pool = self.pool
+        if position == len(pool):
+            pool.append(self.message_class())
+
+        message = pool[position]
+        message.ParseFromString(payload.buffer)
+
+        return message
+
+
+class FeedSubscriber:
+    """
+    Blocking subscriber of the feed's PUB socket.
+
+    :param url: Url of the feed's PUB socket.
+    :param zmq_context: ZeroMQ Context, a new one by default.
+    """
+
+    _context_class = zmq.Context
+
+    def __init__(self, url: str = DEFAULT_URL, zmq_context=None):
+        self.zmq_context = zmq_context or self._context_class()
+        self.socket = self.zmq_context.socket(zmq.SUB)
+        self.socket.connect(url)
+
+        self._routes: Dict[bytes, _Route] = {}
+
+    def subscribe(
+        self,
+        topic: str,
+        handler: Optional[Handler] = None,
+        message_class: Optional[Type[Message]] = None,
+    ) -> None:
+        """
+        :param topic: Exact feed topic, e.g. "Trade - XBT/USD".
+        :param handler: Called with the topic bytes and the message by
+        dispatch() and run().
+        :param message_class: Protobuf message class, derived from the topic
+        by default.
+        """
+
+        encoded_topic = topic.encode()
+        self._routes[encoded_topic] = _Route(
+            message_class or topic_message_class(topic), handler
+        )
+        self.socket.setsockopt(zmq.SUBSCRIBE, encoded_topic)
+
+    def _parse(
+        self, frames: List[zmq.Frame], positions: Optional[Dict[bytes, int]] = None
+    ) -> Optional[Tuple[bytes, Message, _Route]]:
+        topic = frames[0].bytes
+        route = self._routes.get(topic)
+
+        # SUBSCRIBE matches prefixes, skip topics which aren't subscribed
+        if route is None:
+            return None
+
+        if positions is None:
+            return topic, route.parse(frames[1]), route
+
+        position = positions.get(topic, 0)
+        positions[topic] = position + 1
+
+        return topic, route.parse(frames[1], position), route
+
+    def recv(self) -> Tuple[bytes, Message]:
+        """
+        Blocks until a message of a subscribed topic arrives.
+
+        :return: Tuple of topic and message.
+        """
+
+        while True:
+            parsed = self._parse(self.socket.recv_multipart(copy=False))
+            if parsed is not None:
+                return parsed[0], parsed[1]
+
+    def drain(
+        self, max_messages: int = 1000, timeout: Optional[int] = None
+    ) -> List[Tuple[bytes, Message]]:
+        """
+        Waits for a message, then returns it together with all messages
+        already queued, without waiting for more.
+
+        :param max_messages: Maximum number of messages returned.
+        :param timeout: Milliseconds to wait for the first message, None waits
+        forever.
+        :return: (topic, message) tuples in receive order, empty on timeout.
+        """
+
+        return [
+            (topic, message) for topic, message, _ in self._drain(max_messages, timeout)
+        ]
+
+    def _drain(
+        self, max_messages: int, timeout: Optional[int]
+    ) -> List[Tuple[bytes, Message, _Route]]:
+        if not self.socket.poll(timeout):
+            return []
+
+        socket = self.socket
+        positions = {}
+        batch = []
+
+        while len(batch) < max_messages:
+            try:
+                frames = socket.recv_multipart(zmq.NOBLOCK, copy=False)
+            except zmq.Again:
+                break
+
+            parsed = self._parse(frames, positions)
+            if parsed is not None:
+                batch.append(parsed)
+
+        return batch
+
+    def dispatch(self, max_messages: int = 1000, timeout: Optional[int] = None) -> int:
+        """
+        Drains a batch of messages and calls the handlers of their topics.
+
+        :return: Number of messages dispatched.
+        """
+
+        batch = self._drain(max_messages, timeout)
+
+        for topic, message, route in batch:
+            if route.handler is not None:
+                route.handler(topic, message)
+
+        return len(batch)
+
+    def run(self) -> None:
+        """
+        Dispatches messages to the handlers forever.
+        """
+
+        while True:
+            self.dispatch()
+
+    def snapshot(
+        self,
+        url: str = DEFAULT_SNAPSHOT_URL,
+        topics: Optional[List[str]] = None,
+        timeout: int = 5000,
+    ) -> List[Tuple[bytes, Message]]:
+        """
+        Fetches the latest cached messages of the topics from the feed's
+        last-value cache in one round trip. Call it after subscribing, so no
+        live message is missed, see last_value_cache.py.
+
+        :param url: Url of the feed's snapshot socket.
+        :param topics: Topic prefixes, the subscribed topics by default.
+        :param timeout: Milliseconds to wait for the reply.
+        :return: (topic, message) tuples, the messages aren't reused.
+        """
+
+        prefixes = [topic.encode() for topic in topics or []] or list(self._routes)
+
+        # a blocking socket, also for asyncio subscribers
+        zmq_context = zmq.Context.shadow(self.zmq_context.underlying)
+        socket = zmq_context.socket(zmq.REQ)
+        socket.connect(url)
+
+        try:
+            socket.send_multipart(prefixes or [b""])
+            if not socket.poll(timeout):
+                raise TimeoutError(f"No snapshot from {url}")
+            frames = socket.recv_multipart()
+        finally:
+            socket.close(linger=0)
+
+        snapshot = []
+        for topic, payload in zip(frames[::2], frames[1::2]):
+            route = self._routes.get(topic)
+            message_class = (
+                route.message_class if route else topic_message_class(topic.decode())
+            )
+            snapshot.append((topic, message_class.FromString(payload)))
+
+        return snapshot
+
+    def close(self) -> None:
+        self.socket.close(linger=0)
+
+
+class AsyncFeedSubscriber(FeedSubscriber):
+    """
+    Asyncio counterpart of FeedSubscriber, recv(), drain(), dispatch() and
+    run() are coroutines.
+    """
+
+    _context_class = zmq.asyncio.Context
+
+    async def recv(self) -> Tuple[bytes, Message]:
+        while True:
+            parsed = self._parse(await self.socket.recv_multipart(copy=False))
+            if parsed is not None:
+                return parsed[0], parsed[1]
+
+    async def drain(
+        self, max_messages: int = 1000, timeout: Optional[int] = None
+    ) -> List[Tuple[bytes, Message]]:
+        return [
+            (topic, message)
+            for topic, message, _ in await self._drain(max_messages, timeout)
+        ]
+
+    async def _drain(
+        self, max_messages: int, timeout: Optional[int]
+    ) -> List[Tuple[bytes, Message, _Route]]:
+        if not await self.socket.poll(timeout):
+            return []
+
+        socket = self.socket
+        positions = {}
+        batch = []
+
+        while len(batch) < max_messages:
+            try:
+                frames = await socket.recv_multipart(zmq.NOBLOCK, copy=False)
+            except zmq.Again:
+                break
+
+            parsed = self._parse(frames, positions)
+            if parsed is not None:
+                batch.append(parsed)
+
+        return batch
+
+    async def dispatch(
+        self, max_messages: int = 1000, timeout: Optional[int] = None
+    ) -> int:
+        batch = await self._drain(max_messages, timeout)
+
+        for topic, message, route in batch:
+            if route.handler is not None:
+                route.handler(topic, message)
+
+        return len(batch)
+
+    async def run(self) -> None:
+        while True:
+            await self.dispatch()
@@ -0,0 +1,103 @@
+"""
+Conflating publisher for slow consumers like dashboards. Keeps only the latest
+message per topic of the conflated channels (ticker and spread by default) and
+publishes it on its conflated topic, e.g. "Conflated - Ticker - XBT/USD", once
+per interval if it changed. The full-rate topics are published unchanged.
+"""
+
+import logging
+import threading
+import time
+from typing import Callable, Dict, List, Tuple
+
+import zmq
+from google.protobuf.message import Message
+
+import settings
+from data import _push_function, _push_socket, _route_message
+
+
+class Conflator:
+    """
+    Collects the latest messages from the stream threads of a process and
+    publishes them from its own thread and PUSH socket, so the stream threads
+    never serialize or send conflated messages.
+
+    :param zmq_context: ZeroMQ Context of the process.
+    :param interval: Seconds between flushes.
+    :param channels: Kraken channel names (without "-<interval>"/"-<depth>")
+    whose messages are conflated.
+    :param topic_prefix: Prefix of the conflated topics.
+    """
+
+    def __init__(
+        self,
+        zmq_context: zmq.Context,
+        interval: float = settings.CONFLATION_INTERVAL,
+        channels: List[str] = settings.CONFLATED_CHANNELS,
+        topic_prefix: str = settings.CONFLATED_TOPIC_PREFIX,
+    ):
+        self.zmq_context = zmq_context
+        self.interval = interval
+        self.channels = frozenset(channels)
+        self.topic_prefix = topic_prefix.encode()
+
+        self._latest: Dict[bytes, Message] = {}
+        self._lock = threading.Lock()
+        # conflated topics by full-rate topic
+        self._topics: Dict[bytes, bytes] = {}
+
+        self._flusher = threading.Thread(target=self._flush_periodically, daemon=True)
+        self._flusher.start()
+
+    def offer(self, message: str, processed_messages: List[Tuple[bytes, Message]]):
+        """
+        Keeps the processed messages of a raw frame of a conflated channel as
+        latest messages of their topics, safe to call from any thread.
+
+        :param message: The message received from the websocket.
+        :param processed_messages: (topic, protobuf message) tuples built from
+        it.
+        """
+
+        channel_name, _ = _route_message(message)
+        if channel_name is None or channel_name.split("-", 1)[0] not in self.channels:
+            return
+
+        with self._lock:
+            for topic, processed_message in processed_messages:
+                self._latest[topic] = processed_message
+
+    def flush(self, push: Callable[[List[bytes]], None]) -> int:
+        """
+        Publishes the messages which changed since the last flush.
+
+        :param push: Function pushing a multipart message, see
+        data._push_function().
+        :return: Number of messages published.
+        """
+
+        with self._lock:
+            latest, self._latest = self._latest, {}
+
+        for topic, processed_message in latest.items():
+            conflated_topic = self._topics.get(topic)
+            if conflated_topic is None:
+                conflated_topic = self._topics[topic] = self.topic_prefix + topic
+
+            push([conflated_topic, processed_message.SerializeToString()])
+
+        return len(latest)
+
+    def _flush_periodically(self):
+        push = _push_function(_push_socket(self.zmq_context))
+
+        deadline = time.monotonic()
+        while True:
+            deadline += self.interval
+            time.sleep(max(deadline - time.monotonic(), 0))
+
+            try:
+                self.flush(push)
+            except zmq.ZMQError as error:
+                logging.error(f"Conflated flush failed: {error}")
@@ -1,229 +1,681 @@
+import functools
 import json
-from typing import List
+import random
+import threading
+import time
+from collections import Counter
+from typing import Callable, Dict, Iterator, List, Optional, Tuple, Union
 
 import websocket
 import zmq
 import logging
+from google.protobuf.message import Message
 
 import settings
+from book import ChecksumMismatchError
+from feed_status import GapDetector
 from messages import (
+    decode_message,
     process_spread_message,
+    process_spread_message_v2,
     process_ohlc_message,
+    process_ohlc_message_v2,
     process_ticker_message,
+    process_ticker_message_v2,
     process_trade_message,
-    print_book_message,
+    process_trade_message_v2,
+    process_book_message,
+    process_raw_frame,
+    BookSnapshotTimer,
+    OHLC_FREQUENCIES,
+    V2_TOPIC_PREFIX,
 )
+from stats import exchange_time_ns
+
+# Stateless message processors by schema version and Kraken channel name
+# (without the "-<interval>"/"-<depth>" suffix)
+CHANNEL_PROCESSORS = {
+    1: {
+        "spread": process_spread_message,
+        "ohlc": process_ohlc_message,
+        "ticker": process_ticker_message,
+        "trade": process_trade_message,
+    },
+    2: {
+        "spread": process_spread_message_v2,
+        "ohlc": process_ohlc_message_v2,
+        "ticker": process_ticker_message_v2,
+        "trade": process_trade_message_v2,
+    },
+}
+
+# Number of order book resyncs caused by checksum mismatches, by pair
+BOOK_RESYNCS = Counter()
+
+# Number of messages dropped on a saturated ZeroMQ pipeline, by topic
+DROPPED_MESSAGES = Counter()
+
+
+class _PriorityTable(dict):
+    """
+    Whether a topic is never dropped by the "drop-by-priority" policy, by
+    topic, e.g. PRIORITY_TOPICS[b"v2 - Trade - XBT/USD"] is True.
+    """
 
+    def __missing__(self, topic: bytes) -> bool:
+        name = topic.decode()
+        if name.startswith(V2_TOPIC_PREFIX):
+            name = name[len(V2_TOPIC_PREFIX) :]
+        name = name.split(" - ", 1)[0]
+        self[topic] = priority = name in settings.PRIORITY_MESSAGES
 
-def stream_spread_data(pairs: List[str], zmq_context: zmq.Context):
+        return priority
+
+
+PRIORITY_TOPICS = _PriorityTable()
+
+
+def _split_pairs(pairs: List[str], connections: int) -> List[List[str]]:
     """
-    Subscribes to the Kraken WebSockets API and streams Spread data for a given
-    currency pair/s.
+    Splits currency pairs round-robin into at most `connections` groups, one
+    group per websocket connection.
+
+    :param pairs: Currency pairs in "XXX/YYY" format.
+    :param connections: Maximum number of websocket connections, at least 1.
+    :return: Non-empty groups of currency pairs.
+    :raises ValueError: If `connections` is less than 1.
     """
 
-    pairs = json.dumps([pair.upper() for pair in pairs])
+    if connections < 1:
+        raise ValueError(f"connections must be at least 1, got {connections}")
 
-    # Create ZeroMQ PUSH Socket and connect it to IPC url
-    # This PUSH Socket will push data from thread to a single PULL socket
-    zmq_push_socket = zmq_context.socket(zmq.PUSH)
-    zmq_push_socket.connect(settings.ZMQ_PUSH_PULL_IPC_URL)
+    groups = [pairs[i::connections] for i in range(connections)]
 
-    def on_message(ws, message):
-        topic, processed_message = process_spread_message(message)
+    return [group for group in groups if group]
 
-        if processed_message is not None:
-            zmq_push_socket.send_multipart(
-                [
-                    topic.encode(),
-                    processed_message.SerializeToString(),
-                ],
-            )
 
-    def on_error(ws, error):
-        logging.error(error)
+def _route_message(message: str) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Cheaply extracts the channel name and the currency pair from a raw Kraken
+    data frame without parsing it. Data frames are JSON arrays ending with
+    `"<channel name>","<pair>"]`, while events and heartbeats are JSON objects.
 
-    def on_open(ws):
-        ws.send(
-            f'{{"event":"subscribe", "subscription":{{"name":"spread"}}, "pair":{pairs}}}'
-        )
+    :param message: The message received from the websocket.
+    :return: Tuple of channel name (e.g. "ohlc-1") and pair, or (None, None)
+    for event messages.
+    """
 
-    ws = websocket.WebSocketApp(
-        "wss://ws.kraken.com/",
-        on_message=on_message,
-        on_error=on_error,
-        on_open=on_open,
-    )
-    ws.run_forever()
+    if not message.startswith("["):
+        return None, None
 
+    parts = message.rsplit('"', 4)
+    if len(parts) != 5:
+        return None, None
 
-def stream_ohlc_data(pairs: List[str], zmq_context: zmq.Context, interval=1):
+    return parts[1], parts[3]
+
+
+def _frame_key(message: str) -> str:
     """
-    Subscribes to the Kraken WebSockets API and streams OHLC data for a given
-    currency pair/s.
+    :return: "<channel name>|<pair>" of a raw data frame, "event|" for event
+    frames.
     """
 
-    if interval not in [1, 60, 1440]:
-        print("Interval must be in: 1, 60, 1440")
-        return
+    channel_name, pair = _route_message(message)
+    if channel_name is None:
+        return "event|"
 
-    pairs = json.dumps([pair.upper() for pair in pairs])
+    return f"{channel_name}|{pair}"
 
-    # Create ZeroMQ PUSH Socket and connect it to IPC url
-    # This PUSH Socket will push data from thread to a single PULL socket
-    zmq_push_socket = zmq_context.socket(zmq.PUSH)
-    zmq_push_socket.connect(settings.ZMQ_PUSH_PULL_IPC_URL)
 
-    def on_message(ws, message):
-        topic, processed_message = process_ohlc_message(message)
+def _channel_processors(
+    candles=None, gaps=None, snapshots=None
+) -> Dict[str, List[Callable]]:
+    """
+    :param candles: Optional candles.CandleAggregator the trades are added to.
+    :param gaps: Optional feed_status.GapDetector of the connection.
+    :param snapshots: Optional messages.BookSnapshotTimer of the connection,
+    sharing the order books of the book processor.
+    :return: Message processors of a single websocket connection by channel
+    name, one per schema version in settings.SCHEMA_VERSIONS, including
+    processors which keep state, like the order books of the connection.
+    Channels in settings.RAW_CHANNELS start with messages.process_raw_frame().
+    """
 
-        if processed_message is not None:
+    processors = {}
+
+    for version in settings.SCHEMA_VERSIONS:
+        for channel, processor in CHANNEL_PROCESSORS[version].items():
+            if channel == "trade":
+                processor = functools.partial(
+                    processor,
+                    single="single" in settings.TRADE_PUBLISH_MODES,
+                    batch="batch" in settings.TRADE_PUBLISH_MODES,
+                )
+
+            processors.setdefault(channel, []).append(processor)
+
+    # a single book processor builds the messages of all schema versions, so
+    # every book is updated only once
+    processors["book"] = [
+        functools.partial(
+            process_book_message,
+            order_books={} if snapshots is None else snapshots.order_books,
+            snapshot_interval=settings.BOOK_SNAPSHOT_INTERVAL,
+            versions=settings.SCHEMA_VERSIONS,
+        )
+    ]
 
-            if interval == 1:
-                topic = topic + "Minutely"
-            if interval == 60:
-                topic = topic + "Hourly"
-            if interval == 1440:
-                topic = topic + "Daily"
+    for channel, mode in settings.RAW_CHANNELS.items():
+        if mode not in ("raw", "both"):
+            raise ValueError(f"Unknown raw publish mode of {channel}: {mode}")
 
-            zmq_push_socket.send_multipart(
-                [
-                    topic.encode(),
-                    processed_message.SerializeToString(),
-                ],
-            )
+        protobuf_processors = processors.get(channel, []) if mode == "both" else []
+        processors[channel] = [process_raw_frame, *protobuf_processors]
 
-    def on_error(ws, error):
-        logging.error(error)
+    if candles is not None:
+        processors.setdefault("trade", []).append(candles.process_trade_message)
 
-    def on_open(ws):
-        ws.send(
-            f'{{"event":"subscribe", "subscription":{{"name":"ohlc","interval": {interval}}}, "pair":{pairs}}}'
+    # gap detection needs decoded trades, raw-only trade frames stay undecoded
+    # and get no trade gap events
+    if gaps is not None and settings.RAW_CHANNELS.get("trade") != "raw":
+        processors.setdefault("trade", []).append(gaps.process_trade_message)
+
+    return processors
+
+
+def _process_message(
+    message: str,
+    processors: Dict[str, List[Callable]],
+    stats=None,
+    last_seen: Optional[dict] = None,
+) -> List[Tuple[bytes, Message]]:
+    """
+    Routes a raw Kraken frame to the message processors of its channel.
+
+    :param message: The message received from the websocket.
+    :param processors: Message processors by channel name, see
+    _channel_processors().
+    :param stats: Optional stats.LatencyStats recording the exchange lag and
+    the decode and build stages.
+    :param last_seen: Optional last-seen times of the connection the frame's
+    time is stored to, see health.WatchedConnection.
+    :return: (topic, protobuf message) tuples to publish, empty for events and
+    channels without a processor.
+    """
+
+    channel_name, pair = _route_message(message)
+
+    if last_seen is not None:
+        last_seen[channel_name and (channel_name, pair)] = time.monotonic()
+
+    if channel_name is None:
+        return []
+
+    channel_processors = processors.get(channel_name.split("-", 1)[0])
+    if not channel_processors:
+        return []
+
+    processed_messages = []
+
+    # raw frames are published as received, the frame is decoded only if
+    # other processors of the channel need it
+    if channel_processors[0] is process_raw_frame:
+        processed_messages.append(process_raw_frame(message, channel_name, pair))
+        channel_processors = channel_processors[1:]
+        if not channel_processors:
+            return processed_messages
+
+    if stats is not None:
+        return _process_message_timed(
+            message, channel_name, pair, channel_processors, stats, processed_messages
         )
 
-    ws = websocket.WebSocketApp(
-        "wss://ws.kraken.com/",
-        on_message=on_message,
-        on_error=on_error,
-        on_open=on_open,
-    )
-    ws.run_forever()
+    # decode the frame once, processors take the decoded message
+    message = decode_message(message)
 
+    for processor in channel_processors:
+        result = processor(message)
 
-def stream_ticker_data(pairs: List[str], zmq_context: zmq.Context):
+        # processors of channels like book publish several messages per frame
+        if isinstance(result, list):
+            processed_messages.extend(result)
+            continue
+
+        if result[1] is not None:
+            processed_messages.append(result)
+
+    return processed_messages
+
+
+def _process_message_timed(
+    message: str,
+    channel_name: str,
+    pair: str,
+    channel_processors: List[Callable],
+    stats,
+    processed_messages: List[Tuple[bytes, Message]],
+) -> List[Tuple[bytes, Message]]:
     """
-    Subscribes to the Kraken WebSockets API and streams Ticker data for a given
-    currency pair/s.
+    Instrumented counterpart of the tail of _process_message(), appending to
+    processed_messages.
     """
 
-    pairs = json.dumps([pair.upper() for pair in pairs])
+    key = f"{channel_name}|{pair}"
+    received_ns = time.time_ns()
+
+    started_ns = time.perf_counter_ns()
+    message = decode_message(message)
+    decoded_ns = time.perf_counter_ns()
+    stats.record("decode", key, decoded_ns - started_ns)
+
+    exchange_ns = exchange_time_ns(channel_name, message)
+    if exchange_ns is not None:
+        stats.record("lag", key, received_ns - exchange_ns)
+
+    for processor in channel_processors:
+        result = processor(message)
+
+        if isinstance(result, list):
+            processed_messages.extend(result)
+        elif result[1] is not None:
+            processed_messages.append(result)
+
+    stats.record("build", key, time.perf_counter_ns() - decoded_ns)
+
+    return processed_messages
+
+
+def _timed_frames(
+    processed_messages: List[Tuple[bytes, Message]], stats, key: str
+) -> Iterator[List[bytes]]:
+    """
+    Serializes processed messages into multipart frames to push, recording the
+    serialize stage. Every multipart frame ends with its perf_counter_ns()
+    send time, stripped and recorded as proxy stage by LatencyStats.proxy().
+
+    :param processed_messages: (topic, protobuf message) tuples to publish.
+    :param stats: stats.LatencyStats to record to.
+    :param key: "<channel name>|<pair>" of the frame, see _frame_key().
+    :return: [topic, payload, send time] lists, the send time is taken right
+    after serializing, before the caller sends the frame.
+    """
+
+    for topic, processed_message in processed_messages:
+        started_ns = time.perf_counter_ns()
+        payload = processed_message.SerializeToString()
+        serialized_ns = time.perf_counter_ns()
+        stats.record("serialize", key, serialized_ns - started_ns)
+
+        yield [topic, payload, serialized_ns.to_bytes(8, "little")]
+
+
+def _push_socket(zmq_context: zmq.Context) -> zmq.Socket:
+    """
+    :return: PUSH Socket with settings.ZMQ_PUSH_SNDHWM, connected to the PULL
+    socket at settings.ZMQ_PUSH_PULL_IPC_URL. Works for asyncio Contexts too.
+    """
 
-    # Create ZeroMQ PUSH Socket and connect it to IPC url
-    # This PUSH Socket will push data from thread to a single PULL socket
     zmq_push_socket = zmq_context.socket(zmq.PUSH)
+    zmq_push_socket.setsockopt(zmq.SNDHWM, settings.ZMQ_PUSH_SNDHWM)
     zmq_push_socket.connect(settings.ZMQ_PUSH_PULL_IPC_URL)
 
-    def on_message(ws, message):
-        topic, processed_message = process_ticker_message(message)
+    return zmq_push_socket
 
-        if processed_message is not None:
-            zmq_push_socket.send_multipart(
-                [
-                    topic.encode(),
-                    processed_message.SerializeToString(),
-                ],
-            )
 
-    def on_error(ws, error):
-        logging.error(error)
+def _drop(frames: List[bytes]) -> None:
+    topic = frames[0]
+    DROPPED_MESSAGES[topic] += 1
 
-    def on_open(ws):
-        ws.send(
-            f'{{"event":"subscribe", "subscription":{{"name":"ticker"}}, "pair":{pairs}}}'
+    # log the first drop of a topic and every 1000th after it
+    if DROPPED_MESSAGES[topic] % 1000 == 1:
+        logging.warning(
+            f"ZeroMQ pipeline saturated, dropped {DROPPED_MESSAGES[topic]} "
+            f"messages of {topic.decode()}"
         )
 
-    ws = websocket.WebSocketApp(
-        "wss://ws.kraken.com/",
-        on_message=on_message,
-        on_error=on_error,
-        on_open=on_open,
+
+def _push_or_drop(
+    zmq_push_socket: zmq.Socket,
+    frames: List[bytes],
+    drop_policy: str = settings.DROP_POLICY,
+) -> None:
+    """
+    Pushes a multipart message, dropping it if the PUSH socket reached its
+    high-water mark and the drop policy allows dropping it.
+
+    :param zmq_push_socket: ZeroMQ PUSH Socket.
+    :param frames: [topic, payload, ...] frames.
+    :param drop_policy: "drop-newest" or "drop-by-priority", see settings.
+    """
+
+    if drop_policy == "drop-by-priority" and PRIORITY_TOPICS[frames[0]]:
+        zmq_push_socket.send_multipart(frames)
+        return
+
+    try:
+        zmq_push_socket.send_multipart(frames, zmq.NOBLOCK)
+    except zmq.Again:
+        _drop(frames)
+
+
+def _push_function(
+    zmq_push_socket: zmq.Socket, drop_policy: str = settings.DROP_POLICY
+) -> Callable[[List[bytes]], None]:
+    """
+    :return: Function pushing multipart messages according to the drop
+    policy, the blocking send_multipart() of the socket for "block".
+    """
+
+    if drop_policy == "block":
+        return zmq_push_socket.send_multipart
+
+    if drop_policy not in ("drop-newest", "drop-by-priority"):
+        raise ValueError(f"Unknown drop policy: {drop_policy}")
+
+    return functools.partial(_push_or_drop, zmq_push_socket, drop_policy=drop_policy)
+
+
+def _reconnect_delay(attempt: int) -> float:
+    """
+    Exponential backoff with full jitter, so connections dropped together
+    don't reconnect together.
+
+    :param attempt: Failed connection attempts in a row, 0 after a connection
+    which was established.
+    :return: Seconds to wait before reconnecting.
+    """
+
+    return random.uniform(
+        0,
+        min(settings.RECONNECT_MAX_DELAY, settings.RECONNECT_BASE_DELAY * 2**attempt),
     )
-    ws.run_forever()
 
 
-def stream_trade_data(pairs: List[str], zmq_context: zmq.Context):
+def _resync_book(error: ChecksumMismatchError) -> List[str]:
     """
-    Subscribes to the Kraken WebSockets API and streams Trade data for a given
-    currency pair/s.
+    Counts a book resync and builds the requests which unsubscribe and
+    resubscribe the book of the affected pair only.
+
+    :param error: Checksum mismatch raised by the book processor.
+    :return: Unsubscribe and subscribe requests to send to Kraken.
     """
 
-    pairs = json.dumps([pair.upper() for pair in pairs])
+    BOOK_RESYNCS[error.pair] += 1
+    logging.warning(f"{error}, resubscribing (resyncs: {BOOK_RESYNCS[error.pair]})")
+
+    request = {
+        "pair": [error.pair],
+        "subscription": {"name": "book", "depth": error.depth},
+    }
+
+    return [
+        json.dumps({"event": "unsubscribe", **request}),
+        json.dumps({"event": "subscribe", **request}),
+    ]
+
+
+def stream_data(
+    pairs: List[str],
+    subscriptions: List[dict],
+    zmq_context: zmq.Context,
+    url: str = settings.KRAKEN_WS_URL,
+    capture=None,
+    stats=None,
+    conflator=None,
+    candles=None,
+    watchdog=None,
+):
+    """
+    Subscribes to the Kraken WebSockets API and streams data for multiple
+    channels and currency pair/s over a single websocket connection.
+
+    Every frame is routed to the matching message processor using the channel
+    name and pair at the end of the frame.
+
+    Reconnects forever with jittered exponential backoff and resubscribes,
+    publishing the connection status and trade gaps, see feed_status.py.
+
+    :param pairs: Currency pairs in "XXX/YYY" format.
+    :param subscriptions: Kraken subscription objects, e.g. {"name": "trade"}
+    or {"name": "ohlc", "interval": 60}.
+    :param zmq_context: ZeroMQ Context shared by all threads.
+    :param url: Kraken websocket API url.
+    :param capture: Optional capture.FrameCapture every raw frame is appended
+    to.
+    :param stats: Optional stats.LatencyStats the stage latencies are
+    recorded to.
+    :param conflator: Optional conflation.Conflator ticker and spread
+    messages are offered to.
+    :param candles: Optional candles.CandleAggregator the trades are added
+    to.
+    :param watchdog: Optional health.Watchdog the connection is registered
+    with.
+    """
+
+    gaps = GapDetector([pair.upper() for pair in pairs])
+    pairs = json.dumps(gaps.pairs)
+
+    last_seen = watched = None
+    if watchdog is not None:
+        watched = watchdog.register(gaps.pairs)
+        last_seen = watched.last_seen
 
     # Create ZeroMQ PUSH Socket and connect it to IPC url
     # This PUSH Socket will push data from thread to a single PULL socket
-    zmq_push_socket = zmq_context.socket(zmq.PUSH)
-    zmq_push_socket.connect(settings.ZMQ_PUSH_PULL_IPC_URL)
+    zmq_push_socket = _push_socket(zmq_context)
+    push = _push_function(zmq_push_socket)
 
-    def on_message(ws, message):
-        topic, processed_message = process_trade_message(message)
+    # processors keep their state across reconnects, books are reset by the
+    # snapshots Kraken sends on resubscribing
+    snapshots = BookSnapshotTimer(
+        settings.BOOK_SNAPSHOT_INTERVAL, settings.SCHEMA_VERSIONS
+    )
+    processors = _channel_processors(candles, gaps, snapshots)
+    connection = {"open": False, "reason": ""}
 
-        if processed_message is not None:
-            zmq_push_socket.send_multipart(
+    def on_message(ws, message):
+        if capture is not None:
+            capture.append(message)
+
+        if stats is not None:
+            received_ns = time.perf_counter_ns()
+
+        try:
+            processed_messages = _process_message(message, processors, stats, last_seen)
+        except ChecksumMismatchError as error:
+            for request in _resync_book(error):
+                ws.send(request)
+            return
+
+        # books without updates get their snapshots with any frame, including
+        # heartbeats
+        processed_messages.extend(snapshots.due())
+
+        if conflator is not None:
+            conflator.offer(message, processed_messages)
+
+        if stats is not None:
+            key = _frame_key(message)
+            for frames in _timed_frames(processed_messages, stats, key):
+                push(frames)
+                stats.record(
+                    "send",
+                    key,
+                    time.perf_counter_ns() - int.from_bytes(frames[2], "little"),
+                )
+            stats.record("frame", key, time.perf_counter_ns() - received_ns)
+            return
+
+        for topic, processed_message in processed_messages:
+            push(
                 [
-                    topic.encode(),
+                    topic,
                     processed_message.SerializeToString(),
                 ],
             )
 
     def on_error(ws, error):
         logging.error(error)
+        connection["reason"] = str(error)
 
     def on_open(ws):
-        ws.send(
-            f'{{"event":"subscribe", "subscription":{{"name":"trade"}}, "pair":{pairs}}}'
-        )
+        for subscription in subscriptions:
+            ws.send(
+                f'{{"event":"subscribe", "subscription":{json.dumps(subscription)}, "pair":{pairs}}}'
+            )
+
+        connection["open"] = True
+        for topic, status in gaps.connected():
+            push([topic, status.SerializeToString()])
+
+        if watched is not None:
+            # closes without waiting for Kraken's close frame, the stream
+            # thread is the only reader of the socket
+            watched.opened(functools.partial(ws.close, timeout=0))
 
     ws = websocket.WebSocketApp(
-        "wss://ws.kraken.com/",
+        url,
         on_message=on_message,
         on_error=on_error,
         on_open=on_open,
     )
-    ws.run_forever()
 
+    attempt = 0
+    while True:
+        connection["open"] = False
+        connection["reason"] = ""
+        ws.run_forever(
+            ping_interval=settings.KRAKEN_WS_PING_INTERVAL,
+            ping_timeout=settings.KRAKEN_WS_PING_TIMEOUT,
+        )
 
-def stream_book_data(*args: str):
+        if watched is not None:
+            watched.closed()
+
+        if connection["open"]:
+            attempt = 0
+            for topic, status in gaps.disconnected(connection["reason"] or "closed"):
+                push([topic, status.SerializeToString()])
+        else:
+            attempt += 1
+
+        delay = _reconnect_delay(attempt)
+        logging.warning(f"Connection to {url} lost, reconnecting in {delay:.1f}s")
+        time.sleep(delay)
+
+
+def start_streams(
+    pairs: List[str],
+    subscriptions: List[dict],
+    zmq_context: zmq.Context,
+    connections: int = settings.KRAKEN_WS_CONNECTIONS,
+    url: str = settings.KRAKEN_WS_URL,
+    capture=None,
+    stats=None,
+    conflator=None,
+    candles=None,
+    watchdog=None,
+) -> List[threading.Thread]:
+    """
+    Starts a small pool of multiplexed websocket connections, each streaming
+    all subscriptions for its share of the currency pairs in its own thread.
+
+    :param pairs: Currency pairs in "XXX/YYY" format.
+    :param subscriptions: Kraken subscription objects.
+    :param zmq_context: ZeroMQ Context shared by all threads.
+    :param connections: Maximum number of websocket connections.
+    :param url: Kraken websocket API url.
+    :param capture: Optional capture.FrameCapture every raw frame is appended
+    to.
+    :param stats: Optional stats.LatencyStats shared by all connections.
+    :param conflator: Optional conflation.Conflator shared by all
+    connections.
+    :param candles: Optional candles.CandleAggregator shared by all
+    connections.
+    :param watchdog: Optional health.Watchdog shared by all connections.
+    :return: Started threads, one per connection.
     """
-    Function subscribes to the Kraken WebSockets API and streams Order Book data
-    for a given currency pair/s.
 
-    Args:
-        *args:str: Pass a variable number of currency pairs to the function in
-        "XXX/YYY" format.
+    threads = []
+    for group in _split_pairs(pairs, connections):
+        thread = threading.Thread(
+            target=stream_data,
+            args=(
+                group,
+                subscriptions,
+                zmq_context,
+                url,
+                capture,
+                stats,
+                conflator,
+                candles,
+                watchdog,
+            ),
+            daemon=True,
+        )
+        thread.start()
+        threads.append(thread)
+
+    return threads
+
+
+def stream_spread_data(pairs: List[str], zmq_context: zmq.Context):
+    """
+    Subscribes to the Kraken WebSockets API and streams Spread data for a given
+    currency pair/s.
     """
 
-    pairs = [arg.upper() for arg in args]
+    stream_data(pairs, [{"name": "spread"}], zmq_context)
 
-    def on_message(ws, message):
-        print_book_message(
-            message,
-            pairs=[
-                "XBT/USD",
-            ],
-        )
 
-    def on_error(ws, error):
-        # TODO replace with logger.error()
-        print(error)
+def stream_ohlc_data(
+    pairs: List[str], zmq_context: zmq.Context, interval: Union[int, List[int]] = 1
+):
+    """
+    Subscribes to the Kraken WebSockets API and streams OHLC data for a given
+    currency pair/s, for one or several intervals over a single connection.
+    """
 
-    def on_open(ws):
-        ws.send(
-            f'{{"event":"subscribe", "subscription":{{"name":"book"}}, "pair":{json.dumps(pairs)}}} '
-        )
+    intervals = interval if isinstance(interval, list) else [interval]
 
-    ws = websocket.WebSocketApp(
-        "wss://ws.kraken.com/",
-        on_message=on_message,
-        on_error=on_error,
-        on_open=on_open,
+    if not intervals or any(i not in OHLC_FREQUENCIES for i in intervals):
+        print(f"Interval must be in: {', '.join(map(str, OHLC_FREQUENCIES))}")
+        return
+
+    stream_data(
+        pairs,
+        [{"name": "ohlc", "interval": i} for i in intervals],
+        zmq_context,
     )
-    ws.run_forever()
+
+
+def stream_ticker_data(pairs: List[str], zmq_context: zmq.Context):
+    """
+    Subscribes to the Kraken WebSockets API and streams Ticker data for a given
+    currency pair/s.
+    """
+
+    stream_data(pairs, [{"name": "ticker"}], zmq_context)
+
+
+def stream_trade_data(pairs: List[str], zmq_context: zmq.Context):
+    """
+    Subscribes to the Kraken WebSockets API and streams Trade data for a given
+    currency pair/s.
+    """
+
+    stream_data(pairs, [{"name": "trade"}], zmq_context)
+
+
+def stream_book_data(pairs: List[str], zmq_context: zmq.Context, depth=10):
+    """
+    Subscribes to the Kraken WebSockets API and streams Order Book data for a
+    given currency pair/s.
+    """
+
+    if depth not in [10, 25, 100, 500, 1000]:
+        print("Depth must be in: 10, 25, 100, 500, 1000")
+        return
+
+    stream_data(pairs, [{"name": "book", "depth": depth}], zmq_context)
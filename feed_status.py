@@ -0,0 +1,140 @@
+"""
+Connection status and gap events of the websocket connections, published as
+FeedStatus messages of every schema version in settings.SCHEMA_VERSIONS on
+topics like "FeedStatus - XBT/USD" and "v2 - FeedStatus - XBT/USD":
+
+- "disconnected" when a connection closes, gap_begin is the time it closed
+- "connected" when it's (re)subscribed, after a reconnect gap_begin and
+  gap_end span the downtime
+- "gap" with channel "trade" on the first trade of a pair after a reconnect,
+  gap_begin and gap_end are the exchange times of the last trade before and
+  the first trade after it, trades in between may be missing, not reported
+  for trades published raw only (see settings.RAW_CHANNELS)
+
+Book channels resync themselves with the snapshot Kraken sends on
+resubscribing, OHLC, ticker and spread messages carry the full state.
+"""
+
+import time
+from typing import List, Optional, Set, Tuple
+
+from google.protobuf.message import Message
+
+import settings
+from messages import SCHEMAS, TOPICS, RawMessage, _to_epoch_ns
+
+
+def build_status_messages(
+    pair: str,
+    status: str,
+    channel: str = "",
+    gap_begin: int = 0,
+    gap_end: int = 0,
+    reason: str = "",
+) -> List[Tuple[bytes, Message]]:
+    """
+    :return: (topic, FeedStatus message) tuples of a pair, one per schema
+    version in settings.SCHEMA_VERSIONS.
+    """
+
+    processed_messages = []
+
+    for version in settings.SCHEMA_VERSIONS:
+        schema, topic_prefix = SCHEMAS[version]
+        feed_status = schema.FeedStatus()
+
+        feed_status.pair = pair
+        feed_status.status = status
+        feed_status.channel = channel
+        feed_status.gap_begin = gap_begin
+        feed_status.gap_end = gap_end
+        feed_status.reason = reason
+
+        processed_messages.append(
+            (TOPICS[topic_prefix, "FeedStatus", pair, ""], feed_status)
+        )
+
+    return processed_messages
+
+
+class GapDetector:
+    """
+    Connection status and trade gaps of a single websocket connection, kept
+    across its reconnects.
+
+    :param pairs: Currency pairs of the connection.
+    """
+
+    def __init__(self, pairs: List[str]):
+        self.pairs = pairs
+
+        # exchange time of the last trade by pair
+        self._last_trades = {}
+        # pairs whose first trade after a reconnect is still to come
+        self._reconnected: Set[str] = set()
+        self._disconnected_ns: Optional[int] = None
+
+    def connected(self) -> List[Tuple[bytes, Message]]:
+        """
+        :return: "connected" status messages of all pairs.
+        """
+
+        gap_begin = self._disconnected_ns or 0
+        gap_end = time.time_ns() if self._disconnected_ns is not None else 0
+
+        if self._disconnected_ns is not None:
+            self._reconnected.update(self.pairs)
+            self._disconnected_ns = None
+
+        return [
+            processed_message
+            for pair in self.pairs
+            for processed_message in build_status_messages(
+                pair, "connected", gap_begin=gap_begin, gap_end=gap_end
+            )
+        ]
+
+    def disconnected(self, reason: str = "") -> List[Tuple[bytes, Message]]:
+        """
+        :return: "disconnected" status messages of all pairs.
+        """
+
+        self._disconnected_ns = time.time_ns()
+
+        return [
+            processed_message
+            for pair in self.pairs
+            for processed_message in build_status_messages(
+                pair, "disconnected", gap_begin=self._disconnected_ns, reason=reason
+            )
+        ]
+
+    def process_trade_message(self, message: RawMessage) -> list:
+        """
+        Trade channel processor remembering the last trade of a pair, see
+        data._channel_processors().
+
+        :return: "gap" status messages on the first trade after a reconnect,
+        no messages otherwise.
+        """
+
+        pair = message[-1]
+        records = message[1]
+        processed_messages = []
+
+        if self._reconnected and pair in self._reconnected:
+            self._reconnected.discard(pair)
+            last_trade = self._last_trades.get(pair)
+
+            processed_messages = build_status_messages(
+                pair,
+                "gap",
+                channel="trade",
+                gap_begin=_to_epoch_ns(last_trade) if last_trade else 0,
+                gap_end=_to_epoch_ns(records[0][2]),
+                reason="reconnect",
+            )
+
+        self._last_trades[pair] = records[-1][2]
+
+        return processed_messages
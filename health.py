@@ -0,0 +1,213 @@
+"""
+Staleness watchdog of the websocket connections. Stream threads only store
+the monotonic time of every frame by "<channel name>"/pair (None for
+heartbeats and other events, see data._process_message()), the watchdog
+thread checks the times once per interval:
+
+- a connection without any frame, including the heartbeats Kraken sends
+  every second on idle connections, for settings.WATCHDOG_CONNECTION_TIMEOUT
+  seconds is stale
+- a pair/channel without a frame for its settings.WATCHDOG_CHANNEL_TIMEOUTS
+  threshold is stale
+
+Stale streams are published as "stale" FeedStatus messages of their pairs
+(see feed_status.py) and their connection is closed, so it's reconnected and
+resubscribed. Streams which recover on their own are published as "active".
+"""
+
+import logging
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+import zmq
+
+import settings
+from data import _push_function, _push_socket
+from feed_status import build_status_messages
+
+
+class WatchedConnection:
+    """
+    Last-seen times of a single websocket connection, written by its stream
+    thread, read by the watchdog thread.
+
+    :param pairs: Currency pairs of the connection.
+    """
+
+    def __init__(self, pairs: List[str]):
+        self.pairs = pairs
+
+        # monotonic time of the last frame by (channel name, pair), by None
+        # for event frames like heartbeats
+        self.last_seen: Dict[Optional[Tuple[str, str]], float] = {}
+        # closes the open connection, None while disconnected
+        self.close: Optional[Callable[[], None]] = None
+        self.opened_at = 0.0
+        # stale streams, None for the connection
+        self.stale = set()
+
+    def opened(self, close: Callable[[], None]) -> None:
+        """
+        :param close: Closes the connection, called by the watchdog thread.
+        """
+
+        self.opened_at = now = time.monotonic()
+        # streams get the full timeout to come back after a reconnect
+        for key in list(self.last_seen):
+            self.last_seen[key] = now
+        self.stale = set()
+        self.close = close
+
+    def closed(self) -> None:
+        self.close = None
+
+
+class Watchdog:
+    """
+    Checks the connections of all stream threads of a process and publishes
+    their health from its own thread and PUSH socket.
+
+    :param zmq_context: ZeroMQ Context of the process.
+    :param connection_timeout: Seconds without any frame after which a
+    connection is stale.
+    :param channel_timeouts: Seconds without a frame after which a pair/channel
+    is stale, by Kraken channel name (without "-<interval>"/"-<depth>").
+    :param check_interval: Seconds between checks.
+    """
+
+    def __init__(
+        self,
+        zmq_context: zmq.Context,
+        connection_timeout: float = settings.WATCHDOG_CONNECTION_TIMEOUT,
+        channel_timeouts: Dict[str, float] = settings.WATCHDOG_CHANNEL_TIMEOUTS,
+        check_interval: float = settings.WATCHDOG_CHECK_INTERVAL,
+    ):
+        self.zmq_context = zmq_context
+        self.connection_timeout = connection_timeout
+        self.channel_timeouts = channel_timeouts
+        self.check_interval = check_interval
+
+        self._connections: List[WatchedConnection] = []
+        self._lock = threading.Lock()
+
+        self._checker = threading.Thread(target=self._check_periodically, daemon=True)
+        self._checker.start()
+
+    def register(self, pairs: List[str]) -> WatchedConnection:
+        """
+        :param pairs: Currency pairs of a websocket connection.
+        :return: Last-seen times of the connection, kept across reconnects.
+        """
+
+        connection = WatchedConnection(pairs)
+        with self._lock:
+            self._connections.append(connection)
+
+        return connection
+
+    def _timeout(self, key: Optional[Tuple[str, str]]) -> Optional[float]:
+        if key is None:
+            return self.connection_timeout
+
+        return self.channel_timeouts.get(key[0].split("-", 1)[0])
+
+    def check(self, now: float) -> List[Tuple[bytes, bytes]]:
+        """
+        Publishes stale and recovered streams and closes the connections with
+        stale streams.
+
+        :param now: Current time.monotonic().
+        :return: [topic, payload] frames of the health messages to push.
+        """
+
+        with self._lock:
+            connections = list(self._connections)
+
+        frames = []
+
+        for connection in connections:
+            close = connection.close
+            if close is None:
+                continue
+
+            # copied atomically, the stream thread keeps adding streams
+            last_seen = dict(connection.last_seen)
+            last_frame = max(last_seen.values(), default=connection.opened_at)
+            last_seen[None] = max(last_frame, connection.opened_at)
+
+            stale = False
+
+            for key, seen in last_seen.items():
+                timeout = self._timeout(key)
+                if timeout is None:
+                    continue
+
+                if now - seen < timeout:
+                    if key in connection.stale:
+                        connection.stale.discard(key)
+                        frames.extend(self._health(connection, key, "active", seen))
+                    continue
+
+                stale = True
+                if key not in connection.stale:
+                    connection.stale.add(key)
+                    frames.extend(
+                        self._health(
+                            connection,
+                            key,
+                            "stale",
+                            seen,
+                            f"no frames for {now - seen:.1f}s",
+                        )
+                    )
+
+            if stale:
+                streams = ", ".join(
+                    "connection" if key is None else "|".join(key)
+                    for key in connection.stale
+                )
+                logging.warning(
+                    f"Stale streams ({streams}) on the connection of "
+                    f"{connection.pairs}, reconnecting"
+                )
+                connection.close = None
+                close()
+
+        return frames
+
+    @staticmethod
+    def _health(
+        connection: WatchedConnection,
+        key: Optional[Tuple[str, str]],
+        status: str,
+        seen: float,
+        reason: str = "",
+    ) -> List[Tuple[bytes, bytes]]:
+        # last-seen time since the Unix epoch
+        seen_ns = time.time_ns() - int((time.monotonic() - seen) * 1e9)
+
+        if key is None:
+            channel, pairs = "", connection.pairs
+        else:
+            channel, pairs = key[0], [key[1]]
+
+        return [
+            [topic, feed_status.SerializeToString()]
+            for pair in pairs
+            for topic, feed_status in build_status_messages(
+                pair, status, channel=channel, gap_begin=seen_ns, reason=reason
+            )
+        ]
+
+    def _check_periodically(self):
+        push = _push_function(_push_socket(self.zmq_context))
+
+        while True:
+            time.sleep(self.check_interval)
+
+            try:
+                for frames in self.check(time.monotonic()):
+                    push(frames)
+            except zmq.ZMQError as error:
+                logging.error(f"Watchdog publish failed: {error}")
@@ -1,13 +1,11 @@
 # -*- coding: utf-8 -*-
 # Generated by the protocol buffer compiler.  DO NOT EDIT!
 # source: kraken_msg.proto
+"""Generated protocol buffer code."""
 
-import sys
-
-_b = sys.version_info[0] < 3 and (lambda x: x) or (lambda x: x.encode("latin1"))
+from google.protobuf.internal import builder as _builder
 from google.protobuf import descriptor as _descriptor
-from google.protobuf import message as _message
-from google.protobuf import reflection as _reflection
+from google.protobuf import descriptor_pool as _descriptor_pool
 from google.protobuf import symbol_database as _symbol_database
 
 # @@protoc_insertion_point(imports)
@@ -15,617 +13,31 @@ from google.protobuf import symbol_database as _symbol_database
 _sym_db = _symbol_database.Default()
 
 
-DESCRIPTOR = _descriptor.FileDescriptor(
-    name="kraken_msg.proto",
-    package="",
-    syntax="proto3",
-    serialized_options=None,
-    serialized_pb=_b(
-        '\n\x10kraken_msg.proto"%\n\x06Ticker\x12\x0c\n\x04pair\x18\x02 \x01(\t\x12\r\n\x05price\x18\x03 \x01(\x02"f\n\x06Spread\x12\x0c\n\x04pair\x18\x02 \x01(\t\x12\x0b\n\x03\x61sk\x18\x03 \x01(\x02\x12\x0b\n\x03\x62id\x18\x04 \x01(\x02\x12\x0c\n\x04time\x18\x05 \x01(\t\x12\x12\n\nbid_volume\x18\x06 \x01(\x02\x12\x12\n\nask_volume\x18\x07 \x01(\x02"\xa9\x01\n\x04OHLC\x12\x11\n\tfrequency\x18\x01 \x01(\t\x12\x0c\n\x04pair\x18\x02 \x01(\t\x12\r\n\x05\x62\x65gin\x18\x03 \x01(\t\x12\x0b\n\x03\x65nd\x18\x04 \x01(\t\x12\x0c\n\x04open\x18\x05 \x01(\x02\x12\x0c\n\x04high\x18\x06 \x01(\x02\x12\x0b\n\x03low\x18\x07 \x01(\x02\x12\r\n\x05\x63lose\x18\x08 \x01(\x02\x12\x0c\n\x04vwap\x18\t \x01(\x02\x12\x0e\n\x06volume\x18\n \x01(\x02\x12\x0e\n\x06trades\x18\x0b \x01(\x05"r\n\x05Trade\x12\x0c\n\x04pair\x18\x02 \x01(\t\x12\r\n\x05price\x18\x03 \x01(\x02\x12\x0e\n\x06volume\x18\x04 \x01(\x02\x12\x0c\n\x04time\x18\x05 \x01(\t\x12\x0c\n\x04side\x18\x06 \x01(\t\x12\x12\n\norder_type\x18\x07 \x01(\t\x12\x0c\n\x04misc\x18\x08 \x01(\tb\x06proto3'
-    ),
-)
-
-
-_TICKER = _descriptor.Descriptor(
-    name="Ticker",
-    full_name="Ticker",
-    filename=None,
-    file=DESCRIPTOR,
-    containing_type=None,
-    fields=[
-        _descriptor.FieldDescriptor(
-            name="pair",
-            full_name="Ticker.pair",
-            index=0,
-            number=2,
-            type=9,
-            cpp_type=9,
-            label=1,
-            has_default_value=False,
-            default_value=_b("").decode("utf-8"),
-            message_type=None,
-            enum_type=None,
-            containing_type=None,
-            is_extension=False,
-            extension_scope=None,
-            serialized_options=None,
-            file=DESCRIPTOR,
-        ),
-        _descriptor.FieldDescriptor(
-            name="price",
-            full_name="Ticker.price",
-            index=1,
-            number=3,
-            type=2,
-            cpp_type=6,
-            label=1,
-            has_default_value=False,
-            default_value=float(0),
-            message_type=None,
-            enum_type=None,
-            containing_type=None,
-            is_extension=False,
-            extension_scope=None,
-            serialized_options=None,
-            file=DESCRIPTOR,
-        ),
-    ],
-    extensions=[],
-    nested_types=[],
-    enum_types=[],
-    serialized_options=None,
-    is_extendable=False,
-    syntax="proto3",
-    extension_ranges=[],
-    oneofs=[],
-    serialized_start=20,
-    serialized_end=57,
-)
-
-
-_SPREAD = _descriptor.Descriptor(
-    name="Spread",
-    full_name="Spread",
-    filename=None,
-    file=DESCRIPTOR,
-    containing_type=None,
-    fields=[
-        _descriptor.FieldDescriptor(
-            name="pair",
-            full_name="Spread.pair",
-            index=0,
-            number=2,
-            type=9,
-            cpp_type=9,
-            label=1,
-            has_default_value=False,
-            default_value=_b("").decode("utf-8"),
-            message_type=None,
-            enum_type=None,
-            containing_type=None,
-            is_extension=False,
-            extension_scope=None,
-            serialized_options=None,
-            file=DESCRIPTOR,
-        ),
-        _descriptor.FieldDescriptor(
-            name="ask",
-            full_name="Spread.ask",
-            index=1,
-            number=3,
-            type=2,
-            cpp_type=6,
-            label=1,
-            has_default_value=False,
-            default_value=float(0),
-            message_type=None,
-            enum_type=None,
-            containing_type=None,
-            is_extension=False,
-            extension_scope=None,
-            serialized_options=None,
-            file=DESCRIPTOR,
-        ),
-        _descriptor.FieldDescriptor(
-            name="bid",
-            full_name="Spread.bid",
-            index=2,
-            number=4,
-            type=2,
-            cpp_type=6,
-            label=1,
-            has_default_value=False,
-            default_value=float(0),
-            message_type=None,
-            enum_type=None,
-            containing_type=None,
-            is_extension=False,
-            extension_scope=None,
-            serialized_options=None,
-            file=DESCRIPTOR,
-        ),
-        _descriptor.FieldDescriptor(
-            name="time",
-            full_name="Spread.time",
-            index=3,
-            number=5,
-            type=9,
-            cpp_type=9,
-            label=1,
-            has_default_value=False,
-            default_value=_b("").decode("utf-8"),
-            message_type=None,
-            enum_type=None,
-            containing_type=None,
-            is_extension=False,
-            extension_scope=None,
-            serialized_options=None,
-            file=DESCRIPTOR,
-        ),
-        _descriptor.FieldDescriptor(
-            name="bid_volume",
-            full_name="Spread.bid_volume",
-            index=4,
-            number=6,
-            type=2,
-            cpp_type=6,
-            label=1,
-            has_default_value=False,
-            default_value=float(0),
-            message_type=None,
-            enum_type=None,
-            containing_type=None,
-            is_extension=False,
-            extension_scope=None,
-            serialized_options=None,
-            file=DESCRIPTOR,
-        ),
-        _descriptor.FieldDescriptor(
-            name="ask_volume",
-            full_name="Spread.ask_volume",
-            index=5,
-            number=7,
-            type=2,
-            cpp_type=6,
-            label=1,
-            has_default_value=False,
-            default_value=float(0),
-            message_type=None,
-            enum_type=None,
-            containing_type=None,
-            is_extension=False,
-            extension_scope=None,
-            serialized_options=None,
-            file=DESCRIPTOR,
-        ),
-    ],
-    extensions=[],
-    nested_types=[],
-    enum_types=[],
-    serialized_options=None,
-    is_extendable=False,
-    syntax="proto3",
-    extension_ranges=[],
-    oneofs=[],
-    serialized_start=59,
-    serialized_end=161,
-)
-
-
-_OHLC = _descriptor.Descriptor(
-    name="OHLC",
-    full_name="OHLC",
-    filename=None,
-    file=DESCRIPTOR,
-    containing_type=None,
-    fields=[
-        _descriptor.FieldDescriptor(
-            name="frequency",
-            full_name="OHLC.frequency",
-            index=0,
-            number=1,
-            type=9,
-            cpp_type=9,
-            label=1,
-            has_default_value=False,
-            default_value=_b("").decode("utf-8"),
-            message_type=None,
-            enum_type=None,
-            containing_type=None,
-            is_extension=False,
-            extension_scope=None,
-            serialized_options=None,
-            file=DESCRIPTOR,
-        ),
-        _descriptor.FieldDescriptor(
-            name="pair",
-            full_name="OHLC.pair",
-            index=1,
-            number=2,
-            type=9,
-            cpp_type=9,
-            label=1,
-            has_default_value=False,
-            default_value=_b("").decode("utf-8"),
-            message_type=None,
-            enum_type=None,
-            containing_type=None,
-            is_extension=False,
-            extension_scope=None,
-            serialized_options=None,
-            file=DESCRIPTOR,
-        ),
-        _descriptor.FieldDescriptor(
-            name="begin",
-            full_name="OHLC.begin",
-            index=2,
-            number=3,
-            type=9,
-            cpp_type=9,
-            label=1,
-            has_default_value=False,
-            default_value=_b("").decode("utf-8"),
-            message_type=None,
-            enum_type=None,
-            containing_type=None,
-            is_extension=False,
-            extension_scope=None,
-            serialized_options=None,
-            file=DESCRIPTOR,
-        ),
-        _descriptor.FieldDescriptor(
-            name="end",
-            full_name="OHLC.end",
-            index=3,
-            number=4,
-            type=9,
-            cpp_type=9,
-            label=1,
-            has_default_value=False,
-            default_value=_b("").decode("utf-8"),
-            message_type=None,
-            enum_type=None,
-            containing_type=None,
-            is_extension=False,
-            extension_scope=None,
-            serialized_options=None,
-            file=DESCRIPTOR,
-        ),
-        _descriptor.FieldDescriptor(
-            name="open",
-            full_name="OHLC.open",
-            index=4,
-            number=5,
-            type=2,
-            cpp_type=6,
-            label=1,
-            has_default_value=False,
-            default_value=float(0),
-            message_type=None,
-            enum_type=None,
-            containing_type=None,
-            is_extension=False,
-            extension_scope=None,
-            serialized_options=None,
-            file=DESCRIPTOR,
-        ),
-        _descriptor.FieldDescriptor(
-            name="high",
-            full_name="OHLC.high",
-            index=5,
-            number=6,
-            type=2,
-            cpp_type=6,
-            label=1,
-            has_default_value=False,
-            default_value=float(0),
-            message_type=None,
-            enum_type=None,
-            containing_type=None,
-            is_extension=False,
-            extension_scope=None,
-            serialized_options=None,
-            file=DESCRIPTOR,
-        ),
-        _descriptor.FieldDescriptor(
-            name="low",
-            full_name="OHLC.low",
-            index=6,
-            number=7,
-            type=2,
-            cpp_type=6,
-            label=1,
-            has_default_value=False,
-            default_value=float(0),
-            message_type=None,
-            enum_type=None,
-            containing_type=None,
-            is_extension=False,
-            extension_scope=None,
-            serialized_options=None,
-            file=DESCRIPTOR,
-        ),
-        _descriptor.FieldDescriptor(
-            name="close",
-            full_name="OHLC.close",
-            index=7,
-            number=8,
-            type=2,
-            cpp_type=6,
-            label=1,
-            has_default_value=False,
-            default_value=float(0),
-            message_type=None,
-            enum_type=None,
-            containing_type=None,
-            is_extension=False,
-            extension_scope=None,
-            serialized_options=None,
-            file=DESCRIPTOR,
-        ),
-        _descriptor.FieldDescriptor(
-            name="vwap",
-            full_name="OHLC.vwap",
-            index=8,
-            number=9,
-            type=2,
-            cpp_type=6,
-            label=1,
-            has_default_value=False,
-            default_value=float(0),
-            message_type=None,
-            enum_type=None,
-            containing_type=None,
-            is_extension=False,
-            extension_scope=None,
-            serialized_options=None,
-            file=DESCRIPTOR,
-        ),
-        _descriptor.FieldDescriptor(
-            name="volume",
-            full_name="OHLC.volume",
-            index=9,
-            number=10,
-            type=2,
-            cpp_type=6,
-            label=1,
-            has_default_value=False,
-            default_value=float(0),
-            message_type=None,
-            enum_type=None,
-            containing_type=None,
-            is_extension=False,
-            extension_scope=None,
-            serialized_options=None,
-            file=DESCRIPTOR,
-        ),
-        _descriptor.FieldDescriptor(
-            name="trades",
-            full_name="OHLC.trades",
-            index=10,
-            number=11,
-            type=5,
-            cpp_type=1,
-            label=1,
-            has_default_value=False,
-            default_value=0,
-            message_type=None,
-            enum_type=None,
-            containing_type=None,
-            is_extension=False,
-            extension_scope=None,
-            serialized_options=None,
-            file=DESCRIPTOR,
-        ),
-    ],
-    extensions=[],
-    nested_types=[],
-    enum_types=[],
-    serialized_options=None,
-    is_extendable=False,
-    syntax="proto3",
-    extension_ranges=[],
-    oneofs=[],
-    serialized_start=164,
-    serialized_end=333,
-)
-
-
-_TRADE = _descriptor.Descriptor(
-    name="Trade",
-    full_name="Trade",
-    filename=None,
-    file=DESCRIPTOR,
-    containing_type=None,
-    fields=[
-        _descriptor.FieldDescriptor(
-            name="pair",
-            full_name="Trade.pair",
-            index=0,
-            number=2,
-            type=9,
-            cpp_type=9,
-            label=1,
-            has_default_value=False,
-            default_value=_b("").decode("utf-8"),
-            message_type=None,
-            enum_type=None,
-            containing_type=None,
-            is_extension=False,
-            extension_scope=None,
-            serialized_options=None,
-            file=DESCRIPTOR,
-        ),
-        _descriptor.FieldDescriptor(
-            name="price",
-            full_name="Trade.price",
-            index=1,
-            number=3,
-            type=2,
-            cpp_type=6,
-            label=1,
-            has_default_value=False,
-            default_value=float(0),
-            message_type=None,
-            enum_type=None,
-            containing_type=None,
-            is_extension=False,
-            extension_scope=None,
-            serialized_options=None,
-            file=DESCRIPTOR,
-        ),
-        _descriptor.FieldDescriptor(
-            name="volume",
-            full_name="Trade.volume",
-            index=2,
-            number=4,
-            type=2,
-            cpp_type=6,
-            label=1,
-            has_default_value=False,
-            default_value=float(0),
-            message_type=None,
-            enum_type=None,
-            containing_type=None,
-            is_extension=False,
-            extension_scope=None,
-            serialized_options=None,
-            file=DESCRIPTOR,
-        ),
-        _descriptor.FieldDescriptor(
-            name="time",
-            full_name="Trade.time",
-            index=3,
-            number=5,
-            type=9,
-            cpp_type=9,
-            label=1,
-            has_default_value=False,
-            default_value=_b("").decode("utf-8"),
-            message_type=None,
-            enum_type=None,
-            containing_type=None,
-            is_extension=False,
-            extension_scope=None,
-            serialized_options=None,
-            file=DESCRIPTOR,
-        ),
-        _descriptor.FieldDescriptor(
-            name="side",
-            full_name="Trade.side",
-            index=4,
-            number=6,
-            type=9,
-            cpp_type=9,
-            label=1,
-            has_default_value=False,
-            default_value=_b("").decode("utf-8"),
-            message_type=None,
-            enum_type=None,
-            containing_type=None,
-            is_extension=False,
-            extension_scope=None,
-            serialized_options=None,
-            file=DESCRIPTOR,
-        ),
-        _descriptor.FieldDescriptor(
-            name="order_type",
-            full_name="Trade.order_type",
-            index=5,
-            number=7,
-            type=9,
-            cpp_type=9,
-            label=1,
-            has_default_value=False,
-            default_value=_b("").decode("utf-8"),
-            message_type=None,
-            enum_type=None,
-            containing_type=None,
-            is_extension=False,
-            extension_scope=None,
-            serialized_options=None,
-            file=DESCRIPTOR,
-        ),
-        _descriptor.FieldDescriptor(
-            name="misc",
-            full_name="Trade.misc",
-            index=6,
-            number=8,
-            type=9,
-            cpp_type=9,
-            label=1,
-            has_default_value=False,
-            default_value=_b("").decode("utf-8"),
-            message_type=None,
-            enum_type=None,
-            containing_type=None,
-            is_extension=False,
-            extension_scope=None,
-            serialized_options=None,
-            file=DESCRIPTOR,
-        ),
-    ],
-    extensions=[],
-    nested_types=[],
-    enum_types=[],
-    serialized_options=None,
-    is_extendable=False,
-    syntax="proto3",
-    extension_ranges=[],
-    oneofs=[],
-    serialized_start=335,
-    serialized_end=449,
-)
-
-DESCRIPTOR.message_types_by_name["Ticker"] = _TICKER
-DESCRIPTOR.message_types_by_name["Spread"] = _SPREAD
-DESCRIPTOR.message_types_by_name["OHLC"] = _OHLC
-DESCRIPTOR.message_types_by_name["Trade"] = _TRADE
-_sym_db.RegisterFileDescriptor(DESCRIPTOR)
-
-Ticker = _reflection.GeneratedProtocolMessageType(
-    "Ticker",
-    (_message.Message,),
-    dict(
-        DESCRIPTOR=_TICKER,
-        __module__="kraken_msg_pb2"
-        # @@protoc_insertion_point(class_scope:Ticker)
-    ),
-)
-_sym_db.RegisterMessage(Ticker)
-
-Spread = _reflection.GeneratedProtocolMessageType(
-    "Spread",
-    (_message.Message,),
-    dict(
-        DESCRIPTOR=_SPREAD,
-        __module__="kraken_msg_pb2"
-        # @@protoc_insertion_point(class_scope:Spread)
-    ),
-)
-_sym_db.RegisterMessage(Spread)
-
-OHLC = _reflection.GeneratedProtocolMessageType(
-    "OHLC",
-    (_message.Message,),
-    dict(
-        DESCRIPTOR=_OHLC,
-        __module__="kraken_msg_pb2"
-        # @@protoc_insertion_point(class_scope:OHLC)
-    ),
-)
-_sym_db.RegisterMessage(OHLC)
-
-Trade = _reflection.GeneratedProtocolMessageType(
-    "Trade",
-    (_message.Message,),
-    dict(
-        DESCRIPTOR=_TRADE,
-        __module__="kraken_msg_pb2"
-        # @@protoc_insertion_point(class_scope:Trade)
-    ),
-)
-_sym_db.RegisterMessage(Trade)
-
-
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(
+    b'\n\x10kraken_msg.proto"%\n\x06Ticker\x12\x0c\n\x04pair\x18\x02 \x01(\t\x12\r\n\x05price\x18\x03 \x01(\x02"f\n\x06Spread\x12\x0c\n\x04pair\x18\x02 \x01(\t\x12\x0b\n\x03\x61sk\x18\x03 \x01(\x02\x12\x0b\n\x03\x62id\x18\x04 \x01(\x02\x12\x0c\n\x04time\x18\x05 \x01(\t\x12\x12\n\nbid_volume\x18\x06 \x01(\x02\x12\x12\n\nask_volume\x18\x07 \x01(\x02"\xa9\x01\n\x04OHLC\x12\x11\n\tfrequency\x18\x01 \x01(\t\x12\x0c\n\x04pair\x18\x02 \x01(\t\x12\r\n\x05\x62\x65gin\x18\x03 \x01(\t\x12\x0b\n\x03\x65nd\x18\x04 \x01(\t\x12\x0c\n\x04open\x18\x05 \x01(\x02\x12\x0c\n\x04high\x18\x06 \x01(\x02\x12\x0b\n\x03low\x18\x07 \x01(\x02\x12\r\n\x05\x63lose\x18\x08 \x01(\x02\x12\x0c\n\x04vwap\x18\t \x01(\x02\x12\x0e\n\x06volume\x18\n \x01(\x02\x12\x0e\n\x06trades\x18\x0b \x01(\x05"r\n\x05Trade\x12\x0c\n\x04pair\x18\x02 \x01(\t\x12\r\n\x05price\x18\x03 \x01(\x02\x12\x0e\n\x06volume\x18\x04 \x01(\x02\x12\x0c\n\x04time\x18\x05 \x01(\t\x12\x0c\n\x04side\x18\x06 \x01(\t\x12\x12\n\norder_type\x18\x07 \x01(\t\x12\x0c\n\x04misc\x18\x08 \x01(\t"2\n\nTradeBatch\x12\x0c\n\x04pair\x18\x02 \x01(\t\x12\x16\n\x06trades\x18\x03 \x03(\x0b\x32\x06.Trade"*\n\tBookLevel\x12\r\n\x05price\x18\x01 \x01(\x02\x12\x0e\n\x06volume\x18\x02 \x01(\x02"b\n\x0c\x42ookSnapshot\x12\x0c\n\x04pair\x18\x02 \x01(\t\x12\x10\n\x08sequence\x18\x03 \x01(\x04\x12\x18\n\x04\x62ids\x18\x04 \x03(\x0b\x32\n.BookLevel\x12\x18\n\x04\x61sks\x18\x05 \x03(\x0b\x32\n.BookLevel"_\n\tBookDelta\x12\x0c\n\x04pair\x18\x02 \x01(\t\x12\x10\n\x08sequence\x18\x03 \x01(\x04\x12\x18\n\x04\x62ids\x18\x04 \x03(\x0b\x32\n.BookLevel\x12\x18\n\x04\x61sks\x18\x05 \x03(\x0b\x32\n.BookLevel"o\n\nFeedStatus\x12\x0c\n\x04pair\x18\x02 \x01(\t\x12\x0e\n\x06status\x18\x03 \x01(\t\x12\x0f\n\x07\x63hannel\x18\x04 \x01(\t\x12\x11\n\tgap_begin\x18\x05 \x01(\x03\x12\x0f\n\x07gap_end\x18\x06 \x01(\x03\x12\x0e\n\x06reason\x18\x07 \x01(\tb\x06proto3'
+)
+
+_builder.BuildMessageAndEnumDescriptors(DESCRIPTOR, globals())
+_builder.BuildTopDescriptorsAndMessages(DESCRIPTOR, "kraken_msg_pb2", globals())
+if _descriptor._USE_C_DESCRIPTORS == False:
+
+    DESCRIPTOR._options = None
+    _TICKER._serialized_start = 20
+    _TICKER._serialized_end = 57
+    _SPREAD._serialized_start = 59
+    _SPREAD._serialized_end = 161
+    _OHLC._serialized_start = 164
+    _OHLC._serialized_end = 333
+    _TRADE._serialized_start = 335
+    _TRADE._serialized_end = 449
+    _TRADEBATCH._serialized_start = 451
+    _TRADEBATCH._serialized_end = 501
+    _BOOKLEVEL._serialized_start = 503
+    _BOOKLEVEL._serialized_end = 545
+    _BOOKSNAPSHOT._serialized_start = 547
+    _BOOKSNAPSHOT._serialized_end = 645
+    _BOOKDELTA._serialized_start = 647
+    _BOOKDELTA._serialized_end = 742
+    _FEEDSTATUS._serialized_start = 744
+    _FEEDSTATUS._serialized_end = 855
 # @@protoc_insertion_point(module_scope)
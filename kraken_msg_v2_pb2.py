@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+# Generated by the protocol buffer compiler.  DO NOT EDIT!
+# source: kraken_msg_v2.proto
+"""Generated protocol buffer code."""
+
+from google.protobuf.internal import builder as _builder
+from google.protobuf import descriptor as _descriptor
+from google.protobuf import descriptor_pool as _descriptor_pool
+from google.protobuf import symbol_database as _symbol_database
+
+# @@protoc_insertion_point(imports)
+
+_sym_db = _symbol_database.Default()
+
+
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(
+    b'\n\x13kraken_msg_v2.proto\x12\x02v2"%\n\x06Ticker\x12\x0c\n\x04pair\x18\x02 \x01(\t\x12\r\n\x05price\x18\x03 \x01(\x01"f\n\x06Spread\x12\x0c\n\x04pair\x18\x02 \x01(\t\x12\x0b\n\x03\x61sk\x18\x03 \x01(\x01\x12\x0b\n\x03\x62id\x18\x04 \x01(\x01\x12\x0c\n\x04time\x18\x05 \x01(\x03\x12\x12\n\nbid_volume\x18\x06 \x01(\x01\x12\x12\n\nask_volume\x18\x07 \x01(\x01"\xa9\x01\n\x04OHLC\x12\x11\n\tfrequency\x18\x01 \x01(\t\x12\x0c\n\x04pair\x18\x02 \x01(\t\x12\r\n\x05\x62\x65gin\x18\x03 \x01(\x03\x12\x0b\n\x03\x65nd\x18\x04 \x01(\x03\x12\x0c\n\x04open\x18\x05 \x01(\x01\x12\x0c\n\x04high\x18\x06 \x01(\x01\x12\x0b\n\x03low\x18\x07 \x01(\x01\x12\r\n\x05\x63lose\x18\x08 \x01(\x01\x12\x0c\n\x04vwap\x18\t \x01(\x01\x12\x0e\n\x06volume\x18\n \x01(\x01\x12\x0e\n\x06trades\x18\x0b \x01(\x05"r\n\x05Trade\x12\x0c\n\x04pair\x18\x02 \x01(\t\x12\r\n\x05price\x18\x03 \x01(\x01\x12\x0e\n\x06volume\x18\x04 \x01(\x01\x12\x0c\n\x04time\x18\x05 \x01(\x03\x12\x0c\n\x04side\x18\x06 \x01(\t\x12\x12\n\norder_type\x18\x07 \x01(\t\x12\x0c\n\x04misc\x18\x08 \x01(\t"5\n\nTradeBatch\x12\x0c\n\x04pair\x18\x02 \x01(\t\x12\x19\n\x06trades\x18\x03 \x03(\x0b\x32\t.v2.Trade"*\n\tBookLevel\x12\r\n\x05price\x18\x01 \x01(\x01\x12\x0e\n\x06volume\x18\x02 \x01(\x01"h\n\x0c\x42ookSnapshot\x12\x0c\n\x04pair\x18\x02 \x01(\t\x12\x10\n\x08sequence\x18\x03 \x01(\x04\x12\x1b\n\x04\x62ids\x18\x04 \x03(\x0b\x32\r.v2.BookLevel\x12\x1b\n\x04\x61sks\x18\x05 \x03(\x0b\x32\r.v2.BookLevel"e\n\tBookDelta\x12\x0c\n\x04pair\x18\x02 \x01(\t\x12\x10\n\x08sequence\x18\x03 \x01(\x04\x12\x1b\n\x04\x62ids\x18\x04 \x03(\x0b\x32\r.v2.BookLevel\x12\x1b\n\x04\x61sks\x18\x05 \x03(\x0b\x32\r.v2.BookLevel"o\n\nFeedStatus\x12\x0c\n\x04pair\x18\x02 \x01(\t\x12\x0e\n\x06status\x18\x03 \x01(\t\x12\x0f\n\x07\x63hannel\x18\x04 \x01(\t\x12\x11\n\tgap_begin\x18\x05 \x01(\x03\x12\x0f\n\x07gap_end\x18\x06 \x01(\x03\x12\x0e\n\x06reason\x18\x07 \x01(\tb\x06proto3'
+)
+
+_builder.BuildMessageAndEnumDescriptors(DESCRIPTOR, globals())
+_builder.BuildTopDescriptorsAndMessages(DESCRIPTOR, "kraken_msg_v2_pb2", globals())
+if _descriptor._USE_C_DESCRIPTORS == False:
+
+    DESCRIPTOR._options = None
+    _TICKER._serialized_start = 27
+    _TICKER._serialized_end = 64
+    _SPREAD._serialized_start = 66
+    _SPREAD._serialized_end = 168
+    _OHLC._serialized_start = 171
+    _OHLC._serialized_end = 340
+    _TRADE._serialized_start = 342
+    _TRADE._serialized_end = 456
+    _TRADEBATCH._serialized_start = 458
+    _TRADEBATCH._serialized_end = 511
+    _BOOKLEVEL._serialized_start = 513
+    _BOOKLEVEL._serialized_end = 555
+    _BOOKSNAPSHOT._serialized_start = 557
+    _BOOKSNAPSHOT._serialized_end = 661
+    _BOOKDELTA._serialized_start = 663
+    _BOOKDELTA._serialized_end = 764
+    _FEEDSTATUS._serialized_start = 766
+    _FEEDSTATUS._serialized_end = 877
+# @@protoc_insertion_point(module_scope)
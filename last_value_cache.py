@@ -0,0 +1,153 @@
+"""
+Last-value cache for late-joining subscribers. Fed with a copy of every
+published message by the proxy, it keeps the latest Ticker, Spread, OHLC and
+FeedStatus message of every topic, and the latest BookSnapshot of every book
+followed by the BookDeltas since, and serves them over a ROUTER snapshot
+socket.
+
+Snapshot protocol (REQ socket at settings.ZMQ_SNAPSHOT_SOCKET_URL):
+- request: one frame per topic prefix, like SUB subscriptions, a single empty
+  frame requests everything
+- reply: [topic, payload] frame pairs of all matching cached messages, a
+  single empty frame if nothing matches
+
+To switch to the live stream without a gap, subscribe to the PUB socket
+first, then request the snapshot, and drop live book deltas with a sequence
+not newer than the snapshot's.
+"""
+
+from typing import Dict, List, Optional, Tuple
+
+import zmq
+
+import settings
+from messages import V2_TOPIC_PREFIX
+
+# Maximum updates applied between checks for snapshot requests
+UPDATE_BATCH = 1000
+
+# Messages cached by message name: "last" keeps the latest message of a topic,
+# "snapshot" starts a book, "delta" is appended to the book of its snapshot
+CACHED_MESSAGES = {
+    "Ticker": "last",
+    "Spread": "last",
+    "OHLC": "last",
+    "FeedStatus": "last",
+    "BookSnapshot": "snapshot",
+    "BookDelta": "delta",
+}
+
+
+class _CacheKeyTable(dict):
+    """
+    (policy, cache key) by topic, the cache key of book deltas is the topic of
+    their book snapshots, e.g. ("delta", b"BookSnapshot - XBT/USD") for
+    b"BookDelta - XBT/USD".
+    """
+
+    def __missing__(self, topic: bytes) -> Tuple[Optional[str], bytes]:
+        name = topic.decode()
+        for prefix in [settings.CONFLATED_TOPIC_PREFIX, V2_TOPIC_PREFIX]:
+            if name.startswith(prefix):
+                name = name[len(prefix) :]
+        name = name.split(" - ", 1)[0]
+        policy = CACHED_MESSAGES.get(name)
+
+        key = topic
+        if policy == "delta":
+            key = topic.replace(b"BookDelta", b"BookSnapshot", 1)
+
+        self[topic] = policy, key
+
+        return policy, key
+
+
+CACHE_KEYS = _CacheKeyTable()
+
+
+class LastValueCache:
+    """
+    Cached messages by cache key. Every entry holds the topics it matches on
+    and the [topic, payload] pairs to reply with. Owned by a single thread,
+    see serve().
+    """
+
+    def __init__(self):
+        self._entries: Dict[bytes, Tuple[Tuple[bytes, ...], List[bytes]]] = {}
+
+    def update(self, topic: bytes, payload: bytes) -> None:
+        policy, key = CACHE_KEYS[topic]
+
+        if policy == "last":
+            self._entries[key] = (topic,), [topic, payload]
+        elif policy == "snapshot":
+            # book entries also match on the topic of their deltas
+            delta_topic = topic.replace(b"BookSnapshot", b"BookDelta", 1)
+            self._entries[key] = (topic, delta_topic), [topic, payload]
+        elif policy == "delta":
+            entry = self._entries.get(key)
+            # deltas without a snapshot can't be applied by anyone
+            if entry is not None:
+                entry[1].extend((topic, payload))
+
+    def snapshot(self, prefixes: List[bytes]) -> List[bytes]:
+        """
+        :param prefixes: Topic prefixes, an empty prefix matches all topics.
+        :return: Flat [topic, payload, topic, payload, ...] frames of the
+        matching entries.
+        """
+
+        frames = []
+
+        for topics, entry_frames in self._entries.values():
+            if any(topic.startswith(prefix) for topic in topics for prefix in prefixes):
+                frames.extend(entry_frames)
+
+        return frames
+
+    def serve(
+        self,
+        zmq_context: zmq.Context,
+        capture_url: str = settings.ZMQ_PROXY_CAPTURE_URL,
+        snapshot_url: str = settings.ZMQ_SNAPSHOT_SOCKET_URL,
+    ):
+        """
+        Updates the cache from the proxy's capture PUB socket and answers
+        snapshot requests. Blocks forever, run it in a thread.
+
+        :param zmq_context: ZeroMQ Context shared with the proxy.
+        :param capture_url: Url of the capture PUB socket of the proxy.
+        :param snapshot_url: Url the snapshot ROUTER socket is bound to.
+        """
+
+        # a lost BookDelta would corrupt the cached book, no high-water mark on
+        # either side of the inproc pipe queues all messages instead
+        zmq_sub_socket = zmq_context.socket(zmq.SUB)
+        zmq_sub_socket.setsockopt(zmq.RCVHWM, 0)
+        zmq_sub_socket.setsockopt(zmq.SUBSCRIBE, b"")
+        zmq_sub_socket.connect(capture_url)
+
+        zmq_router_socket = zmq_context.socket(zmq.ROUTER)
+        zmq_router_socket.bind(snapshot_url)
+
+        poller = zmq.Poller()
+        poller.register(zmq_sub_socket, zmq.POLLIN)
+        poller.register(zmq_router_socket, zmq.POLLIN)
+
+        while True:
+            events = dict(poller.poll())
+
+            # apply all queued updates before answering requests, so replies
+            # are as recent as possible
+            if zmq_sub_socket in events:
+                for _ in range(UPDATE_BATCH):
+                    try:
+                        frames = zmq_sub_socket.recv_multipart(zmq.NOBLOCK)
+                    except zmq.Again:
+                        break
+                    self.update(frames[0], frames[1])
+
+            if zmq_router_socket in events:
+                identity, _, *prefixes = zmq_router_socket.recv_multipart()
+                frames = self.snapshot(prefixes) or [b""]
+                zmq_router_socket.send_multipart([identity, b"", *frames])
@@ -1,16 +1,104 @@
+import argparse
+import asyncio
+import logging
 import threading
 
 import zmq
 
 import settings
-from data import (
-    stream_trade_data,
-    stream_ohlc_data,
-    stream_ticker_data,
-    stream_spread_data,
-)
+from async_data import run_streams_async
+from candles import CandleAggregator
+from capture import FrameCapture
+from conflation import Conflator
+from last_value_cache import LastValueCache
+from sink import ColumnarSink
+from data import BOOK_RESYNCS, DROPPED_MESSAGES, start_streams
+from health import Watchdog
+from stats import LatencyStats
+from supervisor import supervise
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="EETC Data Feed - Kraken")
+    parser.add_argument(
+        "--mode",
+        choices=["threaded", "asyncio"],
+        default=settings.RUN_MODE,
+        help="threaded: one thread per websocket connection, "
+        "asyncio: all websocket connections in a single event loop",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=settings.WORKERS,
+        help="number of worker processes the pairs are sharded across, "
+        "0 runs all websocket connections in this process",
+    )
+    parser.add_argument(
+        "--url", default=settings.KRAKEN_WS_URL, help="Kraken websocket API url"
+    )
+    parser.add_argument(
+        "--pairs",
+        type=lambda pairs: pairs.split(","),
+        default=settings.KRAKEN_PAIRS,
+        help="comma separated currency pairs, e.g. XBT/USD,ETH/USD",
+    )
+    parser.add_argument(
+        "--capture",
+        default=settings.CAPTURE_DIRECTORY,
+        help="directory every raw Kraken frame is captured to, see capture.py",
+    )
+    parser.add_argument(
+        "--stats",
+        action="store_true",
+        default=settings.STATS_ENABLED,
+        help="record per-stage latency histograms, logged periodically and "
+        f"served as JSON at {settings.ZMQ_STATS_URL}",
+    )
+    parser.add_argument(
+        "--conflate",
+        type=float,
+        default=settings.CONFLATION_INTERVAL,
+        help="also publish the latest ticker and spread messages on "
+        f"'{settings.CONFLATED_TOPIC_PREFIX}' topics every CONFLATE seconds",
+    )
+    parser.add_argument(
+        "--snapshots",
+        action="store_true",
+        default=settings.LAST_VALUE_CACHE_ENABLED,
+        help="serve the latest ticker, spread, OHLC and book messages to late "
+        f"joiners at {settings.ZMQ_SNAPSHOT_SOCKET_URL}, see last_value_cache.py",
+    )
+    parser.add_argument(
+        "--candles",
+        type=lambda intervals: intervals.split(","),
+        default=settings.CANDLE_INTERVALS,
+        help="comma separated intervals of bars aggregated from the trades, "
+        "e.g. 1s,5s,15s,5m,15m",
+    )
+    parser.add_argument(
+        "--sink",
+        default=settings.SINK_DIRECTORY,
+        help="directory trades, spreads and closed OHLC bars are stored to in "
+        "columnar files, see sink.py",
+    )
+    parser.add_argument(
+        "--watchdog",
+        action="store_true",
+        default=settings.WATCHDOG_ENABLED,
+        help="reconnect websocket connections without frames for "
+        f"{settings.WATCHDOG_CONNECTION_TIMEOUT}s and publish their health on "
+        "the FeedStatus topics, see health.py",
+    )
+    args = parser.parse_args()
+
+    if settings.KRAKEN_WS_CONNECTIONS < 1:
+        parser.error(
+            "settings.KRAKEN_WS_CONNECTIONS must be at least 1, "
+            f"got {settings.KRAKEN_WS_CONNECTIONS}"
+        )
+
+    logging.basicConfig(level=settings.LOG_LEVEL, format=settings.LOG_FORMAT)
+
     # create ZeroMQ Context which will be shared by all threads
     zmq_context = zmq.Context()
 
@@ -21,26 +109,122 @@ if __name__ == "__main__":
     # create ZeroMQ PULL Socket and bind it to IPC url
     # this PULL socket will receive data from PUSH sockets in all threads
     zmq_pull_socket = zmq_context.socket(zmq.PULL)
+    zmq_pull_socket.setsockopt(zmq.RCVHWM, settings.ZMQ_PULL_RCVHWM)
     zmq_pull_socket.bind(zmq_ipc_url)
 
     # create ZeroMQ PUB Socket and bind it to port 5555
     # this PUB socket will receive data from the PUSH socket via zmq_proxy()
     zmq_pub_socket = zmq_context.socket(zmq.PUB)
+    zmq_pub_socket.setsockopt(zmq.SNDHWM, settings.ZMQ_PUB_SNDHWM)
     zmq_pub_socket.bind(zmq_pub_url)
 
-    trade = threading.Thread(target=stream_trade_data, args=(["XBT/USD"], zmq_context))
-    ohlc = threading.Thread(target=stream_ohlc_data, args=(["XBT/USD"], zmq_context))
-    ticker = threading.Thread(
-        target=stream_ticker_data, args=(["XBT/USD"], zmq_context)
-    )
-    spread = threading.Thread(
-        target=stream_spread_data, args=(["XBT/USD"], zmq_context)
-    )
+    # worker processes capture frames to their own segment files
+    capture = None
+    if args.capture and args.workers == 0:
+        capture = FrameCapture(args.capture)
+
+    # worker processes push their stage latencies to the proxy below, which
+    # records the proxy stage
+    stats = None
+    if args.stats:
+        stats = LatencyStats(
+            {"dropped": DROPPED_MESSAGES, "book_resyncs": BOOK_RESYNCS}
+        )
+        stats.start(zmq_context)
+
+    # worker processes conflate the messages of their own pairs
+    conflator = None
+    if args.conflate and args.workers == 0:
+        conflator = Conflator(zmq_context, args.conflate)
+
+    # worker processes aggregate the trades of their own pairs
+    candles = None
+    if args.candles and args.workers == 0:
+        candles = CandleAggregator(zmq_context, args.candles)
+
+    # worker processes watch their own connections
+    watchdog = None
+    if args.watchdog and args.workers == 0:
+        watchdog = Watchdog(zmq_context)
+
+    if args.workers > 0:
+        # shard the pairs across worker processes, each one pushing to the
+        # PULL socket above, and restart workers which die
+        threading.Thread(
+            target=supervise,
+            args=(
+                args.pairs,
+                settings.KRAKEN_SUBSCRIPTIONS,
+                args.workers,
+                args.mode,
+                settings.KRAKEN_WS_CONNECTIONS,
+                args.url,
+                args.capture,
+                args.stats,
+                args.conflate,
+                args.candles,
+                args.watchdog,
+            ),
+            daemon=True,
+        ).start()
+    elif args.mode == "asyncio":
+        # run all websocket connections in a single event loop in a background
+        # thread, the main thread stays dedicated to the proxy
+        threading.Thread(
+            target=asyncio.run,
+            args=(
+                run_streams_async(
+                    args.pairs,
+                    settings.KRAKEN_SUBSCRIPTIONS,
+                    zmq_context,
+                    connections=settings.KRAKEN_WS_CONNECTIONS,
+                    url=args.url,
+                    capture=capture,
+                    stats=stats,
+                    conflator=conflator,
+                    candles=candles,
+                    watchdog=watchdog,
+                ),
+            ),
+            daemon=True,
+        ).start()
+    else:
+        # start a small pool of websocket connections, each one multiplexing
+        # all channels for its share of the pairs in its own thread
+        start_streams(
+            args.pairs,
+            settings.KRAKEN_SUBSCRIPTIONS,
+            zmq_context,
+            connections=settings.KRAKEN_WS_CONNECTIONS,
+            url=args.url,
+            capture=capture,
+            stats=stats,
+            conflator=conflator,
+            candles=candles,
+            watchdog=watchdog,
+        )
+
+    # the proxy publishes a copy of every message to the last-value cache and
+    # the historical sink, on a PUB socket without high-water mark, so a
+    # lagging consumer queues messages instead of blocking the proxy or losing
+    # book deltas
+    zmq_capture_socket = None
+    if args.snapshots or args.sink:
+        zmq_capture_socket = zmq_context.socket(zmq.PUB)
+        zmq_capture_socket.setsockopt(zmq.SNDHWM, 0)
+        zmq_capture_socket.bind(settings.ZMQ_PROXY_CAPTURE_URL)
+
+    if args.snapshots:
+        threading.Thread(
+            target=LastValueCache().serve, args=(zmq_context,), daemon=True
+        ).start()
 
-    # start threads
-    trade.start()
-    ohlc.start()
-    ticker.start()
-    spread.start()
+    if args.sink:
+        threading.Thread(
+            target=ColumnarSink(args.sink).serve, args=(zmq_context,), daemon=True
+        ).start()
 
-    zmq.proxy(zmq_pull_socket, zmq_pub_socket)
+    if stats is not None:
+        stats.proxy(zmq_pull_socket, zmq_pub_socket, zmq_capture_socket)
+    else:
+        zmq.proxy(zmq_pull_socket, zmq_pub_socket, zmq_capture_socket)
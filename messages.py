@@ -1,20 +1,136 @@
 import json
+import time
 from datetime import datetime
-from typing import Optional, Tuple
+from types import ModuleType
+from typing import Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+from google.protobuf.message import Message
 
 import kraken_msg_pb2
+import kraken_msg_v2_pb2
+from book import OrderBook
+
+try:
+    # optional, considerably faster JSON decoder
+    from orjson import loads as _json_loads
+except ImportError:
+    _json_loads = json.loads
+
+# A websocket frame as received (str or bytes) or already decoded
+RawMessage = Union[str, bytes, list, dict]
+
+# Topics of schema v2 messages are prefixed, so v1 subscriptions don't match
+V2_TOPIC_PREFIX = "v2 - "
+
+# Prefix of the topics of unparsed Kraken frames, e.g.
+# "Raw - book-1000 - XBT/USD"
+RAW_TOPIC_PREFIX = "Raw - "
+
+# Protobuf module and topic prefix by schema version
+SCHEMAS = {
+    1: (kraken_msg_pb2, ""),
+    2: (kraken_msg_v2_pb2, V2_TOPIC_PREFIX),
+}
+
+
+class TopicTable(dict):
+    """
+    Encoded topics by (prefix, name, pair, suffix) key, e.g.
+    TOPICS["", "OHLC", "XBT/USD", "Minutely"] == b"OHLC - XBT/USD - Minutely".
+
+    Every topic is formatted and encoded only once, the first time it is
+    looked up, so the hot path doesn't format or encode any strings.
+    """
+
+    def __missing__(self, key: Tuple[str, str, str, str]) -> bytes:
+        prefix, name, pair, suffix = key
+
+        topic = f"{prefix}{name} - {pair}"
+        if suffix:
+            topic = f"{topic} - {suffix}"
+
+        self[key] = topic = topic.encode()
+
+        return topic
+
+
+TOPICS = TopicTable()
+
+# Returned for event frames (heartbeats, subscriptionStatus, ...)
+_EVENT_MESSAGE = {}
+
+
+def decode_message(message: RawMessage) -> Union[list, dict]:
+    """
+    Decodes a message from the Kraken websocket. Event frames are JSON
+    objects and are recognized by their first character without being
+    parsed, data frames are decoded with orjson when installed.
+
+    :param message: The message received from the websocket, raw or decoded
+    :return: Decoded data frame (list), or a dict for event frames
+    """
+
+    if isinstance(message, (list, dict)):
+        return message
+
+    if message[:1] in ("{", b"{"):
+        return _EVENT_MESSAGE
+
+    return _json_loads(message)
+
+
+class RawFrame:
+    """
+    Unparsed Kraken data frame published on a raw topic. Serializes to and
+    parses from the original JSON bytes like a protobuf message, so it's
+    published and received the same way.
+    """
+
+    __slots__ = ("frame",)
+
+    def __init__(self, frame: Union[str, bytes] = b""):
+        self.frame = frame
+
+    def SerializeToString(self) -> bytes:
+        frame = self.frame
+        return frame.encode() if isinstance(frame, str) else frame
+
+    def ParseFromString(self, serialized) -> None:
+        self.frame = bytes(serialized)
+
+    @classmethod
+    def FromString(cls, serialized) -> "RawFrame":
+        return cls(bytes(serialized))
+
+    def CopyFrom(self, other: "RawFrame") -> None:
+        self.frame = other.frame
+
+
+def process_raw_frame(
+    message: Union[str, bytes], channel_name: str, pair: str
+) -> Tuple[bytes, RawFrame]:
+    """
+    Publishes a Kraken data frame as is, without decoding it.
+
+    :param message: The message received from the websocket.
+    :param channel_name: Channel name of the frame, e.g. "book-1000".
+    :param pair: Currency pair of the frame.
+    :return: Tuple of raw topic and the unparsed frame.
+    """
+
+    return TOPICS[RAW_TOPIC_PREFIX, channel_name, pair, ""], RawFrame(message)
 
 
-def process_ticker_message(message: str) -> Tuple[str, kraken_msg_pb2.Ticker]:
+def process_ticker_message(message: RawMessage) -> Tuple[bytes, kraken_msg_pb2.Ticker]:
     """
     Takes a message from the Kraken websocket and converts it to a
     protobuf message.
 
-    :param message: The message received from the websocket
+    :param message: The message received from the websocket, raw or decoded
     :return: A protobuf ticker message
     """
 
-    message = json.loads(message)
+    message = decode_message(message)
 
     if not isinstance(message, dict):
         ticker = kraken_msg_pb2.Ticker()
@@ -22,23 +138,23 @@ def process_ticker_message(message: str) -> Tuple[str, kraken_msg_pb2.Ticker]:
         ticker.pair = message[3]
         ticker.price = float(message[1]["c"][0])
 
-        topic = f"Ticker - XBT/USD"
+        topic = TOPICS["", "Ticker", ticker.pair, ""]
 
         return topic, ticker
 
     return None, None
 
 
-def process_spread_message(message: str) -> Tuple[str, kraken_msg_pb2.Spread]:
+def process_spread_message(message: RawMessage) -> Tuple[bytes, kraken_msg_pb2.Spread]:
     """
     Takes a message from the Kraken websocket and converts it to a
     protobuf message.
 
-    :param message: The message received from the websocket
+    :param message: The message received from the websocket, raw or decoded
     :return: A protobuf spread message
     """
 
-    message = json.loads(message)
+    message = decode_message(message)
 
     if not isinstance(message, dict):
         spread_time = datetime.fromtimestamp(float(message[1][2]))
@@ -52,41 +168,54 @@ def process_spread_message(message: str) -> Tuple[str, kraken_msg_pb2.Spread]:
         spread.bid_volume = float(message[1][3])
         spread.ask_volume = float(message[1][4])
 
-        topic = f"Spread - XBT/USD"
+        topic = TOPICS["", "Spread", spread.pair, ""]
 
         return topic, spread
 
     return None, None
 
 
+# OHLC frequencies (topic suffixes) by Kraken OHLC interval in minutes
+OHLC_FREQUENCIES = {
+    1: "Minutely",
+    5: "5 Minutes",
+    15: "15 Minutes",
+    30: "30 Minutes",
+    60: "Hourly",
+    240: "4 Hours",
+    1440: "Daily",
+    10080: "Weekly",
+    21600: "15 Days",
+}
+
+# OHLC frequencies by Kraken channel name, e.g. "ohlc-60"
+_OHLC_TYPE_TO_FREQUENCY = {
+    f"ohlc-{interval}": frequency for interval, frequency in OHLC_FREQUENCIES.items()
+}
+
+
 def _convert_ohlc_type_to_frequency(ohlc_type: str) -> Optional[str]:
     """
     Convert values like "ohlc-1", "ohlc-60" and "ohlc-1440" to values like
-    "Minutely", "Hourly", "Daily".
+    "Minutely", "Hourly", "Daily", see OHLC_FREQUENCIES.
 
     :param ohlc_type: String value like "ohlc-1", "ohlc-60", etc.
     :return: String value like "Minutely", "Hourly", etc.
     """
 
-    ohlc_type_to_frequency_map = {
-        "ohlc-1": "Minutely",
-        "ohlc-60": "Hourly",
-        "ohlc-1440": "Daily",
-    }
-
-    return ohlc_type_to_frequency_map.get(ohlc_type)
+    return _OHLC_TYPE_TO_FREQUENCY.get(ohlc_type)
 
 
-def process_ohlc_message(message: str) -> Tuple[str, kraken_msg_pb2.OHLC]:
+def process_ohlc_message(message: RawMessage) -> Tuple[bytes, kraken_msg_pb2.OHLC]:
     """
     Takes a message from the Kraken websocket, converts it to a
     protobuf message.
 
-    :param message: The message received from the websocket
+    :param message: The message received from the websocket, raw or decoded
     :return: A protobuf ohlc message
     """
 
-    message = json.loads(message)
+    message = decode_message(message)
 
     if not isinstance(message, dict):
         ohlc_begin_time = datetime.fromtimestamp(float(message[1][0]))
@@ -106,7 +235,109 @@ def process_ohlc_message(message: str) -> Tuple[str, kraken_msg_pb2.OHLC]:
         ohlc.volume = float(message[1][7])
         ohlc.trades = int(message[1][8])
 
-        topic = f"OHLC - XBT/USD - "
+        topic = TOPICS["", "OHLC", ohlc.pair, ohlc.frequency]
+
+        return topic, ohlc
+
+    return None, None
+
+
+def _to_epoch_ns(timestamp: str) -> int:
+    """
+    Converts a Kraken timestamp string to nanoseconds since the Unix epoch
+    without going through a float, keeping all of its digits.
+
+    :param timestamp: Kraken timestamp string, e.g. "1664479174.047114".
+    :return: Nanoseconds since the Unix epoch, e.g. 1664479174047114000.
+    """
+
+    seconds, _, fraction = timestamp.partition(".")
+
+    return int(seconds) * 1_000_000_000 + int(fraction[:9].ljust(9, "0"))
+
+
+def process_ticker_message_v2(
+    message: RawMessage,
+) -> Tuple[bytes, kraken_msg_v2_pb2.Ticker]:
+    """
+    Schema v2 counterpart of process_ticker_message().
+
+    :param message: The message received from the websocket, raw or decoded
+    :return: A schema v2 protobuf ticker message
+    """
+
+    message = decode_message(message)
+
+    if not isinstance(message, dict):
+        ticker = kraken_msg_v2_pb2.Ticker()
+
+        ticker.pair = message[3]
+        ticker.price = float(message[1]["c"][0])
+
+        topic = TOPICS[V2_TOPIC_PREFIX, "Ticker", ticker.pair, ""]
+
+        return topic, ticker
+
+    return None, None
+
+
+def process_spread_message_v2(
+    message: RawMessage,
+) -> Tuple[bytes, kraken_msg_v2_pb2.Spread]:
+    """
+    Schema v2 counterpart of process_spread_message().
+
+    :param message: The message received from the websocket, raw or decoded
+    :return: A schema v2 protobuf spread message
+    """
+
+    message = decode_message(message)
+
+    if not isinstance(message, dict):
+        spread = kraken_msg_v2_pb2.Spread()
+
+        spread.pair = message[3]
+        spread.bid = float(message[1][0])
+        spread.ask = float(message[1][1])
+        spread.time = _to_epoch_ns(message[1][2])
+        spread.bid_volume = float(message[1][3])
+        spread.ask_volume = float(message[1][4])
+
+        topic = TOPICS[V2_TOPIC_PREFIX, "Spread", spread.pair, ""]
+
+        return topic, spread
+
+    return None, None
+
+
+def process_ohlc_message_v2(
+    message: RawMessage,
+) -> Tuple[bytes, kraken_msg_v2_pb2.OHLC]:
+    """
+    Schema v2 counterpart of process_ohlc_message().
+
+    :param message: The message received from the websocket, raw or decoded
+    :return: A schema v2 protobuf ohlc message
+    """
+
+    message = decode_message(message)
+
+    if not isinstance(message, dict):
+        ohlc = kraken_msg_v2_pb2.OHLC()
+
+        ohlc.frequency = _convert_ohlc_type_to_frequency(message[2])
+        ohlc.pair = message[3]
+        ohlc.begin = _to_epoch_ns(message[1][0])
+        ohlc.end = _to_epoch_ns(message[1][1])
+        ohlc.open = float(message[1][2])
+        ohlc.high = float(message[1][3])
+        ohlc.low = float(message[1][4])
+        ohlc.close = float(message[1][5])
+        ohlc.vwap = float(message[1][6])
+        ohlc.volume = float(message[1][7])
+        ohlc.trades = int(message[1][8])
+
+        topic = TOPICS[V2_TOPIC_PREFIX, "OHLC", ohlc.pair, ohlc.frequency]
 
         return topic, ohlc
 
@@ -145,124 +376,323 @@ def _convert_order_type_value(order_type: str) -> Optional[str]:
     return order_type_to_readable_value_map.get(order_type)
 
 
-def process_trade_message(message: str) -> Tuple[str, kraken_msg_pb2.Trade]:
+def _fill_trade(trade: kraken_msg_pb2.Trade, pair: str, record: list) -> None:
     """
-    Takes a message from the Kraken websocket and converts it to a
-    protobuf message.
+    Fills a protobuf trade message from a single Kraken trade record.
+
+    :param trade: The protobuf trade message
+    :param pair: Currency pair of the trade
+    :param record: Kraken trade record [price, volume, time, side, order type,
+    misc]
+    """
+
+    trade_time = datetime.fromtimestamp(float(record[2]))
 
-    :param message: The message received from the websocket
-    :return: A protobuf trade message
+    trade.pair = pair
+    trade.price = float(record[0])
+    trade.volume = float(record[1])
+    trade.time = trade_time.strftime("%Y-%m-%d %H:%M:%S")
+    trade.side = _convert_trade_side_value(record[3])
+    trade.order_type = _convert_order_type_value(record[4])
+    trade.misc = record[5]
+
+
+def _fill_trade_v2(trade: kraken_msg_v2_pb2.Trade, pair: str, record: list) -> None:
+    """
+    Fills a schema v2 protobuf trade message from a single Kraken trade record.
+
+    :param trade: The protobuf trade message
+    :param pair: Currency pair of the trade
+    :param record: Kraken trade record [price, volume, time, side, order type,
+    misc]
+    """
+
+    trade.pair = pair
+    trade.price = float(record[0])
+    trade.volume = float(record[1])
+    trade.time = _to_epoch_ns(record[2])
+    trade.side = _convert_trade_side_value(record[3])
+    trade.order_type = _convert_order_type_value(record[4])
+    trade.misc = record[5]
+
+
+def _build_trades(
+    pair: str,
+    records: list,
+    single: bool,
+    batch: bool,
+    schema: ModuleType,
+    fill_trade: Callable,
+    topic_prefix: str,
+) -> List[Tuple[bytes, Message]]:
+    """
+    Converts Kraken trade records to protobuf trade and trade batch messages
+    of a schema version.
+    """
+
+    processed_messages = []
+
+    if batch:
+        trade_batch = schema.TradeBatch()
+        trade_batch.pair = pair
+
+        for record in records:
+            fill_trade(trade_batch.trades.add(), pair, record)
+
+        # single trades reuse the trade messages of the batch
+        trades = trade_batch.trades
+        processed_messages.append(
+            (TOPICS[topic_prefix, "TradeBatch", pair, ""], trade_batch)
+        )
+    else:
+        trades = []
+
+        for record in records:
+            trade = schema.Trade()
+            fill_trade(trade, pair, record)
+            trades.append(trade)
+
+    if single:
+        topic = TOPICS[topic_prefix, "Trade", pair, ""]
+        processed_messages.extend((topic, trade) for trade in trades)
+
+    return processed_messages
+
+
+def process_trade_message(
+    message: RawMessage, single: bool = True, batch: bool = False
+) -> List[Tuple[bytes, Message]]:
+    """
+    Takes a message from the Kraken websocket and converts every trade in it
+    to a protobuf message. Kraken packs several trades into one message during
+    bursts.
+
+    :param message: The message received from the websocket, raw or decoded
+    :param single: Whether to return one protobuf trade message per trade
+    :param batch: Whether to return a single protobuf trade batch message with
+    all trades of the Kraken message
+    :return: (topic, protobuf message) tuples of trades and trade batches
     """
 
-    message = json.loads(message)
+    message = decode_message(message)
 
     if not isinstance(message, dict):
-        trade_time = datetime.fromtimestamp(float(message[1][0][2]))
+        return _build_trades(
+            message[3], message[1], single, batch, kraken_msg_pb2, _fill_trade, ""
+        )
 
-        trade = kraken_msg_pb2.Trade()
+    return []
 
-        trade.pair = message[3]
-        trade.price = float(message[1][0][0])
-        trade.volume = float(message[1][0][1])
-        trade.time = trade_time.strftime("%Y-%m-%d %H:%M:%S")
-        trade.side = _convert_trade_side_value(message[1][0][3])
-        trade.order_type = _convert_order_type_value(message[1][0][4])
-        trade.misc = message[1][0][5]
 
-        topic = f"Trade - XBT/USD"
+def process_trade_message_v2(
+    message: RawMessage, single: bool = True, batch: bool = False
+) -> List[Tuple[bytes, Message]]:
+    """
+    Schema v2 counterpart of process_trade_message().
 
-        return topic, trade
+    :param message: The message received from the websocket, raw or decoded
+    :param single: Whether to return one protobuf trade message per trade
+    :param batch: Whether to return a single protobuf trade batch message with
+    all trades of the Kraken message
+    :return: (topic, protobuf message) tuples of trades and trade batches
+    """
 
-    return None, None
+    message = decode_message(message)
+
+    if not isinstance(message, dict):
+        return _build_trades(
+            message[3],
+            message[1],
+            single,
+            batch,
+            kraken_msg_v2_pb2,
+            _fill_trade_v2,
+            V2_TOPIC_PREFIX,
+        )
+
+    return []
+
+
+def _add_book_levels(levels, records: list) -> None:
+    """
+    Appends Kraken price level records or (price, volume) tuples to a
+    repeated BookLevel field.
+
+    :param levels: Repeated BookLevel field of a protobuf message
+    :param records: Records with price and volume strings as first two items
+    """
+
+    for record in records:
+        level = levels.add()
+        level.price = float(record[0])
+        level.volume = float(record[1])
 
 
-def print_book_message(message, pairs):
+def build_book_snapshot(
+    order_book: OrderBook, schema: ModuleType = kraken_msg_pb2
+) -> Message:
     """
-    Function prints Order book feed for a currency pair from Kraken WebSockets
-    API in a human-readable format.It takes one argument, which is the JSON
-    string that was sent by the server.The function then parses through it and
-    prints out all of its contents.
+    Converts a maintained order book to a protobuf message.
 
-    Args:
-        message: Pass the message to the function.
+    :param order_book: The order book
+    :param schema: Protobuf module of the schema version, kraken_msg_pb2 or
+    kraken_msg_v2_pb2
+    :return: A protobuf book snapshot message
     """
 
-    message = json.loads(message)
-    order_book = {}
-    for pair in pairs:
-        order_book[pair] = {"bid": {}, "ask": {}}
+    snapshot = schema.BookSnapshot()
+
+    snapshot.pair = order_book.pair
+    snapshot.sequence = order_book.sequence
+    _add_book_levels(snapshot.bids, order_book.bids.levels())
+    _add_book_levels(snapshot.asks, order_book.asks.levels())
+
+    return snapshot
+
+
+def process_book_message(
+    message: RawMessage,
+    order_books: Dict[str, OrderBook],
+    snapshot_interval: float = 10.0,
+    versions: Sequence[int] = (1,),
+) -> List[Tuple[bytes, Message]]:
+    """
+    Takes a message from the Kraken websocket, applies it to the maintained
+    order book of its pair and converts the changes to a protobuf delta
+    message. A full snapshot message is added when the book was (re)synced,
+    or with the first update after `snapshot_interval` seconds passed since
+    the last snapshot of the pair. Books without updates get their periodic
+    snapshots from a BookSnapshotTimer.
+
+    :param message: The message received from the websocket, raw or decoded
+    :param order_books: Order books maintained so far, by pair. Books of new
+    pairs are added with the depth taken from the channel name, e.g. "book-10"
+    :param snapshot_interval: Seconds between snapshots of a pair
+    :param versions: Schema versions to build the protobuf messages in, the
+    book is updated only once for all of them
+    :return: (topic, protobuf message) tuples of book deltas and snapshots
+    :raises ChecksumMismatchError: If the book doesn't match the checksum of
+    the message, the book has to be resubscribed
+    """
+
+    message = decode_message(message)
 
     if not isinstance(message, dict):
-        data = message[1]
         pair = message[-1]
 
-        if "as" in data or "bs" in data:
-            ask, bid = {}, {}
+        order_book = order_books.get(pair)
+        if order_book is None:
+            depth = int(message[-2].split("-")[1])
+            order_book = order_books[pair] = OrderBook(pair, depth)
 
-            # construct new ask and bid for our orderbook that we maintain
-            for record in data["as"]:
-                ask[record[0]] = {"volume": record[1]}
+        # updates may carry asks and bids in two separate dicts, the checksum
+        # is in the last one
+        for data in message[1:-2]:
+            order_book.apply(data)
 
-            for record in data["bs"]:
-                bid[record[0]] = {"volume": record[1]}
+        if not order_book.synced:
+            return []
 
-            order_book[pair]["ask"] = ask
-            order_book[pair]["bid"] = bid
+        schemas = [SCHEMAS[version] for version in versions]
+        now = time.monotonic()
 
-        if "a" in data:
-            if pair not in order_book:
-                order_book[pair] = {"bid": {}, "ask": {}}
+        if "as" in message[1] or "bs" in message[1]:
+            order_book.snapshot_time = now
+            return [
+                (
+                    TOPICS[prefix, "BookSnapshot", pair, ""],
+                    build_book_snapshot(order_book, schema),
+                )
+                for schema, prefix in schemas
+            ]
 
-            for record in data["a"]:
-                # skip "republish" update messages
-                if len(record) == 4 and record[3] == "r":
-                    continue
+        checksum = message[-3].get("c")
+        if checksum is not None:
+            order_book.verify(checksum)
 
-                price = record[0]
-                volume = record[1]
+        order_book.sequence += 1
 
-                # if volume is 0, that means we need to delete the record
-                if int(float(volume)) == 0 and price in order_book[pair]["ask"]:
-                    del order_book[pair]["ask"][price]
+        processed_messages = []
+        for schema, prefix in schemas:
+            delta = schema.BookDelta()
 
-                if not order_book[pair]["ask"].get(price):
-                    # insert new record and remove the last one out of scope
-                    prices_sorted = sorted(order_book[pair]["ask"].keys())
-                    if prices_sorted:
-                        min_price = prices_sorted[-1]
-                        del order_book[pair]["ask"][min_price]
+            delta.pair = pair
+            delta.sequence = order_book.sequence
+            for data in message[1:-2]:
+                _add_book_levels(delta.bids, data.get("b", []))
+                _add_book_levels(delta.asks, data.get("a", []))
 
-                    order_book[pair]["ask"][price] = {"volume": volume}
-                else:
-                    # update the existing record
-                    order_book[pair]["ask"][price]["volume"] = volume
+            processed_messages.append((TOPICS[prefix, "BookDelta", pair, ""], delta))
 
-        if "b" in data:
-            if pair not in order_book:
-                order_book[pair] = {"bid": {}, "ask": {}}
+        if now - order_book.snapshot_time >= snapshot_interval:
+            order_book.snapshot_time = now
+            processed_messages.extend(
+                (
+                    TOPICS[prefix, "BookSnapshot", pair, ""],
+                    build_book_snapshot(order_book, schema),
+                )
+                for schema, prefix in schemas
+            )
 
-            for record in data["b"]:
-                # skip "republish" update messages
-                if len(record) == 4 and record[3] == "r":
-                    continue
+        return processed_messages
 
-                price = record[0]
-                volume = record[1]
+    return []
 
-                # if volume is 0, that means we need to delete the record
-                if int(float(volume)) == 0 and price in order_book[pair]["bid"]:
-                    del order_book[pair]["bid"][price]
 
-                if not order_book[pair]["bid"].get(price):
-                    # insert new record and remove the last one out of scope
-                    prices_sorted = sorted(order_book[pair]["bid"].keys())
-                    if prices_sorted:
-                        min_price = prices_sorted[-1]
-                        del order_book[pair]["bid"][min_price]
+class BookSnapshotTimer:
+    """
+    Periodic snapshots of the order books of a single websocket connection,
+    including books without updates, which process_book_message() publishes
+    no snapshots for. Checked with every frame of the connection, Kraken sends
+    heartbeats on idle connections.
 
-                    order_book[pair]["bid"][price] = {"volume": volume}
-                else:
-                    # update the existing record
-                    order_book[pair]["bid"][price]["volume"] = volume
+    :param snapshot_interval: Seconds between snapshots of a pair
+    :param versions: Schema versions to build the protobuf messages in
+    """
 
-    print(order_book)
+    def __init__(self, snapshot_interval: float = 10.0, versions: Sequence[int] = (1,)):
+        self.snapshot_interval = snapshot_interval
+        self.versions = versions
+
+        # order books of the connection by pair, maintained by
+        # process_book_message()
+        self.order_books: Dict[str, OrderBook] = {}
+        # earliest time a snapshot can be due
+        self._next_check = 0.0
+
+    def due(self, now: Optional[float] = None) -> List[Tuple[bytes, Message]]:
+        """
+        :param now: time.monotonic() time, now by default
+        :return: (topic, protobuf message) tuples of the snapshots of all
+        synced books without a snapshot for `snapshot_interval` seconds
+        """
+
+        if now is None:
+            now = time.monotonic()
+
+        if now < self._next_check:
+            return []
+
+        schemas = [SCHEMAS[version] for version in self.versions]
+        processed_messages = []
+        self._next_check = now + self.snapshot_interval
+
+        for pair, order_book in self.order_books.items():
+            if not order_book.synced:
+                continue
+
+            if now - order_book.snapshot_time >= self.snapshot_interval:
+                order_book.snapshot_time = now
+                processed_messages.extend(
+                    (
+                        TOPICS[prefix, "BookSnapshot", pair, ""],
+                        build_book_snapshot(order_book, schema),
+                    )
+                    for schema, prefix in schemas
+                )
+
+            self._next_check = min(
+                self._next_check, order_book.snapshot_time + self.snapshot_interval
+            )
+
+        return processed_messages
@@ -0,0 +1,147 @@
+"""
+Replays captured raw Kraken frames through the message processors and the
+same PUSH -> PULL -> PUB topology as main.py, so consumers like subscriber.py
+can't tell a replay from the live feed.
+
+Frames are read from a capture directory (see capture.py) or from a JSON
+lines file with {"received_ns": ..., "frame": ...} objects, as exported by
+`python -m capture`.
+
+    python replay.py tape                # real time
+    python replay.py tape --speed 10     # 10x accelerated
+    python replay.py frames.jsonl --speed 0  # as fast as possible
+"""
+
+import argparse
+import glob
+import heapq
+import json
+import logging
+import os
+import threading
+import time
+from typing import Iterator, Tuple
+
+import zmq
+
+import settings
+from book import ChecksumMismatchError
+from capture import CaptureReader
+from data import _channel_processors, _process_message, _push_socket
+
+
+def read_frames(path: str) -> Iterator[Tuple[int, str]]:
+    """
+    :param path: Capture directory or JSON lines file.
+    :return: (received_ns, frame) tuples ordered by receive time.
+    """
+
+    if not os.path.isdir(path):
+        with open(path) as file:
+            for line in file:
+                record = json.loads(line)
+                yield record["received_ns"], record["frame"]
+        return
+
+    # every worker process captures to its own segments, merge them
+    prefixes = {
+        os.path.basename(segment).rsplit("-", 1)[0]
+        for segment in glob.glob(os.path.join(path, "*-*.seg"))
+    }
+
+    yield from heapq.merge(
+        *[CaptureReader(path, prefix).read() for prefix in sorted(prefixes)],
+        key=lambda record: record[0],
+    )
+
+
+def replay(
+    frames: Iterator[Tuple[int, str]], zmq_context: zmq.Context, speed: float = 1.0
+) -> int:
+    """
+    Processes captured frames and pushes the messages to the PULL socket at
+    settings.ZMQ_PUSH_PULL_IPC_URL, paced by their receive times.
+
+    :param frames: (received_ns, frame) tuples ordered by receive time.
+    :param zmq_context: ZeroMQ Context shared with the PULL/PUB proxy.
+    :param speed: 1 replays in real time, N is N times faster, 0 replays as
+    fast as possible.
+    :return: Number of messages pushed.
+    """
+
+    zmq_push_socket = _push_socket(zmq_context)
+
+    processors = _channel_processors()
+    first_received_ns = None
+    started_ns = time.perf_counter_ns()
+    pushed = 0
+
+    for received_ns, frame in frames:
+        if speed > 0:
+            if first_received_ns is None:
+                first_received_ns = received_ns
+
+            delay_ns = (
+                started_ns
+                + (received_ns - first_received_ns) / speed
+                - time.perf_counter_ns()
+            )
+            if delay_ns > 0:
+                time.sleep(delay_ns / 1e9)
+
+        try:
+            processed_messages = _process_message(frame, processors)
+        except ChecksumMismatchError as error:
+            # the book is synced again by the next captured snapshot
+            logging.warning(error)
+            continue
+
+        for topic, processed_message in processed_messages:
+            zmq_push_socket.send_multipart(
+                [
+                    topic,
+                    processed_message.SerializeToString(),
+                ],
+            )
+            pushed += 1
+
+    zmq_push_socket.close(linger=-1)
+
+    return pushed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("path", help="capture directory or JSON lines file")
+    parser.add_argument(
+        "--speed",
+        type=float,
+        default=1.0,
+        help="1: real time, N: N times faster, 0: as fast as possible",
+    )
+    args = parser.parse_args()
+
+    # create ZeroMQ Context which will be shared by all threads
+    zmq_context = zmq.Context()
+
+    # create ZeroMQ PULL and PUB Sockets exactly like main.py does
+    zmq_pull_socket = zmq_context.socket(zmq.PULL)
+    zmq_pull_socket.setsockopt(zmq.RCVHWM, settings.ZMQ_PULL_RCVHWM)
+    zmq_pull_socket.bind(settings.ZMQ_PUSH_PULL_IPC_URL)
+
+    zmq_pub_socket = zmq_context.socket(zmq.PUB)
+    zmq_pub_socket.setsockopt(zmq.SNDHWM, settings.ZMQ_PUB_SNDHWM)
+    zmq_pub_socket.bind(settings.ZMQ_PUB_SOCKET_URL)
+
+    threading.Thread(
+        target=zmq.proxy, args=(zmq_pull_socket, zmq_pub_socket), daemon=True
+    ).start()
+
+    started = time.perf_counter()
+    pushed = replay(read_frames(args.path), zmq_context, args.speed)
+    elapsed = time.perf_counter() - started
+
+    print(f"Replayed {pushed} messages in {elapsed:.1f}s")
+
+    # give the proxy time to forward the last messages
+    time.sleep(1)
@@ -1,2 +1,135 @@
+import os
+
 ZMQ_PUSH_PULL_IPC_URL = "ipc://kraken_streaming_threads"
 ZMQ_PUB_SOCKET_URL = "tcp://*:5555"
+
+# Kraken websocket API url, can be pointed at a local stand-in server like
+# benchmarks/fake_kraken.py for load tests
+KRAKEN_WS_URL = os.environ.get("KRAKEN_WS_URL", "wss://ws.kraken.com/")
+
+# Logging configuration of main.py and its worker processes
+LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO")
+LOG_FORMAT = "%(asctime)s %(levelname)s %(processName)s %(message)s"
+
+# Currency pairs streamed by main.py
+KRAKEN_PAIRS = ["XBT/USD"]
+# Kraken OHLC intervals in minutes streamed by main.py, any of 1, 5, 15, 30,
+# 60, 240, 1440, 10080 and 21600, all over the same connection
+KRAKEN_OHLC_INTERVALS = [1, 60, 1440]
+# Kraken channels streamed by main.py, as Kraken subscription objects
+KRAKEN_SUBSCRIPTIONS = [
+    {"name": "trade"},
+    *[{"name": "ohlc", "interval": interval} for interval in KRAKEN_OHLC_INTERVALS],
+    {"name": "ticker"},
+    {"name": "spread"},
+    {"name": "book", "depth": 10},
+]
+# Number of websocket connections the pairs are spread across, every
+# connection multiplexes all KRAKEN_SUBSCRIPTIONS for its share of pairs
+KRAKEN_WS_CONNECTIONS = 1
+# Seconds between websocket pings, a connection without a pong within
+# KRAKEN_WS_PING_TIMEOUT seconds is closed and reconnected
+KRAKEN_WS_PING_INTERVAL = 10
+KRAKEN_WS_PING_TIMEOUT = 5
+# Backoff between reconnects: the n-th failed attempt in a row waits a random
+# time up to min(RECONNECT_BASE_DELAY * 2^n, RECONNECT_MAX_DELAY) seconds
+RECONNECT_BASE_DELAY = 1.0
+RECONNECT_MAX_DELAY = 60.0
+# Default run mode of main.py: "threaded" or "asyncio"
+RUN_MODE = "threaded"
+# Seconds between full order book snapshots of a pair, book deltas are
+# published on every update. Snapshots are published with the first update or,
+# for quiet books, any other frame of the connection after the interval, see
+# messages.BookSnapshotTimer
+BOOK_SNAPSHOT_INTERVAL = 10.0
+# Trade messages published for every Kraken trade message: "single" publishes
+# a Trade per trade, "batch" a single TradeBatch with all trades, add "batch"
+# to publish both
+TRADE_PUBLISH_MODES = ["single"]
+# Kraken channels whose frames are published unparsed on raw topics, e.g.
+# "Raw - book-1000 - XBT/USD", by channel name: "raw" skips the protobuf
+# conversion, "both" also publishes the protobuf topics, e.g. {"book": "raw"}.
+# Raw-only trade frames get no trade gap events, see feed_status.py
+RAW_CHANNELS = {}
+# Protobuf schema versions published side by side during the migration to
+# v2, v2 topics are prefixed with "v2 - "
+SCHEMA_VERSIONS = [1, 2]
+# Number of worker processes the pairs are sharded across by main.py, 0 runs
+# all websocket connections in the main process
+WORKERS = 0
+# Directory raw Kraken frames are captured to by main.py, None disables the
+# capture, see capture.py
+CAPTURE_DIRECTORY = None
+# Size after which a new capture segment file is started
+CAPTURE_SEGMENT_BYTES = 256 * 1024 * 1024
+# Uncompressed size after which a block of captured frames is written
+CAPTURE_BLOCK_BYTES = 1024 * 1024
+# Maximum seconds a captured frame waits before it is written
+CAPTURE_FLUSH_INTERVAL = 1.0
+# Whether blocks of captured frames are zlib compressed
+CAPTURE_COMPRESSION = True
+# Whether main.py records per-stage latency histograms, see stats.py
+STATS_ENABLED = False
+# Seconds between the latency log lines
+STATS_LOG_INTERVAL = 60.0
+# Local ZeroMQ REP endpoint answering any request with the latency histograms
+# summary as JSON
+ZMQ_STATS_URL = "tcp://127.0.0.1:5556"
+# Seconds between the latency summaries worker processes push to main.py,
+# which serves them at ZMQ_STATS_URL
+STATS_FORWARD_INTERVAL = 1.0
+# Topic the worker summaries are pushed on, consumed by the proxy of main.py
+# and never published
+STATS_FORWARD_TOPIC = "Stats"
+# Seconds between publishes of the conflated topics, None disables the
+# conflation, see conflation.py
+CONFLATION_INTERVAL = None
+# Kraken channels whose messages are also published on conflated topics
+CONFLATED_CHANNELS = ["ticker", "spread"]
+# Prefix of the conflated topics, e.g. "Conflated - Ticker - XBT/USD"
+CONFLATED_TOPIC_PREFIX = "Conflated - "
+# High-water marks (queued messages) of the PUSH sockets of the stream
+# threads, the PULL socket and the PUB socket, 0 is unlimited
+ZMQ_PUSH_SNDHWM = 1000
+ZMQ_PULL_RCVHWM = 1000
+ZMQ_PUB_SNDHWM = 1000
+# What stream threads do with a message when their PUSH socket reached its
+# high-water mark: "block" waits (and delays reading from Kraken),
+# "drop-newest" drops the message, "drop-by-priority" drops it unless it's one
+# of PRIORITY_MESSAGES, which wait
+DROP_POLICY = "block"
+# Messages never dropped by the "drop-by-priority" policy, by topic name
+PRIORITY_MESSAGES = ["Trade", "TradeBatch", "BookSnapshot", "BookDelta", "FeedStatus"]
+# Whether main.py serves the latest messages to late-joining subscribers, see
+# last_value_cache.py
+LAST_VALUE_CACHE_ENABLED = False
+# In-process PUB socket the proxy copies every message to, for the
+# last-value cache and the historical sink
+ZMQ_PROXY_CAPTURE_URL = "inproc://proxy_capture"
+# ROUTER socket serving snapshots of the last-value cache
+ZMQ_SNAPSHOT_SOCKET_URL = "tcp://*:5557"
+# Whether main.py closes and reconnects stale websocket connections, see
+# health.py
+WATCHDOG_ENABLED = False
+# Seconds without any frame, including Kraken's heartbeats, after which a
+# connection is stale
+WATCHDOG_CONNECTION_TIMEOUT = 5.0
+# Seconds without a frame after which a pair/channel is stale, by Kraken
+# channel name, e.g. {"book": 60.0}, channels of quiet markets like trade are
+# best left out
+WATCHDOG_CHANNEL_TIMEOUTS = {}
+# Seconds between the staleness checks
+WATCHDOG_CHECK_INTERVAL = 1.0
+# Intervals of the bars aggregated locally from the trade stream, e.g.
+# ["1s", "5s", "15s", "5m", "15m"], empty disables the aggregation, see
+# candles.py
+CANDLE_INTERVALS = []
+# Seconds after the end of a local bar before it is closed and published
+CANDLE_CLOSE_DELAY = 0.25
+# Directory trades, spreads and closed OHLC bars are stored to by main.py,
+# None disables the historical sink, see sink.py
+SINK_DIRECTORY = None
+# Buffered rows after which the historical sink writes to its files
+SINK_BATCH_ROWS = 10000
+# Maximum seconds a row is buffered by the historical sink
+SINK_FLUSH_INTERVAL = 1.0
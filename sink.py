@@ -0,0 +1,398 @@
+"""
+Columnar historical sink. Fed with a copy of every published message by the
+proxy, it appends trades, spreads and closed OHLC bars (schema v2 messages)
+to one file per column, partitioned by pair and UTC day:
+
+    <directory>/trades/XBT-USD/2022-09-29/price.bin
+    <directory>/ohlc/Minutely/XBT-USD/2022-09-29/close.bin
+
+Column files are raw little-endian arrays, appended in batches, so a day of a
+pair is loaded by memory-mapping its columns into NumPy arrays, see read().
+
+Kraken sends updates of the current OHLC bar, a bar is written once an update
+of the next bar arrives. Bars aggregated locally (see candles.py) are written
+right away.
+"""
+
+import argparse
+import logging
+import os
+import time
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import zmq
+
+import kraken_msg_v2_pb2
+import settings
+from candles import interval_ns
+from messages import V2_TOPIC_PREFIX
+
+# Column dtypes by table
+TABLES = {
+    "trades": {
+        "time": "<i8",
+        "price": "<f8",
+        "volume": "<f8",
+        # 0: Buy, 1: Sell
+        "side": "u1",
+        # 0: Market, 1: Limit
+        "order_type": "u1",
+    },
+    "spreads": {
+        "time": "<i8",
+        "bid": "<f8",
+        "ask": "<f8",
+        "bid_volume": "<f8",
+        "ask_volume": "<f8",
+    },
+    "ohlc": {
+        "begin": "<i8",
+        "end": "<i8",
+        "open": "<f8",
+        "high": "<f8",
+        "low": "<f8",
+        "close": "<f8",
+        "vwap": "<f8",
+        "volume": "<f8",
+        "trades": "<i4",
+    },
+}
+
+_DAY_NS = 86400 * 10**9
+_SIDES = {"Buy": 0, "Sell": 1}
+_ORDER_TYPES = {"Market": 0, "Limit": 1}
+
+
+def _partition_directory(
+    directory: str, table: str, pair: str, day: str, frequency: Optional[str] = None
+) -> str:
+    """
+    :return: Directory of the column files of a table, pair and day.
+    """
+
+    parts = [directory, table]
+    if frequency is not None:
+        parts.append(frequency.replace(" ", "_"))
+    parts.extend([pair.replace("/", "-"), day])
+
+    return os.path.join(*parts)
+
+
+def _is_local_frequency(frequency: str) -> bool:
+    try:
+        interval_ns(frequency)
+    except ValueError:
+        return False
+
+    return True
+
+
+class ColumnarSink:
+    """
+    Buffers rows by partition and appends them to the column files once
+    `batch_rows` rows are buffered or `flush_interval` seconds passed. Owned
+    by a single thread, see serve().
+
+    :param directory: Root directory of the tables.
+    :param batch_rows: Buffered rows after which all partitions are flushed.
+    :param flush_interval: Maximum seconds a row is buffered.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        batch_rows: int = settings.SINK_BATCH_ROWS,
+        flush_interval: float = settings.SINK_FLUSH_INTERVAL,
+    ):
+        self.directory = directory
+        self.batch_rows = batch_rows
+        self.flush_interval = flush_interval
+
+        # buffered rows by partition (table, pair, day, frequency)
+        self._buffers: Dict[Tuple[str, str, str, Optional[str]], List[tuple]] = {}
+        self._buffered = 0
+        self._flushed_at = time.monotonic()
+        # latest update of the current Kraken OHLC bar by topic
+        self._open_bars: Dict[bytes, kraken_msg_v2_pb2.OHLC] = {}
+        # formatted UTC days by days since the epoch
+        self._days: Dict[int, str] = {}
+
+        self._trade = kraken_msg_v2_pb2.Trade()
+        self._trade_batch = kraken_msg_v2_pb2.TradeBatch()
+        self._spread = kraken_msg_v2_pb2.Spread()
+
+    def _day(self, time_ns: int) -> str:
+        day = time_ns // _DAY_NS
+        formatted = self._days.get(day)
+        if formatted is None:
+            formatted = self._days[day] = (
+                date(1970, 1, 1) + timedelta(days=day)
+            ).isoformat()
+
+        return formatted
+
+    def _add(
+        self, table: str, pair: str, time_ns: int, row: tuple, frequency=None
+    ) -> None:
+        partition = (table, pair, self._day(time_ns), frequency)
+
+        buffer = self._buffers.get(partition)
+        if buffer is None:
+            buffer = self._buffers[partition] = []
+
+        buffer.append(row)
+        self._buffered += 1
+
+    def _add_trade(self, trade: kraken_msg_v2_pb2.Trade) -> None:
+        self._add(
+            "trades",
+            trade.pair,
+            trade.time,
+            (
+                trade.time,
+                trade.price,
+                trade.volume,
+                _SIDES.get(trade.side, 0),
+                _ORDER_TYPES.get(trade.order_type, 0),
+            ),
+        )
+
+    def _add_ohlc(self, ohlc: kraken_msg_v2_pb2.OHLC) -> None:
+        self._add(
+            "ohlc",
+            ohlc.pair,
+            ohlc.end - 1,
+            (
+                ohlc.begin,
+                ohlc.end,
+                ohlc.open,
+                ohlc.high,
+                ohlc.low,
+                ohlc.close,
+                ohlc.vwap,
+                ohlc.volume,
+                ohlc.trades,
+            ),
+            ohlc.frequency,
+        )
+
+    def handle(self, topic: bytes, payload: bytes) -> None:
+        """
+        Buffers the rows of a published schema v2 message, other messages are
+        ignored.
+        """
+
+        if topic.startswith(b"v2 - Trade - "):
+            self._trade.ParseFromString(payload)
+            self._add_trade(self._trade)
+
+        elif topic.startswith(b"v2 - TradeBatch - "):
+            self._trade_batch.ParseFromString(payload)
+            for trade in self._trade_batch.trades:
+                self._add_trade(trade)
+
+        elif topic.startswith(b"v2 - Spread - "):
+            spread = self._spread
+            spread.ParseFromString(payload)
+            self._add(
+                "spreads",
+                spread.pair,
+                spread.time,
+                (
+                    spread.time,
+                    spread.bid,
+                    spread.ask,
+                    spread.bid_volume,
+                    spread.ask_volume,
+                ),
+            )
+
+        elif topic.startswith(b"v2 - OHLC - "):
+            ohlc = kraken_msg_v2_pb2.OHLC.FromString(payload)
+
+            if _is_local_frequency(ohlc.frequency):
+                self._add_ohlc(ohlc)
+                return
+
+            open_bar = self._open_bars.get(topic)
+            if open_bar is not None and open_bar.end != ohlc.end:
+                self._add_ohlc(open_bar)
+            self._open_bars[topic] = ohlc
+
+    def flush(self) -> None:
+        """
+        Appends all buffered rows to their column files.
+        """
+
+        for (table, pair, day, frequency), rows in self._buffers.items():
+            path = _partition_directory(self.directory, table, pair, day, frequency)
+            os.makedirs(path, exist_ok=True)
+
+            for column, values in zip(TABLES[table].items(), zip(*rows)):
+                name, dtype = column
+                with open(os.path.join(path, f"{name}.bin"), "ab") as file:
+                    np.array(values, dtype=dtype).tofile(file)
+
+        self._buffers = {}
+        self._buffered = 0
+        self._flushed_at = time.monotonic()
+
+    def maybe_flush(self) -> None:
+        """
+        Flushes if enough rows are buffered or the flush interval passed.
+        """
+
+        if self._buffered and (
+            self._buffered >= self.batch_rows
+            or time.monotonic() - self._flushed_at >= self.flush_interval
+        ):
+            try:
+                self.flush()
+            except OSError as error:
+                logging.error(f"Historical sink flush failed: {error}")
+
+    def serve(
+        self,
+        zmq_context: zmq.Context,
+        capture_url: str = settings.ZMQ_PROXY_CAPTURE_URL,
+    ):
+        """
+        Buffers and writes messages copied by the proxy. Blocks forever, run
+        it in a thread.
+
+        :param zmq_context: ZeroMQ Context shared with the proxy.
+        :param capture_url: Url of the capture PUB socket of the proxy.
+        """
+
+        # no high-water mark on either side of the inproc pipe, a lagging sink
+        # queues messages instead of losing history
+        zmq_sub_socket = zmq_context.socket(zmq.SUB)
+        zmq_sub_socket.setsockopt(zmq.RCVHWM, 0)
+        for name in ["Trade - ", "Spread - ", "OHLC - "]:
+            zmq_sub_socket.setsockopt(
+                zmq.SUBSCRIBE, f"{V2_TOPIC_PREFIX}{name}".encode()
+            )
+        # single trades are stored from batches if those are published
+        if "batch" in settings.TRADE_PUBLISH_MODES:
+            zmq_sub_socket.setsockopt(
+                zmq.UNSUBSCRIBE, f"{V2_TOPIC_PREFIX}Trade - ".encode()
+            )
+            zmq_sub_socket.setsockopt(
+                zmq.SUBSCRIBE, f"{V2_TOPIC_PREFIX}TradeBatch - ".encode()
+            )
+        zmq_sub_socket.connect(capture_url)
+
+        if 2 not in settings.SCHEMA_VERSIONS:
+            logging.warning("Historical sink stores schema v2 messages only")
+
+        while True:
+            if zmq_sub_socket.poll(int(self.flush_interval * 1000)):
+                topic, payload = zmq_sub_socket.recv_multipart()
+                self.handle(topic, payload)
+
+            self.maybe_flush()
+
+
+def read(
+    directory: str,
+    table: str,
+    pair: str,
+    start_day: str,
+    end_day: Optional[str] = None,
+    frequency: Optional[str] = None,
+) -> Dict[str, np.ndarray]:
+    """
+    Loads the columns of a table and pair for a range of UTC days. A single
+    day is memory-mapped without copying, several days are concatenated.
+
+    :param directory: Root directory of the tables.
+    :param table: "trades", "spreads" or "ohlc".
+    :param pair: Currency pair, e.g. "XBT/USD".
+    :param start_day: First day, e.g. "2022-09-29".
+    :param end_day: Last day (inclusive), start_day by default.
+    :param frequency: OHLC frequency, e.g. "Minutely" or "5s", for "ohlc".
+    :return: NumPy array by column name.
+    """
+
+    first = date.fromisoformat(start_day)
+    last = date.fromisoformat(end_day or start_day)
+    days = []
+
+    for offset in range((last - first).days + 1):
+        path = _partition_directory(
+            directory,
+            table,
+            pair,
+            (first + timedelta(days=offset)).isoformat(),
+            frequency,
+        )
+        if not os.path.isdir(path):
+            continue
+
+        columns = {}
+        for name, dtype in TABLES[table].items():
+            file_path = os.path.join(path, f"{name}.bin")
+            if os.path.getsize(file_path) == 0:
+                columns[name] = np.empty(0, dtype=dtype)
+            else:
+                columns[name] = np.memmap(file_path, dtype=dtype, mode="r")
+
+        # a flush interrupted between column files leaves columns of different
+        # lengths, only complete rows are returned
+        rows = min(len(column) for column in columns.values())
+        days.append({name: column[:rows] for name, column in columns.items()})
+
+    if len(days) == 1:
+        return days[0]
+
+    return {
+        name: (
+            np.concatenate([day[name] for day in days])
+            if days
+            else np.empty(0, dtype=dtype)
+        )
+        for name, dtype in TABLES[table].items()
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Prints a summary of a stored table, pair and day range"
+    )
+    parser.add_argument("directory")
+    parser.add_argument("table", choices=list(TABLES))
+    parser.add_argument("pair")
+    parser.add_argument("start_day")
+    parser.add_argument("--end-day")
+    parser.add_argument("--frequency")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    columns = read(
+        args.directory,
+        args.table,
+        args.pair,
+        args.start_day,
+        args.end_day,
+        args.frequency,
+    )
+    elapsed = time.perf_counter() - started
+
+    rows = len(next(iter(columns.values())))
+    print(f"Loaded {rows} rows in {elapsed * 1000:.1f}ms")
+
+    time_column = "end" if args.table == "ohlc" else "time"
+    if rows:
+        for row in [0, rows - 1]:
+            print(
+                datetime.fromtimestamp(
+                    columns[time_column][row] / 1e9, timezone.utc
+                ).isoformat(),
+                {column: values[row].item() for column, values in columns.items()},
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,290 @@
+"""
+Optional latency instrumentation of the feed. Stage timings are recorded into
+HDR-style log-linear histograms per stage and channel/pair (or topic), and
+reported by a periodic log line and a local ZeroMQ REP stats endpoint.
+Worker processes push their summary through the stream pipeline to main.py,
+which logs and serves it next to its own.
+
+Stages, all in ns:
+- lag: exchange timestamp of trade, spread and OHLC frames to receive time
+- frame: handling of a whole websocket frame, receive to last PUSH send
+- decode, build, serialize, send: the steps of that handling
+- proxy: PUSH send to PUB send, recorded by LatencyStats.proxy()
+
+Event counters like data.DROPPED_MESSAGES are reported next to them, as
+stages with a count only.
+
+When disabled (stats=None everywhere) the only cost is an `is not None`
+check per step.
+"""
+
+import json
+import logging
+import threading
+import time
+from typing import Counter, Dict, Optional, Tuple
+
+import zmq
+
+import settings
+
+# Histogram precision: 2^SUB_BUCKET_BITS buckets per power of two, ~3%
+SUB_BUCKET_BITS = 5
+_SUB_BUCKETS = 1 << SUB_BUCKET_BITS
+_LINEAR_LIMIT = _SUB_BUCKETS << 1
+
+
+class Histogram:
+    """
+    Log-linear histogram of non-negative integer values, values below 64 are
+    counted exactly, larger ones with ~3% relative precision.
+    """
+
+    __slots__ = ("counts", "count", "max")
+
+    def __init__(self):
+        self.counts = [0] * _LINEAR_LIMIT
+        self.count = 0
+        self.max = 0
+
+    @staticmethod
+    def _index(value: int) -> int:
+        if value < _LINEAR_LIMIT:
+            return value
+
+        shift = value.bit_length() - SUB_BUCKET_BITS - 1
+
+        return (shift << SUB_BUCKET_BITS) + (value >> shift)
+
+    @staticmethod
+    def _value(index: int) -> int:
+        if index < _LINEAR_LIMIT:
+            return index
+
+        shift = (index >> SUB_BUCKET_BITS) - 1
+
+        return (index - (shift << SUB_BUCKET_BITS)) << shift
+
+    def record(self, value: int) -> None:
+        if value < 0:
+            value = 0
+
+        index = self._index(value)
+        counts = self.counts
+        if index >= len(counts):
+            counts.extend([0] * (index + 1 - len(counts)))
+
+        counts[index] += 1
+        self.count += 1
+        if value > self.max:
+            self.max = value
+
+    def percentile(self, percentile: float) -> int:
+        """
+        :param percentile: e.g. 99.9
+        :return: Lower bound of the bucket holding the percentile.
+        """
+
+        if not self.count:
+            return 0
+
+        rank = max(int(self.count * percentile / 100 + 0.5), 1)
+        seen = 0
+
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return self._value(index)
+
+        return self.max
+
+    def summary(self) -> dict:
+        return {
+            "count": self.count,
+            "p50": self.percentile(50),
+            "p99": self.percentile(99),
+            "p999": self.percentile(99.9),
+            "max": self.max,
+        }
+
+
+def exchange_time_ns(channel_name: str, message: list) -> Optional[int]:
+    """
+    :param channel_name: Channel name of the frame, e.g. "trade".
+    :param message: Decoded Kraken data frame.
+    :return: Exchange timestamp of trade (last trade), spread and OHLC frames
+    in ns since the epoch, None for other channels.
+    """
+
+    if channel_name == "trade":
+        timestamp = message[1][-1][2]
+    elif channel_name == "spread":
+        timestamp = message[1][2]
+    elif channel_name.startswith("ohlc"):
+        timestamp = message[1][0]
+    else:
+        return None
+
+    return int(float(timestamp) * 1e9)
+
+
+class LatencyStats:
+    """
+    Histograms by (stage, key), key is "<channel name>|<pair>" for websocket
+    stages and the topic for the proxy stage. Recording is not synchronized,
+    concurrent threads may rarely lose a count, which is fine for statistics.
+
+    :param counters: Event counters reported as count-only stages, by stage,
+    e.g. {"dropped": data.DROPPED_MESSAGES}, keyed by topic or pair.
+    """
+
+    def __init__(self, counters: Optional[Dict[str, Counter]] = None):
+        self.histograms: Dict[Tuple[str, str], Histogram] = {}
+        self.counters = counters or {}
+        # latest summaries pushed by worker processes, by key
+        self.forwarded: Dict[str, dict] = {}
+
+    def record(self, stage: str, key: str, value_ns: int) -> None:
+        histogram = self.histograms.get((stage, key))
+        if histogram is None:
+            histogram = self.histograms[(stage, key)] = Histogram()
+
+        histogram.record(value_ns)
+
+    def summary(self) -> dict:
+        """
+        :return: {key: {stage: {count, p50, p99, p999, max}}}, in ns,
+        including the keys forwarded by worker processes.
+        """
+
+        summary = dict(self.forwarded)
+        for (stage, key), histogram in sorted(self.histograms.items()):
+            summary.setdefault(key, {})[stage] = histogram.summary()
+
+        for stage, counter in self.counters.items():
+            # copied first, the counters are updated by the stream threads
+            for key, count in dict(counter).items():
+                if isinstance(key, bytes):
+                    key = key.decode()
+                summary.setdefault(key, {})[stage] = {"count": count}
+
+        return summary
+
+    def log_periodically(self, interval: float = settings.STATS_LOG_INTERVAL):
+        """
+        Logs p50/p99/p999 of every histogram in us, and the counters, every
+        `interval` seconds. Blocks forever, run it in a thread.
+        """
+
+        while True:
+            time.sleep(interval)
+
+            for key, stages in self.summary().items():
+                logging.info(
+                    f"latency {key}: "
+                    + ", ".join(
+                        (
+                            f"{stage} p50/p99/p999="
+                            f"{s['p50'] / 1e3:.1f}/{s['p99'] / 1e3:.1f}/"
+                            f"{s['p999'] / 1e3:.1f}us (n={s['count']})"
+                            if "p50" in s
+                            else f"{stage}={s['count']}"
+                        )
+                        for stage, s in stages.items()
+                    )
+                )
+
+    def serve(self, zmq_context: zmq.Context, url: str = settings.ZMQ_STATS_URL):
+        """
+        Answers every request on a ZeroMQ REP socket with the JSON summary.
+        Blocks forever, run it in a thread.
+        """
+
+        socket = zmq_context.socket(zmq.REP)
+        socket.bind(url)
+
+        while True:
+            socket.recv()
+            socket.send(json.dumps(self.summary()).encode())
+
+    def forward_periodically(
+        self,
+        zmq_context: zmq.Context,
+        interval: float = settings.STATS_FORWARD_INTERVAL,
+    ):
+        """
+        Pushes the summary of a worker process to the proxy of main.py every
+        `interval` seconds, see proxy(). Blocks forever, run it in a thread.
+        """
+
+        socket = zmq_context.socket(zmq.PUSH)
+        socket.connect(settings.ZMQ_PUSH_PULL_IPC_URL)
+        topic = settings.STATS_FORWARD_TOPIC.encode()
+
+        while True:
+            time.sleep(interval)
+
+            try:
+                socket.send_multipart(
+                    [topic, json.dumps(self.summary()).encode()], zmq.NOBLOCK
+                )
+            except zmq.Again:
+                # the next summary includes these counts anyway
+                pass
+
+    def start(self, zmq_context: Optional[zmq.Context] = None, forward: bool = False):
+        """
+        Starts the periodic log line and, given a ZeroMQ Context, the stats
+        endpoint in background threads. With `forward`, worker processes push
+        their summary to main.py instead.
+        """
+
+        if forward:
+            threading.Thread(
+                target=self.forward_periodically, args=(zmq_context,), daemon=True
+            ).start()
+            return
+
+        threading.Thread(target=self.log_periodically, daemon=True).start()
+
+        if zmq_context is not None:
+            threading.Thread(
+                target=self.serve, args=(zmq_context,), daemon=True
+            ).start()
+
+    def proxy(
+        self,
+        zmq_pull_socket: zmq.Socket,
+        zmq_pub_socket: zmq.Socket,
+        zmq_capture_socket: Optional[zmq.Socket] = None,
+    ):
+        """
+        Instrumented replacement of zmq.proxy(). Stream loops with stats
+        enabled push a third frame with their perf_counter_ns() send time,
+        which is stripped before publishing and recorded as proxy stage.
+        Summaries pushed by worker processes are kept and not published.
+        """
+
+        forward_topic = settings.STATS_FORWARD_TOPIC.encode()
+
+        while True:
+            frames = zmq_pull_socket.recv_multipart()
+
+            if frames[0] == forward_topic:
+                self.forwarded.update(json.loads(frames[1]))
+                continue
+
+            if len(frames) == 3:
+                topic, payload, sent_ns = frames
+                frames = [topic, payload]
+                zmq_pub_socket.send_multipart(frames)
+                self.record(
+                    "proxy",
+                    topic.decode(),
+                    time.perf_counter_ns() - int.from_bytes(sent_ns, "little"),
+                )
+            else:
+                zmq_pub_socket.send_multipart(frames)
+
+            if zmq_capture_socket is not None:
+                zmq_capture_socket.send_multipart(frames)
@@ -0,0 +1,188 @@
+import asyncio
+import logging
+import multiprocessing
+import os
+import time
+from typing import List, Optional
+
+import zmq
+
+import settings
+from async_data import run_streams_async
+from candles import CandleAggregator
+from capture import FrameCapture
+from conflation import Conflator
+from data import BOOK_RESYNCS, DROPPED_MESSAGES, _split_pairs, start_streams
+from health import Watchdog
+from stats import LatencyStats
+
+
+def run_worker(
+    pairs: List[str],
+    subscriptions: List[dict],
+    mode: str = settings.RUN_MODE,
+    connections: int = settings.KRAKEN_WS_CONNECTIONS,
+    url: str = settings.KRAKEN_WS_URL,
+    capture_directory: Optional[str] = None,
+    stats_enabled: bool = False,
+    conflation_interval: Optional[float] = None,
+    candle_intervals: Optional[List[str]] = None,
+    watchdog_enabled: bool = False,
+):
+    """
+    Entry point of a worker process. Streams all subscriptions for its share
+    of the currency pairs and pushes the messages to the PULL socket bound by
+    main.py at settings.ZMQ_PUSH_PULL_IPC_URL.
+
+    :param pairs: Currency pairs of the worker in "XXX/YYY" format.
+    :param subscriptions: Kraken subscription objects.
+    :param mode: "threaded" or "asyncio", see main.py.
+    :param connections: Maximum number of websocket connections of the worker.
+    :param url: Kraken websocket API url.
+    :param capture_directory: Directory raw frames are captured to, in
+    segment files of the worker, None disables the capture.
+    :param stats_enabled: Whether to record latency histograms, pushed to
+    main.py, which logs and serves them.
+    :param conflation_interval: Seconds between publishes of the conflated
+    topics, None disables the conflation.
+    :param candle_intervals: Intervals of the bars aggregated from the trades
+    of the worker, None disables the aggregation.
+    :param watchdog_enabled: Whether stale connections of the worker are
+    reconnected.
+    """
+
+    # spawned processes don't inherit the logging configuration of main.py
+    logging.basicConfig(level=settings.LOG_LEVEL, format=settings.LOG_FORMAT)
+
+    # every process needs its own ZeroMQ Context
+    zmq_context = zmq.Context()
+
+    capture = None
+    if capture_directory:
+        capture = FrameCapture(capture_directory, prefix=f"worker{os.getpid()}")
+
+    stats = None
+    if stats_enabled:
+        stats = LatencyStats(
+            {"dropped": DROPPED_MESSAGES, "book_resyncs": BOOK_RESYNCS}
+        )
+        stats.start(zmq_context, forward=True)
+
+    conflator = None
+    if conflation_interval:
+        conflator = Conflator(zmq_context, conflation_interval)
+
+    candles = None
+    if candle_intervals:
+        candles = CandleAggregator(zmq_context, candle_intervals)
+
+    watchdog = None
+    if watchdog_enabled:
+        watchdog = Watchdog(zmq_context)
+
+    if mode == "asyncio":
+        asyncio.run(
+            run_streams_async(
+                pairs,
+                subscriptions,
+                zmq_context,
+                connections,
+                url,
+                capture,
+                stats,
+                conflator,
+                candles,
+                watchdog,
+            )
+        )
+    else:
+        for thread in start_streams(
+            pairs,
+            subscriptions,
+            zmq_context,
+            connections,
+            url,
+            capture,
+            stats,
+            conflator,
+            candles,
+            watchdog,
+        ):
+            thread.join()
+
+
+def supervise(
+    pairs: List[str],
+    subscriptions: List[dict],
+    workers: int = settings.WORKERS,
+    mode: str = settings.RUN_MODE,
+    connections: int = settings.KRAKEN_WS_CONNECTIONS,
+    url: str = settings.KRAKEN_WS_URL,
+    capture_directory: Optional[str] = None,
+    stats_enabled: bool = False,
+    conflation_interval: Optional[float] = None,
+    candle_intervals: Optional[List[str]] = None,
+    watchdog_enabled: bool = False,
+    check_interval: float = 1.0,
+):
+    """
+    Splits the currency pairs across `workers` worker processes, each running
+    its own websocket connections, and restarts workers which died. Blocks
+    forever.
+
+    :param pairs: Currency pairs in "XXX/YYY" format.
+    :param subscriptions: Kraken subscription objects, streamed by every
+    worker for its share of the pairs.
+    :param workers: Maximum number of worker processes.
+    :param mode: "threaded" or "asyncio", see main.py.
+    :param connections: Maximum number of websocket connections per worker.
+    :param url: Kraken websocket API url.
+    :param capture_directory: Directory raw frames are captured to, every
+    worker writes its own segment files, None disables the capture.
+    :param stats_enabled: Whether workers record latency histograms.
+    :param conflation_interval: Seconds between publishes of the conflated
+    topics of every worker, None disables the conflation.
+    :param candle_intervals: Intervals of the bars every worker aggregates
+    from its trades, None disables the aggregation.
+    :param watchdog_enabled: Whether workers reconnect stale connections.
+    :param check_interval: Seconds between checks for dead workers.
+    """
+
+    # don't fork the ZeroMQ Context and threads of the supervisor
+    process_context = multiprocessing.get_context("spawn")
+
+    def start_worker(group: List[str]) -> multiprocessing.Process:
+        process = process_context.Process(
+            target=run_worker,
+            args=(
+                group,
+                subscriptions,
+                mode,
+                connections,
+                url,
+                capture_directory,
+                stats_enabled,
+                conflation_interval,
+                candle_intervals,
+                watchdog_enabled,
+            ),
+            daemon=True,
+        )
+        process.start()
+        logging.info(f"Started worker {process.pid} for pairs: {group}")
+
+        return process
+
+    groups = _split_pairs(pairs, workers)
+    processes = [start_worker(group) for group in groups]
+
+    while True:
+        time.sleep(check_interval)
+
+        for i, process in enumerate(processes):
+            if not process.is_alive():
+                logging.error(
+                    f"Worker {process.pid} exited with code {process.exitcode}, "
+                    f"restarting it"
+                )
+                processes[i] = start_worker(groups[i])
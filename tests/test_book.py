@@ -0,0 +1,93 @@
+import zlib
+
+import pytest
+
+from book import ChecksumMismatchError, OrderBook
+
+
+def test_order_book_snapshot():
+    # given
+    order_book = OrderBook("XBT/USD", depth=2)
+    snapshot = {
+        "as": [
+            ["19300.10000", "1.00000000", "1664479174.047114"],
+            ["9999.90000", "2.00000000", "1664479174.047114"],
+            ["19300.00000", "3.00000000", "1664479174.047114"],
+        ],
+        "bs": [
+            ["9000.00000", "1.00000000", "1664479174.047114"],
+            ["19299.90000", "2.00000000", "1664479174.047114"],
+            ["19299.80000", "3.00000000", "1664479174.047114"],
+        ],
+    }
+
+    # when
+    order_book.apply(snapshot)
+
+    # then
+    assert order_book.asks.levels() == [
+        ("9999.90000", "2.00000000"),
+        ("19300.00000", "3.00000000"),
+    ]
+    assert order_book.bids.levels() == [
+        ("19299.90000", "2.00000000"),
+        ("19299.80000", "3.00000000"),
+    ]
+
+
+def test_order_book_update():
+    # given
+    order_book = OrderBook("XBT/USD", depth=2)
+    order_book.apply(
+        {
+            "as": [["101.0", "1.0", "1"], ["102.0", "1.0", "1"]],
+            "bs": [["99.0", "1.0", "1"], ["98.0", "1.0", "1"]],
+        }
+    )
+
+    # when
+    order_book.apply({"a": [["101.0", "0.00000000", "2"], ["100.5", "2.0", "2"]]})
+    order_book.apply({"b": [["98.0", "5.0", "2", "r"], ["97.0", "1.0", "2"]]})
+
+    # then
+    assert order_book.asks.levels() == [("100.5", "2.0"), ("102.0", "1.0")]
+    assert order_book.bids.levels() == [("99.0", "1.0"), ("98.0", "5.0")]
+    assert order_book.bids.levels(limit=1) == [("99.0", "1.0")]
+
+
+def test_order_book_checksum():
+    # given
+    order_book = OrderBook("XBT/USD", depth=10)
+    order_book.apply(
+        {
+            "as": [["0.05005", "0.00000500", "1"], ["0.05010", "0.10000000", "1"]],
+            "bs": [["0.05000", "1.50000000", "1"]],
+        }
+    )
+    expected = zlib.crc32(b"5005500" + b"501010000000" + b"5000150000000")
+
+    # when
+    checksum = order_book.checksum()
+
+    # then
+    assert checksum == expected
+    order_book.verify(str(expected))
+    assert order_book.synced
+
+
+def test_order_book_checksum_mismatch():
+    # given
+    order_book = OrderBook("XBT/USD", depth=10)
+    order_book.apply({"as": [["101.0", "1.0", "1"]], "bs": [["99.0", "1.0", "1"]]})
+
+    # when
+    with pytest.raises(ChecksumMismatchError) as error:
+        order_book.verify("1")
+
+    # then
+    assert error.value.pair == "XBT/USD"
+    assert not order_book.synced
+
+    # updates are ignored until the next snapshot
+    order_book.apply({"a": [["100.0", "1.0", "2"]]})
+    assert order_book.asks.levels() == [("101.0", "1.0")]
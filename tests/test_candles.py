@@ -0,0 +1,53 @@
+import time
+
+import zmq
+
+from candles import CandleAggregator, interval_ns
+
+
+def test_interval_ns():
+    # then
+    assert interval_ns("5s") == 5 * 10**9
+    assert interval_ns("15m") == 900 * 10**9
+
+
+def test_candle_aggregator_builds_and_closes_bars():
+    # given
+    zmq_context = zmq.Context()
+    candles = CandleAggregator(zmq_context, ["1h"], close_delay=0)
+
+    hour_ns = interval_ns("1h")
+    begin_ns = time.time_ns() // hour_ns * hour_ns
+    trades = [("100.0", "1.0", 10), ("110.0", "1.0", 20), ("90.0", "2.0", 30)]
+    message = [
+        0,
+        [
+            [price, volume, f"{begin_ns // 10**9 + second}.000000", "b", "l", ""]
+            for price, volume, second in trades
+        ],
+        "trade",
+        "XBT/USD",
+    ]
+
+    # when
+    processed_messages = candles.process_trade_message(message)
+    closed = candles.close_bars(begin_ns + 2 * hour_ns)
+
+    # then
+    assert processed_messages == []
+    assert len(closed) == 2
+
+    topic, ohlc = CandleAggregator.build_messages(*closed[0])[-1]
+    assert topic == b"v2 - OHLC - XBT/USD - 1h"
+    assert ohlc.begin == begin_ns
+    assert (ohlc.open, ohlc.high, ohlc.low, ohlc.close) == (100.0, 110.0, 90.0, 90.0)
+    assert ohlc.volume == 4.0
+    assert ohlc.vwap == 97.5
+    assert ohlc.trades == 3
+
+    # the next hour had no trades
+    _, flat_ohlc = CandleAggregator.build_messages(*closed[1])[-1]
+    assert flat_ohlc.open == flat_ohlc.close == 90.0
+    assert flat_ohlc.trades == 0
+
+    zmq_context.destroy(linger=0)
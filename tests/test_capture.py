@@ -0,0 +1,33 @@
+import json
+
+from capture import CaptureReader, FrameCapture
+
+
+def _trade_frame(pair: str, price: str) -> str:
+    return json.dumps(
+        [337, [[price, "0.00100000", "1664479174.047114", "s", "m", ""]], "trade", pair]
+    )
+
+
+def test_capture_read(tmp_path):
+    # given
+    capture = FrameCapture(str(tmp_path), block_bytes=200, segment_bytes=400)
+    frames = [
+        (1000 + i, _trade_frame("XBT/USD" if i % 2 else "ETH/USD", f"{i}.0"))
+        for i in range(20)
+    ]
+    capture.append('{"event":"heartbeat"}', received_ns=999)
+    for received_ns, frame in frames:
+        capture.append(frame, received_ns=received_ns)
+
+    # when
+    capture.close()
+    reader = CaptureReader(str(tmp_path))
+
+    # then
+    assert len(reader.segments) > 1
+    assert list(reader.read())[1:] == frames
+    assert list(reader.read(start_ns=1005, end_ns=1010, pair="XBT/USD")) == [
+        frame for frame in frames[5:10] if "XBT/USD" in frame[1]
+    ]
+    assert list(reader.read(channel_name="event")) == [(999, '{"event":"heartbeat"}')]
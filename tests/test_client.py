@@ -0,0 +1,54 @@
+import time
+
+import zmq
+
+import kraken_msg_pb2
+import kraken_msg_v2_pb2
+from client import FeedSubscriber, topic_message_class
+
+
+def test_topic_message_class():
+    # then
+    assert topic_message_class("Trade - XBT/USD") is kraken_msg_pb2.Trade
+    assert (
+        topic_message_class("v2 - OHLC - XBT/USD - Minutely") is kraken_msg_v2_pb2.OHLC
+    )
+    assert (
+        topic_message_class("Conflated - v2 - Ticker - XBT/USD")
+        is kraken_msg_v2_pb2.Ticker
+    )
+
+
+def test_feed_subscriber_drains_and_dispatches():
+    # given
+    zmq_context = zmq.Context()
+    zmq_pub_socket = zmq_context.socket(zmq.PUB)
+    zmq_pub_socket.bind("inproc://client")
+
+    subscriber = FeedSubscriber("inproc://client", zmq_context)
+    handled = []
+    subscriber.subscribe(
+        "Trade - XBT/USD", lambda topic, trade: handled.append(trade.price)
+    )
+    # let the subscription reach the PUB socket
+    time.sleep(0.1)
+
+    for price in [1.0, 2.0, 3.0]:
+        zmq_pub_socket.send_multipart(
+            [
+                b"Trade - XBT/USD",
+                kraken_msg_pb2.Trade(price=price).SerializeToString(),
+            ]
+        )
+    # prefix match of the subscription, but not a subscribed topic
+    zmq_pub_socket.send_multipart([b"Trade - XBT/USDT", b""])
+
+    # when
+    dispatched = subscriber.dispatch(timeout=1000)
+
+    # then
+    assert dispatched == 3
+    assert handled == [1.0, 2.0, 3.0]
+
+    subscriber.close()
+    zmq_context.destroy(linger=0)
@@ -0,0 +1,38 @@
+import zmq
+
+import kraken_msg_pb2
+from benchmarks.frames import OHLC, TICKER
+from conflation import Conflator
+from data import _channel_processors, _process_message
+
+
+def test_conflator_publishes_latest_message_per_topic():
+    # given
+    zmq_context = zmq.Context()
+    zmq_pull_socket = zmq_context.socket(zmq.PULL)
+    zmq_pull_socket.bind("inproc://conflation")
+    zmq_push_socket = zmq_context.socket(zmq.PUSH)
+    zmq_push_socket.connect("inproc://conflation")
+
+    conflator = Conflator(zmq_context, interval=3600, channels=["ticker"])
+    processors = _channel_processors()
+
+    for price in ["100.0", "101.0", "102.0"]:
+        frame = TICKER.replace("19556.20000", price)
+        conflator.offer(frame, _process_message(frame, processors))
+    conflator.offer(OHLC, _process_message(OHLC, processors))
+
+    # when
+    published = conflator.flush(zmq_push_socket.send_multipart)
+    messages = dict(zmq_pull_socket.recv_multipart() for _ in range(published))
+
+    # then
+    assert set(messages) == {
+        b"Conflated - Ticker - XBT/USD",
+        b"Conflated - v2 - Ticker - XBT/USD",
+    }
+    ticker = kraken_msg_pb2.Ticker.FromString(messages[b"Conflated - Ticker - XBT/USD"])
+    assert ticker.price == 102.0
+    assert conflator.flush(zmq_push_socket.send_multipart) == 0
+
+    zmq_context.destroy(linger=0)
@@ -0,0 +1,152 @@
+import json
+
+import pytest
+import zmq
+
+import settings
+from data import (
+    DROPPED_MESSAGES,
+    PRIORITY_TOPICS,
+    _channel_processors,
+    _process_message,
+    _push_function,
+    _route_message,
+    _split_pairs,
+)
+from feed_status import GapDetector
+from messages import process_raw_frame
+
+
+def test_route_message():
+    # given
+    kraken_message = json.dumps(
+        [
+            343,
+            ["1664478975.666711", "1664479020.000000", "19403.00000"],
+            "ohlc-1",
+            "XBT/USD",
+        ]
+    )
+
+    # when
+    channel_name, pair = _route_message(kraken_message)
+
+    # then
+    assert channel_name == "ohlc-1"
+    assert pair == "XBT/USD"
+
+
+def test_route_message_event():
+    # given
+    kraken_message = '{"event":"heartbeat"}'
+
+    # when
+    channel_name, pair = _route_message(kraken_message)
+
+    # then
+    assert channel_name is None
+    assert pair is None
+
+
+def test_split_pairs():
+    # given
+    pairs = ["XBT/USD", "ETH/USD", "XRP/USD"]
+
+    # when
+    groups = _split_pairs(pairs, 2)
+
+    # then
+    assert groups == [["XBT/USD", "XRP/USD"], ["ETH/USD"]]
+    assert _split_pairs(pairs[:1], 4) == [["XBT/USD"]]
+    with pytest.raises(ValueError, match="at least 1"):
+        _split_pairs(pairs, 0)
+
+
+def test_process_message():
+    # given
+    kraken_message = json.dumps(
+        [
+            341,
+            [
+                "19301.90000",
+                "19302.00000",
+                "1664477929.245247",
+                "4.06014894",
+                "0.00100000",
+            ],
+            "spread",
+            "XBT/USD",
+        ]
+    )
+
+    # when
+    processed_messages = _process_message(kraken_message, _channel_processors())
+
+    # then
+    assert [topic for topic, _ in processed_messages] == [
+        b"Spread - XBT/USD",
+        b"v2 - Spread - XBT/USD",
+    ]
+    assert _process_message('{"event":"heartbeat"}', _channel_processors()) == []
+
+
+def test_process_message_raw_channels(monkeypatch):
+    # given
+    monkeypatch.setattr(settings, "RAW_CHANNELS", {"spread": "both", "book": "raw"})
+    kraken_message = (
+        '[341,["19301.90000","19302.00000","1664477929.245247",'
+        '"4.06014894","0.00100000"],"spread","XBT/USD"]'
+    )
+    book_message = '[336,{"b":[["5541.30000","0.00000000","1534614335.345903"]]},"book-1000","XBT/USD"]'
+
+    # when
+    processors = _channel_processors()
+    processed_messages = _process_message(kraken_message, processors)
+    book_messages = _process_message(book_message, processors)
+
+    # then
+    assert [topic for topic, _ in processed_messages] == [
+        b"Raw - spread - XBT/USD",
+        b"Spread - XBT/USD",
+        b"v2 - Spread - XBT/USD",
+    ]
+    assert processed_messages[0][1].SerializeToString() == kraken_message.encode()
+    assert [(topic, raw.frame) for topic, raw in book_messages] == [
+        (b"Raw - book-1000 - XBT/USD", book_message)
+    ]
+
+
+def test_raw_only_trades_are_not_decoded(monkeypatch):
+    # given
+    monkeypatch.setattr(settings, "RAW_CHANNELS", {"trade": "raw"})
+
+    # when
+    processors = _channel_processors(gaps=GapDetector(["XBT/USD"]))
+
+    # then
+    assert processors["trade"] == [process_raw_frame]
+
+
+def test_priority_topics():
+    # then
+    assert PRIORITY_TOPICS[b"Trade - XBT/USD"]
+    assert PRIORITY_TOPICS[b"v2 - BookDelta - XBT/USD"]
+    assert not PRIORITY_TOPICS[b"Ticker - XBT/USD"]
+    assert not PRIORITY_TOPICS[b"Conflated - v2 - Spread - XBT/USD"]
+
+
+def test_push_or_drop_drops_on_saturated_socket():
+    # given
+    zmq_context = zmq.Context()
+    # a PUSH socket without peers can't queue any messages
+    zmq_push_socket = zmq_context.socket(zmq.PUSH)
+    push = _push_function(zmq_push_socket, "drop-by-priority")
+    dropped = DROPPED_MESSAGES[b"Ticker - ETH/USD"]
+
+    # when
+    push([b"Ticker - ETH/USD", b""])
+
+    # then
+    assert DROPPED_MESSAGES[b"Ticker - ETH/USD"] == dropped + 1
+
+    zmq_context.destroy(linger=0)
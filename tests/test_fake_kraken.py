@@ -0,0 +1,51 @@
+import asyncio
+import json
+
+import websockets
+
+from benchmarks.fake_kraken import FakeKrakenServer
+
+
+async def _received_channels(subscriptions: list, frames: int) -> set:
+    server = FakeKrakenServer(rate=1000)
+
+    async with websockets.serve(server.handler, "127.0.0.1", 0) as ws_server:
+        port = list(ws_server.sockets)[0].getsockname()[1]
+
+        async with websockets.connect(f"ws://127.0.0.1:{port}/") as ws:
+            for subscription in subscriptions:
+                await ws.send(
+                    json.dumps(
+                        {
+                            "event": "subscribe",
+                            "pair": ["XBT/USD"],
+                            "subscription": subscription,
+                        }
+                    )
+                )
+
+            channels = set()
+            while frames:
+                message = json.loads(await ws.recv())
+                if isinstance(message, list):
+                    channels.add(message[-2])
+                    frames -= 1
+
+            return channels
+
+
+def test_fake_kraken_sends_frames_of_every_subscription():
+    # given
+    subscriptions = [
+        {"name": "trade"},
+        {"name": "spread"},
+        {"name": "ticker"},
+        {"name": "ohlc", "interval": 5},
+        {"name": "book", "depth": 10},
+    ]
+
+    # when
+    channels = asyncio.run(_received_channels(subscriptions, 50))
+
+    # then
+    assert channels == {"trade", "spread", "ticker", "ohlc-5", "book-10"}
@@ -0,0 +1,41 @@
+from data import _reconnect_delay
+from feed_status import GapDetector
+
+
+def _trade_message(timestamp: str) -> list:
+    return [0, [["100.0", "1.0", timestamp, "b", "l", ""]], "trade", "XBT/USD"]
+
+
+def test_gap_detector_reports_trade_gap_after_reconnect():
+    # given
+    gaps = GapDetector(["XBT/USD"])
+    gaps.connected()
+    gaps.process_trade_message(_trade_message("1664456400.000000"))
+
+    # when
+    disconnected = gaps.disconnected("ping timeout")
+    connected = gaps.connected()
+    processed_messages = gaps.process_trade_message(_trade_message("1664456460.500000"))
+    later_messages = gaps.process_trade_message(_trade_message("1664456461.000000"))
+
+    # then
+    assert disconnected[-1][0] == b"v2 - FeedStatus - XBT/USD"
+    assert disconnected[-1][1].status == "disconnected"
+    assert disconnected[-1][1].reason == "ping timeout"
+    assert connected[-1][1].status == "connected"
+    assert connected[-1][1].gap_begin == disconnected[-1][1].gap_begin
+    assert connected[-1][1].gap_end >= connected[-1][1].gap_begin
+
+    topic, status = processed_messages[-1]
+    assert topic == b"v2 - FeedStatus - XBT/USD"
+    assert status.status == "gap"
+    assert status.channel == "trade"
+    assert status.gap_begin == 1664456400 * 10**9
+    assert status.gap_end == 1664456460500000000
+    assert later_messages == []
+
+
+def test_reconnect_delay_is_capped():
+    # then
+    assert 0 <= _reconnect_delay(0) <= 1.0
+    assert all(0 <= _reconnect_delay(30) <= 60.0 for _ in range(100))
@@ -0,0 +1,39 @@
+import zmq
+
+import kraken_msg_v2_pb2
+from data import _process_message
+from health import Watchdog
+
+
+def test_watchdog_publishes_stale_streams_and_reconnects():
+    # given
+    watchdog = Watchdog(zmq.Context(), 5.0, {"book": 60.0}, check_interval=3600)
+    connection = watchdog.register(["XBT/USD"])
+    closed = []
+    connection.opened(lambda: closed.append(True))
+    opened_at = connection.opened_at
+
+    _process_message('{"event":"heartbeat"}', {}, last_seen=connection.last_seen)
+    _process_message(
+        '[336,{"a":[["5541.30000","2.50700000","1534614248.456738"]]},'
+        '"book-10","XBT/USD"]',
+        {},
+        last_seen=connection.last_seen,
+    )
+    connection.last_seen[("book-10", "XBT/USD")] = opened_at - 60.0
+
+    # when
+    frames = watchdog.check(opened_at + 1.0)
+    frames_after_close = watchdog.check(opened_at + 2.0)
+
+    # then
+    assert set(connection.last_seen) == {None, ("book-10", "XBT/USD")}
+    assert closed == [True]
+    assert connection.close is None
+    assert frames_after_close == []
+
+    topic, payload = frames[-1]
+    feed_status = kraken_msg_v2_pb2.FeedStatus.FromString(payload)
+    assert topic == b"v2 - FeedStatus - XBT/USD"
+    assert feed_status.status == "stale"
+    assert feed_status.channel == "book-10"
@@ -0,0 +1,25 @@
+from last_value_cache import LastValueCache
+
+
+def test_last_value_cache_keeps_latest_messages_and_book_deltas():
+    # given
+    cache = LastValueCache()
+
+    # when
+    cache.update(b"Ticker - XBT/USD", b"1")
+    cache.update(b"Ticker - XBT/USD", b"2")
+    cache.update(b"Trade - XBT/USD", b"3")
+    cache.update(b"BookDelta - XBT/USD", b"4")
+    cache.update(b"BookSnapshot - XBT/USD", b"5")
+    cache.update(b"BookDelta - XBT/USD", b"6")
+
+    # then
+    assert cache.snapshot([b"Ticker"]) == [b"Ticker - XBT/USD", b"2"]
+    assert cache.snapshot([b"Trade"]) == []
+    assert cache.snapshot([b"BookDelta - XBT/USD"]) == [
+        b"BookSnapshot - XBT/USD",
+        b"5",
+        b"BookDelta - XBT/USD",
+        b"6",
+    ]
+    assert len(cache.snapshot([b""])) == 6
@@ -1,17 +1,37 @@
 import json
+import time
+
+import pytest
 from google.protobuf import json_format
 import kraken_msg_pb2
 from messages import (
+    TOPICS,
+    process_spread_message_v2,
+    process_trade_message_v2,
+    decode_message,
     process_ticker_message,
     process_spread_message,
     process_ohlc_message,
     process_trade_message,
+    process_book_message,
+    BookSnapshotTimer,
 )
 
 
+@pytest.fixture(autouse=True)
+def timezone(monkeypatch):
+    # v1 message times are formatted in local time, the expected values below
+    # are in the timezone the messages were recorded in
+    monkeypatch.setenv("TZ", "Europe/Belgrade")
+    time.tzset()
+    yield
+    monkeypatch.undo()
+    time.tzset()
+
+
 def test_process_ticker_message():
     # given
-    output_params = {"ticker": "XBT/USD", "price": 19556.20000}
+    output_params = {"pair": "XBT/USD", "price": 19556.20000}
     kraken_message = json.dumps(
         [
             340,
@@ -33,16 +53,18 @@ def test_process_ticker_message():
     expected = json_format.ParseDict(output_params, kraken_msg_pb2.Ticker())
 
     # when
-    kraken_message_proto = process_ticker_message(kraken_message)
+    topic, kraken_message_proto = process_ticker_message(kraken_message)
 
     # then
+    assert topic == b"Ticker - XBT/USD"
     assert expected == kraken_message_proto
 
 
 def test_process_ohlc_message():
     # given
     output_params = {
-        "ohlc": "XBT/USD",
+        "frequency": "Minutely",
+        "pair": "XBT/USD",
         "begin": "2022-09-29 21:16:15",
         "end": "2022-09-29 21:17:00",
         "open": 19403.0,
@@ -51,7 +73,7 @@ def test_process_ohlc_message():
         "close": 19420.0,
         "vwap": 19414.938,
         "volume": 1.9854417,
-        "number_of_trades": 52,
+        "trades": 52,
     }
     kraken_message = json.dumps(
         [
@@ -74,9 +96,10 @@ def test_process_ohlc_message():
     expected = json_format.ParseDict(output_params, kraken_msg_pb2.OHLC())
 
     # when
-    kraken_message_proto = process_ohlc_message(kraken_message)
+    topic, kraken_message_proto = process_ohlc_message(kraken_message)
 
     # then
+    assert topic == b"OHLC - XBT/USD - Minutely"
     assert expected == kraken_message_proto
 
 
@@ -97,7 +120,7 @@ def test_process_spread_message():
         ]
     )
     output_params = {
-        "spread": "XBT/USD",
+        "pair": "XBT/USD",
         "ask": 19302.0,
         "bid": 19301.9,
         "time": "2022-09-29 20:58:49",
@@ -107,9 +130,10 @@ def test_process_spread_message():
     expected = json_format.ParseDict(output_params, kraken_msg_pb2.Spread())
 
     # when
-    kraken_message_proto = process_spread_message(kraken_message)
+    topic, kraken_message_proto = process_spread_message(kraken_message)
 
     # then
+    assert topic == b"Spread - XBT/USD"
     assert expected == kraken_message_proto
 
 
@@ -124,18 +148,226 @@ def test_process_trade_message():
         ]
     )
     output_params = {
-        "trade": "XBT/USD",
+        "pair": "XBT/USD",
         "price": 19416.2,
         "volume": 0.001,
         "time": "2022-09-29 21:19:34",
-        "side": "s",
-        "order_type": "m",
+        "side": "Sell",
+        "order_type": "Market",
         "misc": "",
     }
     expected = json_format.ParseDict(output_params, kraken_msg_pb2.Trade())
 
     # when
-    kraken_message_proto = process_trade_message(kraken_message)
+    [(topic, kraken_message_proto)] = process_trade_message(kraken_message)
 
     # then
+    assert topic == b"Trade - XBT/USD"
     assert expected == kraken_message_proto
+
+
+def test_process_book_message():
+    # given
+    order_books = {}
+    snapshot = json.dumps(
+        [
+            336,
+            {
+                "as": [["19302.00000", "0.50000000", "1664477929.245247"]],
+                "bs": [["19301.90000", "4.00000000", "1664477929.245247"]],
+            },
+            "book-10",
+            "XBT/USD",
+        ]
+    )
+    update = json.dumps(
+        [
+            336,
+            {"a": [["19302.10000", "1.00000000", "1664477930.245247"]]},
+            {"b": [["19301.90000", "0.00000000", "1664477930.245247"]]},
+            "book-10",
+            "XBT/USD",
+        ]
+    )
+
+    # when
+    snapshot_messages = process_book_message(snapshot, order_books)
+    delta_messages = process_book_message(update, order_books, snapshot_interval=0)
+
+    # then
+    assert [topic for topic, _ in snapshot_messages] == [b"BookSnapshot - XBT/USD"]
+    assert [topic for topic, _ in delta_messages] == [
+        b"BookDelta - XBT/USD",
+        b"BookSnapshot - XBT/USD",
+    ]
+
+    delta, book = delta_messages[0][1], delta_messages[1][1]
+    assert delta.sequence == book.sequence == 1
+    assert [level.price for level in delta.asks] == pytest.approx([19302.1])
+    assert [level.volume for level in delta.bids] == [0.0]
+    assert [level.price for level in book.asks] == pytest.approx([19302.0, 19302.1])
+    assert len(book.bids) == 0
+    assert order_books["XBT/USD"].depth == 10
+
+
+def test_book_snapshot_timer_snapshots_quiet_books():
+    # given
+    snapshots = BookSnapshotTimer(snapshot_interval=10.0)
+    snapshot = json.dumps(
+        [
+            336,
+            {
+                "as": [["19302.00000", "0.50000000", "1664477929.245247"]],
+                "bs": [["19301.90000", "4.00000000", "1664477929.245247"]],
+            },
+            "book-10",
+            "XBT/USD",
+        ]
+    )
+    process_book_message(snapshot, snapshots.order_books)
+    snapshot_time = snapshots.order_books["XBT/USD"].snapshot_time
+
+    # when
+    early_messages = snapshots.due(snapshot_time + 5.0)
+    due_messages = snapshots.due(snapshot_time + 10.0)
+    later_messages = snapshots.due(snapshot_time + 15.0)
+
+    # then
+    assert early_messages == []
+    assert [topic for topic, _ in due_messages] == [b"BookSnapshot - XBT/USD"]
+    assert [level.price for level in due_messages[0][1].bids] == pytest.approx(
+        [19301.9]
+    )
+    assert later_messages == []
+
+
+def test_decode_message():
+    # given
+    heartbeat = '{"event":"heartbeat"}'
+    spread = '[341,["19301.90000","19302.00000"],"spread","XBT/USD"]'
+
+    # when
+    decoded_heartbeat = decode_message(heartbeat)
+    decoded_spread = decode_message(spread.encode())
+
+    # then
+    assert isinstance(decoded_heartbeat, dict)
+    assert decoded_spread == [341, ["19301.90000", "19302.00000"], "spread", "XBT/USD"]
+    assert decode_message(decoded_spread) is decoded_spread
+
+
+def test_process_trade_message_multiple_trades():
+    # given
+    kraken_message = json.dumps(
+        [
+            337,
+            [
+                ["19416.20000", "0.00100000", "1664479174.047114", "s", "m", ""],
+                ["19416.10000", "0.02500000", "1664479174.047390", "b", "l", ""],
+            ],
+            "trade",
+            "XBT/USD",
+        ]
+    )
+
+    # when
+    processed_messages = process_trade_message(kraken_message, batch=True)
+
+    # then
+    topics = [topic for topic, _ in processed_messages]
+    assert topics == [b"TradeBatch - XBT/USD", b"Trade - XBT/USD", b"Trade - XBT/USD"]
+
+    trade_batch = processed_messages[0][1]
+    assert list(trade_batch.trades) == [trade for _, trade in processed_messages[1:]]
+    assert [trade.volume for trade in trade_batch.trades] == pytest.approx(
+        [0.001, 0.025]
+    )
+    assert [trade.side for trade in trade_batch.trades] == ["Sell", "Buy"]
+
+
+def test_process_spread_message_v2():
+    # given
+    kraken_message = json.dumps(
+        [
+            341,
+            [
+                "19301.90000",
+                "19302.00000",
+                "1664477929.245247",
+                "4.06014894",
+                "0.00100000",
+            ],
+            "spread",
+            "XBT/USD",
+        ]
+    )
+
+    # when
+    topic, spread = process_spread_message_v2(kraken_message)
+
+    # then
+    assert topic == b"v2 - Spread - XBT/USD"
+    assert spread.bid == 19301.9
+    assert spread.ask == 19302.0
+    assert spread.time == 1664477929245247000
+    assert spread.bid_volume == 4.06014894
+    assert spread.ask_volume == 0.001
+
+
+def test_process_trade_message_v2():
+    # given
+    kraken_message = json.dumps(
+        [
+            337,
+            [["19416.20000", "0.00100000", "1664479174.047114", "s", "m", ""]],
+            "trade",
+            "XBT/USD",
+        ]
+    )
+
+    # when
+    [(topic, trade)] = process_trade_message_v2(kraken_message)
+
+    # then
+    assert topic == b"v2 - Trade - XBT/USD"
+    assert trade.price == 19416.2
+    assert trade.volume == 0.001
+    assert trade.time == 1664479174047114000
+    assert trade.side == "Sell"
+
+
+def test_topic_table():
+    # when
+    topic = TOPICS["", "OHLC", "ETH/USD", "Hourly"]
+
+    # then
+    assert topic == b"OHLC - ETH/USD - Hourly"
+    assert TOPICS["v2 - ", "Trade", "ETH/USD", ""] == b"v2 - Trade - ETH/USD"
+    assert TOPICS["", "OHLC", "ETH/USD", "Hourly"] is topic
+
+
+def test_process_ohlc_message_intervals():
+    # given
+    kraken_messages = {
+        interval: [
+            343,
+            ["1664478975.666711", "1664479020.000000", *["19403.00000"] * 5, "1", 1],
+            f"ohlc-{interval}",
+            "XBT/USD",
+        ]
+        for interval in [5, 240, 10080, 21600]
+    }
+
+    # when
+    topics = {
+        interval: process_ohlc_message(kraken_message)[0]
+        for interval, kraken_message in kraken_messages.items()
+    }
+
+    # then
+    assert topics == {
+        5: b"OHLC - XBT/USD - 5 Minutes",
+        240: b"OHLC - XBT/USD - 4 Hours",
+        10080: b"OHLC - XBT/USD - Weekly",
+        21600: b"OHLC - XBT/USD - 15 Days",
+    }
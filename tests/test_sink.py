@@ -0,0 +1,41 @@
+import kraken_msg_v2_pb2
+from sink import ColumnarSink, read
+
+# 2022-09-29 19:19:34 UTC
+TIME_NS = 1664479174047114000
+
+
+def test_columnar_sink_writes_readable_columns(tmp_path):
+    # given
+    sink = ColumnarSink(str(tmp_path))
+    trade_batch = kraken_msg_v2_pb2.TradeBatch(
+        pair="XBT/USD",
+        trades=[
+            kraken_msg_v2_pb2.Trade(
+                pair="XBT/USD", price=19416.2, volume=0.001, time=TIME_NS, side="Sell"
+            ),
+            kraken_msg_v2_pb2.Trade(
+                pair="XBT/USD", price=19416.1, volume=0.025, time=TIME_NS + 1
+            ),
+        ],
+    )
+    bar = {"pair": "XBT/USD", "frequency": "Minutely", "open": 1.0}
+
+    # when
+    sink.handle(b"v2 - TradeBatch - XBT/USD", trade_batch.SerializeToString())
+    for end in [60, 60, 120]:
+        sink.handle(
+            b"v2 - OHLC - XBT/USD - Minutely",
+            kraken_msg_v2_pb2.OHLC(**bar, end=TIME_NS + end).SerializeToString(),
+        )
+    sink.flush()
+
+    # then
+    trades = read(str(tmp_path), "trades", "XBT/USD", "2022-09-29")
+    assert trades["price"].tolist() == [19416.2, 19416.1]
+    assert trades["time"].tolist() == [TIME_NS, TIME_NS + 1]
+    assert trades["side"].tolist() == [1, 0]
+
+    # only the first bar is closed
+    ohlc = read(str(tmp_path), "ohlc", "XBT/USD", "2022-09-29", frequency="Minutely")
+    assert ohlc["end"].tolist() == [TIME_NS + 60]
@@ -0,0 +1,81 @@
+from collections import Counter
+import json
+import threading
+
+import zmq
+
+from benchmarks.frames import TRADE
+from data import _channel_processors, _process_message
+from stats import Histogram, LatencyStats
+
+
+def test_histogram_percentiles():
+    # given
+    histogram = Histogram()
+
+    # when
+    for value in range(1, 10001):
+        histogram.record(value)
+
+    # then
+    assert histogram.count == 10000
+    assert histogram.max == 10000
+    assert abs(histogram.percentile(50) - 5000) <= 5000 / 32
+    assert abs(histogram.percentile(99) - 9900) <= 9900 / 32
+    assert abs(histogram.percentile(99.9) - 9990) <= 9990 / 32
+
+
+def test_process_message_records_stages():
+    # given
+    stats = LatencyStats()
+
+    # when
+    processed_messages = _process_message(TRADE, _channel_processors(), stats)
+
+    # then
+    assert processed_messages
+    stages = stats.summary()["trade|XBT/USD"]
+    assert set(stages) == {"build", "decode", "lag"}
+    assert stages["decode"]["count"] == 1
+
+
+def test_proxy_keeps_worker_summaries_unpublished():
+    # given
+    zmq_context = zmq.Context()
+    zmq_pull_socket = zmq_context.socket(zmq.PULL)
+    zmq_pull_socket.bind("inproc://stats_pull")
+    zmq_push_socket = zmq_context.socket(zmq.PUSH)
+    zmq_push_socket.connect("inproc://stats_pull")
+    zmq_pub_socket = zmq_context.socket(zmq.PUB)
+    zmq_pub_socket.bind("inproc://stats_pub")
+    zmq_sub_socket = zmq_context.socket(zmq.SUB)
+    zmq_sub_socket.setsockopt(zmq.SUBSCRIBE, b"")
+    zmq_sub_socket.connect("inproc://stats_pub")
+
+    worker_stats = LatencyStats()
+    _process_message(TRADE, _channel_processors(), worker_stats)
+    stats = LatencyStats()
+    threading.Thread(
+        target=stats.proxy, args=(zmq_pull_socket, zmq_pub_socket), daemon=True
+    ).start()
+
+    # when
+    zmq_push_socket.send_multipart(
+        [b"Stats", json.dumps(worker_stats.summary()).encode()]
+    )
+    zmq_push_socket.send_multipart([b"Trade - XBT/USD", b""])
+
+    # then
+    assert zmq_sub_socket.recv_multipart() == [b"Trade - XBT/USD", b""]
+    assert stats.summary()["trade|XBT/USD"]["decode"]["count"] == 1
+
+
+def test_summary_reports_counters():
+    # given
+    stats = LatencyStats({"dropped": Counter({b"Ticker - ETH/USD": 3})})
+
+    # when
+    summary = stats.summary()
+
+    # then
+    assert summary["Ticker - ETH/USD"] == {"dropped": {"count": 3}}